@@ -1,6 +1,16 @@
 from .analyzer import analyze_ticket
-from .rag import rag_answer
+from .rag import rag_answer, rag_answer_batch
 from .evaluator import evaluate
-from .responder import generate_response
-from .orchestrator import process_ticket
-__all__ = ["analyze_ticket", "rag_answer", "evaluate", "generate_response", "process_ticket"]
\ No newline at end of file
+from .responder import generate_response, generate_response_async
+from .orchestrator import process_ticket, process_ticket_async, process_tickets_batch_async
+__all__ = [
+    "analyze_ticket",
+    "rag_answer",
+    "rag_answer_batch",
+    "evaluate",
+    "generate_response",
+    "generate_response_async",
+    "process_ticket",
+    "process_ticket_async",
+    "process_tickets_batch_async",
+]
\ No newline at end of file
@@ -1,30 +1,20 @@
 # app/agents/analyzer.py
 from app.schemas import AnalysisResult
 from app.utils.llm import call_llm
+from app.utils.text import collapse_whitespace, extract_keywords
 import json
 import re
 
 SYSTEM = """You are a support ticket analyzer.
 Return only valid JSON with fields: summary, keywords in the same language as the ticket
 """
-def call_llm(system: str, prompt: str, temperature: float = 0):
+def call_llm(system: str, prompt: str, temperature: float = 0, stage: str = "analyzer"):
   # Minimal analyzer: disable external LLM and force local fallback
   return None
 def _fallback_analysis(text: str) -> AnalysisResult:
-  clean = re.sub(r"\s+", " ", text).strip()
+  clean = collapse_whitespace(text)
   summary = clean[:200] if clean else ""
-  tokens = re.findall(r"[A-Za-zÀ-ÖØ-öø-ÿ']+", clean.lower())
-  stop = {"the","a","an","and","or","for","to","of","in","on","with","without","my","your","i","you","he","she","we","they","is","are","be","been","le","la","les","un","une","des","de","du","dans","et","ou","pour","sur","avec","sans","mon","ma","mes","votre","vos","je","tu","il","elle","nous","vous","ils","elles","ne","pas","au","aux","ce","cet","cette","ces","est","été","être"}
-  keywords = []
-  seen = set()
-  for t in tokens:
-    if t in stop or len(t) < 3:
-      continue
-    if t not in seen:
-      seen.add(t)
-      keywords.append(t)
-    if len(keywords) >= 8:
-      break
+  keywords = extract_keywords(clean)
   if not keywords and clean:
     keywords = [clean.split()[0]]
   return AnalysisResult(summary=summary, keywords=keywords)
@@ -53,7 +43,7 @@ def analyze_ticket(text: str) -> AnalysisResult:
   )
   output = None
   try:
-    output = call_llm(SYSTEM, prompt, temperature=0)
+    output = call_llm(SYSTEM, prompt, temperature=0, stage="analyzer")
     if not output or not isinstance(output, str):
       return _fallback_analysis(text)
     return AnalysisResult(**json.loads(output))
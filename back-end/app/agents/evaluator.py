@@ -1,12 +1,12 @@
 # app/agents/evaluator.py
 from app.schemas import EvaluationResult
-from textblob import TextBlob  # for simple sentiment analysis, can swap with any lib
+from app.utils.text import polarity
 
 # Configurable thresholds / rules
 CONFIDENCE_THRESHOLD = 0.6
 NEGATIVE_EMOTION_THRESHOLD = -0.2  # sentiment polarity below this triggers escalation
 
-def evaluate(summary: str, rag_answer: str, snippets_confidences: list[float], keywords: list[str]) -> EvaluationResult:
+def evaluate(summary: str, rag_answer: str, snippets_confidences: list[float], keywords: list[str], sentiment: float | None = None) -> EvaluationResult:
     """
     Evaluate the RAG answer and return a decision and confidence score.
 
@@ -15,6 +15,7 @@ def evaluate(summary: str, rag_answer: str, snippets_confidences: list[float], k
     - rag_answer: answer retrieved from KB
     - snippets_confidences: list of confidence scores for each snippet (0-1)
     - keywords: extracted keywords from ticket
+    - sentiment: polarity of summary when already scored (e.g. with polarity_batch)
     """
 
     # 1. Average confidence check
@@ -30,7 +31,8 @@ def evaluate(summary: str, rag_answer: str, snippets_confidences: list[float], k
 
     # 2. Negative emotion detection in summary
     try:
-        sentiment = TextBlob(summary).sentiment.polarity
+        if sentiment is None:
+            sentiment = polarity(summary)
         if sentiment < NEGATIVE_EMOTION_THRESHOLD:
             return EvaluationResult(
                 decision="ESCALATE",
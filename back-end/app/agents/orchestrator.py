@@ -1,22 +1,396 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from app.schemas import TicketInput, AnalysisResult, RagResult, EvaluationResult, FinalResponse
+from app.schemas import TicketInput, AnalysisResult, RagResult, RagSnippet, EvaluationResult, FinalResponse
 from app.agents import analyze_ticket , rag_answer, evaluate, generate_response
-from typing import Optional
+from app.agents import semantic_cache
+from app.agents.evaluator import CONFIDENCE_THRESHOLD, NEGATIVE_EMOTION_THRESHOLD
+from app.agents.rag import cosine_from_distance, pack_context, rag_answer_batch, result_from_snippets
+from app.agents.responder import extractive_response, generate_response_async
+from app.rag.vectorstore import embed_ahead_async, embed_texts, index_version
+from app.utils.executor import get_inference_executor, run_inference
+from app.utils.singleflight import SingleFlight, AsyncSingleFlight
+from app.utils.tracing import stage_seconds, stage_span
+from app.utils import deadline, degradation, metrics
+from app.utils.deadline import DeadlineExceeded
+from app.utils.degradation import CircuitOpen
+from app.utils.text import detect_language, normalize_text, polarity, polarity_batch
+from typing import Awaitable, Callable, Optional, Union
+import asyncio
+import hashlib
+import os
 
-app = FastAPI(title="Multi-Agent Ticketing System")
+# Coalesce concurrent tickets with the same normalized content into one pipeline run
+SINGLE_FLIGHT_ENABLED = True
+_ticket_flight = SingleFlight("process_ticket")
+_ticket_flight_async = AsyncSingleFlight("process_ticket_async")
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Speculative retrieval: retrieve on the raw ticket text while analysis runs,
+# keep that result when the summary embeds within SPECULATIVE_MIN_SIMILARITY of it
+SPECULATIVE_RETRIEVAL = os.environ.get("SPECULATIVE_RETRIEVAL", "0") == "1"
+SPECULATIVE_MIN_SIMILARITY = float(os.environ.get("SPECULATIVE_MIN_SIMILARITY", "0.9"))
+
+# Speculative response: start the responder LLM call while evaluation runs and
+# cancel it if the ticket is escalated (async single-ticket path). Off by
+# default: evaluation is cheap, and escalated tickets still pay for the call
+SPECULATIVE_RESPONSE = os.environ.get("SPECULATIVE_RESPONSE", "0") == "1"
+
+# FAQ fast path: approved tickets whose top snippet is an FAQ chunk at least this
+# close (cosine) are answered from a template quoting the chunk's entry whose
+# question matches the ticket (responder.faq_answer_text), without the LLM call.
+# Off by default: the reply is only as good as the question matching
+FAQ_FAST_PATH = os.environ.get("FAQ_FAST_PATH", "0") == "1"
+FAQ_FAST_PATH_MIN_SIMILARITY = float(os.environ.get("FAQ_FAST_PATH_MIN_SIMILARITY", "0.85"))
+
+# Max concurrent evaluate + LLM calls for one batch
+BATCH_LLM_CONCURRENCY = int(os.environ.get("BATCH_LLM_CONCURRENCY", "8"))
+
+speculative_retrievals = metrics.counter("speculative_retrieval_total", "Speculative retrievals by outcome (reused / rerun)")
+speculative_responses = metrics.counter("speculative_response_total", "Speculative responder calls by outcome (used / wasted)")
+faq_fast_path_tickets = metrics.counter("faq_fast_path_tickets_total", "Tickets answered from an FAQ template without an LLM call")
+faq_fast_path_seconds_saved = metrics.counter("faq_fast_path_seconds_saved_total", "Estimated responder latency avoided by the FAQ fast path")
+deadline_skips = metrics.counter("pipeline_deadline_skips_total", "Stages skipped or cut short because the request deadline was too close, by stage")
+tickets_aborted = metrics.counter("pipeline_tickets_aborted_total", "Tickets dropped before an expensive stage, by stage")
+
+# Async callable returning True when the ticket is no longer wanted (e.g. client disconnected)
+AbortCheck = Optional[Callable[[], Awaitable[bool]]]
+
+
+class TicketAborted(Exception):
+    """Raised when should_abort() reports the caller is gone before an expensive stage."""
+
+
+def ticket_flight_key(content: str, cosine_threshold: float, budget: Optional[int] = None) -> str:
+    """
+    Single-flight key of a ticket. budget is deadline.budget_bucket() of the
+    caller: the shared run uses its leader's deadline, so only requests with a
+    similar time budget wait for it (a 2s request must not hand its
+    deadline-degraded answer to a 25s one).
+    """
+    return hashlib.sha256(f"{cosine_threshold}|{budget}|{normalize_text(content)}".encode()).hexdigest()
 
 
 def process_ticket(ticket: TicketInput, cosine_threshold: float = 0.6) -> FinalResponse:
+    """
+    Run the ticket pipeline. Identical tickets (after normalization) submitted
+    while one is already being processed wait for it and share its result,
+    rewritten with their own ticket_id.
+
+    cosine_threshold is the minimum calibrated snippet confidence kept for the
+    prompt (app.rag.scoring), not a raw cosine; the name is kept for callers.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return _run_pipeline_cached(ticket, cosine_threshold)
+
+    key = ticket_flight_key(ticket.content, cosine_threshold, deadline.budget_bucket())
+    result, shared = _ticket_flight.do(key, lambda: _run_pipeline_cached(ticket, cosine_threshold))
+    if shared:
+        return result.model_copy(update={"ticket_id": ticket.ticket_id})
+    return result
+
+
+async def process_ticket_async(
+    ticket: TicketInput,
+    cosine_threshold: float = 0.6,
+    should_abort: AbortCheck = None,
+) -> FinalResponse:
+    """
+    Async twin of process_ticket: LLM calls are awaited on the event loop,
+    analysis and embedding/FAISS search run on the bounded inference
+    executor (app.utils.executor).
+
+    should_abort is polled before retrieval and before the LLM call; when it
+    returns True the run stops with TicketAborted. Within a deadline_scope
+    (app.utils.deadline) the ticket is escalated or answered without the LLM
+    when too little time is left.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return await _run_pipeline_cached_async(ticket, cosine_threshold, should_abort)
+
+    key = ticket_flight_key(ticket.content, cosine_threshold, deadline.budget_bucket())
+    while True:
+        try:
+            result, shared = await _ticket_flight_async.do(
+                key, lambda: _run_pipeline_cached_async(ticket, cosine_threshold, should_abort)
+            )
+        except TicketAborted:
+            # The shared run was dropped by its leader's caller; retry unless we are gone too
+            if should_abort is None or not await should_abort():
+                continue
+            raise
+        if shared:
+            return result.model_copy(update={"ticket_id": ticket.ticket_id})
+        return result
+
+
+def _semantic_key(ticket: TicketInput) -> Optional[tuple]:
+    """
+    (embedding, language, KB index version) of a ticket for the semantic
+    answer cache, None when the cache is off or must not answer this ticket.
+    """
+    if not semantic_cache.SEMANTIC_CACHE_ENABLED:
+        return None
+    # Upset customers go through evaluate(), which may escalate them
+    if polarity(ticket.content) < NEGATIVE_EMOTION_THRESHOLD:
+        return None
+    try:
+        vector = embed_texts([ticket.content])[0]
+    except Exception as e:
+        print(f"Semantic cache skipped, embedding failed: {e}")
+        return None
+    return vector, detect_language(ticket.content), index_version()
+
+
+def _from_cache(ticket: TicketInput, key: Optional[tuple], cosine_threshold: float) -> Optional[FinalResponse]:
+    if key is None:
+        return None
+    vector, language, version = key
+    cached = semantic_cache.answer_cache.lookup(vector, language, cosine_threshold, version)
+    return cached.model_copy(update={"ticket_id": ticket.ticket_id}) if cached is not None else None
+
+
+def _to_cache(key: Optional[tuple], cosine_threshold: float, result: FinalResponse):
+    if key is not None:
+        vector, language, version = key
+        semantic_cache.answer_cache.store(vector, language, cosine_threshold, version, result)
+
+
+def _run_pipeline_cached(ticket: TicketInput, cosine_threshold: float) -> FinalResponse:
+    """_run_pipeline behind the semantic answer cache."""
+    key = _semantic_key(ticket)
+    cached = _from_cache(ticket, key, cosine_threshold)
+    if cached is not None:
+        return cached
+    result = _run_pipeline(ticket, cosine_threshold)
+    _to_cache(key, cosine_threshold, result)
+    return result
+
+
+async def _run_pipeline_cached_async(ticket: TicketInput, cosine_threshold: float, should_abort: AbortCheck = None) -> FinalResponse:
+    key = await run_inference(_semantic_key, ticket) if semantic_cache.SEMANTIC_CACHE_ENABLED else None
+    cached = _from_cache(ticket, key, cosine_threshold)
+    if cached is not None:
+        return cached
+    result = await _run_pipeline_async(ticket, cosine_threshold, should_abort)
+    _to_cache(key, cosine_threshold, result)
+    return result
+
+
+async def _check_abort(should_abort: AbortCheck, stage: str):
+    if should_abort is not None and await should_abort():
+        tickets_aborted.inc(stage=stage)
+        raise TicketAborted(f"Ticket dropped before {stage}")
+
+
+def _speculation_matches(raw: str, summary: str) -> bool:
+    """
+    True when retrieving on summary would be close enough to retrieving on raw.
+    The speculative retrieval left raw's vector in the query embedding cache,
+    so only the summary is embedded here (and reused if retrieval reruns).
+    """
+    if normalize_text(raw) == normalize_text(summary):
+        return True
+    import numpy as np
+    raw_vec, summary_vec = embed_texts([raw, summary])
+    # Embeddings are normalized: the dot product is the cosine
+    return float(np.dot(raw_vec, summary_vec)) >= SPECULATIVE_MIN_SIMILARITY
+
+
+def _take_speculative(speculative, raw: str, summary: str) -> RagResult:
+    """Sync path: result of the speculative retrieval future, or a fresh retrieval on summary."""
+    if _speculation_matches(raw, summary):
+        try:
+            result = speculative.result()
+            speculative_retrievals.inc(outcome="reused")
+            return result
+        except Exception as e:
+            print(f"Speculative retrieval failed, retrieving on the summary: {e}")
+    speculative.cancel()
+    speculative_retrievals.inc(outcome="rerun")
+    return rag_answer(summary)
+
+
+async def _rag_answer_async(summary: str) -> RagResult:
+    """
+    rag_answer on the inference executor. With micro-batching the summary is
+    embedded first, from the event loop, in a batch shared with concurrent
+    tickets; the worker then only searches.
+    """
+    await embed_ahead_async([summary])
+    return await run_inference(rag_answer, summary)
+
+
+async def _take_speculative_async(speculative: asyncio.Future, raw: str, summary: str) -> RagResult:
+    await embed_ahead_async([summary])
+    if await run_inference(_speculation_matches, raw, summary):
+        try:
+            result = await speculative
+            speculative_retrievals.inc(outcome="reused")
+            return result
+        except Exception as e:
+            print(f"Speculative retrieval failed, retrieving on the summary: {e}")
+    _drop_speculative(speculative)
+    speculative_retrievals.inc(outcome="rerun")
+    return await _rag_answer_async(summary)
+
+
+def _drop_speculative(speculative: asyncio.Future):
+    """Cancel an unused speculative retrieval, or consume its error if it already failed."""
+    if not speculative.done():
+        speculative.cancel()
+    elif not speculative.cancelled():
+        speculative.exception()
+
+
+def _filter_by_similarity(rag_result: RagResult, min_confidence: float) -> RagResult:
+    """
+    Keep snippets whose calibrated confidence (app.rag.scoring) is at least
+    min_confidence, in one pass over the snippet list. Callers pass their
+    cosine_threshold here: the name predates calibration, the value is a
+    confidence, not a raw cosine.
+    """
+    if not rag_result.snippets:
+        return rag_result
+    return result_from_snippets([s for s in rag_result.snippets if s.score >= min_confidence])
+
+
+def _snippet_confidences(rag_result: RagResult) -> list[float]:
+    """Calibrated confidence of each snippet the responder will see (set by build_rag_result)."""
+    if not rag_result.snippets:
+        return [rag_result.similarity_score or 0.0]
+    return [s.score for s in rag_result.snippets]
+
+
+def _expected_confidence(rag_result: RagResult) -> float:
+    """The confidence_score evaluate() will report for rag_result, known before it runs."""
+    confidences = _snippet_confidences(rag_result)
+    return round(sum(confidences) / (len(confidences) or 1), 3)
+
+
+def _evaluate(analysis: AnalysisResult, rag_result: RagResult, sentiment: float | None = None) -> EvaluationResult:
+    evaluation: EvaluationResult = evaluate(
+        summary=analysis.summary,
+        rag_answer=rag_result.context,
+        snippets_confidences=_snippet_confidences(rag_result),
+        keywords=analysis.keywords,
+        sentiment=sentiment
+    )
+    print(f"Evaluation decision: {evaluation.decision}, reason: {evaluation.reason}")
+    return evaluation
+
+
+def _faq_hit(rag_result: RagResult) -> Optional[RagSnippet]:
+    if not FAQ_FAST_PATH or not rag_result.snippets:
+        return None
+    top = rag_result.snippets[0]
+    if top.category != "faq" or cosine_from_distance(top.distance) < FAQ_FAST_PATH_MIN_SIMILARITY:
+        return None
+    return top
+
+
+def _fast_path_response(ticket: TicketInput, rag_result: RagResult) -> Optional[FinalResponse]:
+    """Templated answer for a near-exact FAQ hit, None when the LLM is still needed."""
+    top = _faq_hit(rag_result)
+    if top is None:
+        return None
+    response = extractive_response(top.text, ticket)
+    if response is not None:
+        faq_fast_path_tickets.inc()
+        # Saved latency is estimated as the mean responder stage time
+        count = stage_seconds.count(stage="generate_response")
+        if count:
+            faq_fast_path_seconds_saved.inc(stage_seconds.sum(stage="generate_response") / count)
+    return response
+
+
+def _generation_inputs(rag_result: RagResult) -> tuple[str, str, Optional[float]]:
+    """
+    (mode, context, latency_target) for the responder under the current LLM
+    health and request deadline. The latency target never exceeds the time left.
+    """
+    mode = degradation.controller.mode()
+    context, latency_target = rag_result.context, None
+    if mode == degradation.REDUCED:
+        degradation.degraded_responses.inc(mode="reduced")
+        snippets = rag_result.snippets[:degradation.REDUCED_MAX_SNIPPETS]
+        context = pack_context(snippets) if snippets else rag_result.context
+        latency_target = degradation.REDUCED_LATENCY_TARGET
+    left = deadline.remaining()
+    if left is not None:
+        latency_target = left if latency_target is None else min(latency_target, left)
+    return mode, context, latency_target
+
+
+def _llm_refusal(mode: str, latency_target: Optional[float]) -> Optional[str]:
+    """Why the responder LLM must not be called, None when it may."""
+    if mode == degradation.OPEN:
+        return "LLM unavailable"
+    if deadline.remaining() is not None and latency_target < deadline.LLM_MIN_BUDGET_SECONDS:
+        deadline_skips.inc(stage="generate_response")
+        return "Not enough time left to generate a response"
+    return None
+
+
+def _degraded_response(ticket: TicketInput, rag_result: RagResult, reason: str) -> FinalResponse:
+    """Answer without the LLM: extractive reply from the top snippet, or escalation."""
+    if degradation.DEGRADED_OPEN_MODE == "extractive" and rag_result.snippets:
+        response = extractive_response(rag_result.snippets[0].text, ticket)
+        if response is not None:
+            degradation.degraded_responses.inc(mode="extractive")
+            return response.model_copy(update={"reason": f"Answered from knowledge base ({reason})."})
+    degradation.degraded_responses.inc(mode="escalate")
+    return FinalResponse(
+        ticket_id=ticket.ticket_id,
+        response="Ticket escalated to human support.",
+        escalated=True,
+        reason=reason
+    )
+
+
+def _respond(ticket: TicketInput, rag_result: RagResult, confidence: float) -> FinalResponse:
+    mode, context, latency_target = _generation_inputs(rag_result)
+    refusal = _llm_refusal(mode, latency_target)
+    if refusal:
+        return _degraded_response(ticket, rag_result, refusal)
+    try:
+        return generate_response(context=context, ticket=ticket, confidence=confidence, latency_target=latency_target)
+    except CircuitOpen:
+        return _degraded_response(ticket, rag_result, "LLM unavailable")
+    except DeadlineExceeded:
+        return _degraded_response(ticket, rag_result, "Deadline exceeded while generating a response")
+
+
+async def _respond_async(ticket: TicketInput, rag_result: RagResult, confidence: float) -> FinalResponse:
+    mode, context, latency_target = _generation_inputs(rag_result)
+    refusal = _llm_refusal(mode, latency_target)
+    if refusal:
+        return _degraded_response(ticket, rag_result, refusal)
+    try:
+        return await generate_response_async(context=context, ticket=ticket, confidence=confidence, latency_target=latency_target)
+    except CircuitOpen:
+        return _degraded_response(ticket, rag_result, "LLM unavailable")
+    except DeadlineExceeded:
+        return _degraded_response(ticket, rag_result, "Deadline exceeded while generating a response")
+
+
+def _out_of_time(ticket: TicketInput, stage: str) -> FinalResponse:
+    """Escalate a ticket whose deadline passed before `stage` could start."""
+    deadline_skips.inc(stage=stage)
+    return FinalResponse(
+        ticket_id=ticket.ticket_id,
+        response="Ticket escalated to human support.",
+        escalated=True,
+        reason="Deadline exceeded"
+    )
+
+
+def _escalated_response(ticket: TicketInput, evaluation: EvaluationResult) -> FinalResponse:
+    return FinalResponse(
+        ticket_id=ticket.ticket_id,
+        response=f"Ticket escalated to human support.",
+        escalated=True,
+        reason=evaluation.reason
+    )
+
+
+def _run_pipeline(ticket: TicketInput, cosine_threshold: float) -> FinalResponse:
     """
     Complete pipeline for a ticket:
     1. Analyze ticket content and extract key words and make summary
@@ -25,48 +399,198 @@ def process_ticket(ticket: TicketInput, cosine_threshold: float = 0.6) -> FinalR
     4. Generate final response if approved or generate reason of escalation
     """
 
-    # Step 1: Analyze
-    
-    analysis: AnalysisResult = analyze_ticket(ticket.content)
+    tid = ticket.ticket_id
+    speculative = get_inference_executor().submit(rag_answer, ticket.content) if SPECULATIVE_RETRIEVAL else None
+    with stage_span("process_ticket", tid):
+        # Step 1: Analyze
+        try:
+            with stage_span("analyze_ticket", tid):
+                analysis: AnalysisResult = analyze_ticket(ticket.content)
+        except BaseException:
+            if speculative is not None:
+                speculative.cancel()
+            raise
 
-    # Step 2: RAG retrieval
-    rag_result: RagResult = rag_answer(analysis.summary)
+        if deadline.expired():
+            if speculative is not None:
+                speculative.cancel()
+            return _out_of_time(ticket, "rag_answer")
 
-    if hasattr(rag_result, "similarities") and rag_result.similarities:
-        filtered_answer_chunks = []
-        filtered_sources = []
-        for chunk, score in zip(rag_result.context.split("\n"), rag_result.similarities):
-            if score >= cosine_threshold:
-                filtered_answer_chunks.append(chunk)
-                filtered_sources.append(rag_result.sources[rag_result.context.split("\n").index(chunk)])
-        rag_result.context = "\n".join(filtered_answer_chunks)
-        rag_result.sources = filtered_sources
+        # Step 2: RAG retrieval
+        with stage_span("rag_answer", tid):
+            if speculative is not None:
+                raw_result = _take_speculative(speculative, ticket.content, analysis.summary)
+            else:
+                raw_result = rag_answer(analysis.summary)
+            rag_result: RagResult = _filter_by_similarity(raw_result, cosine_threshold)
+
+        # Step 3: Evaluate
+        with stage_span("evaluate", tid):
+            evaluation = _evaluate(analysis, rag_result)
+
+        # Step 4: Generate response if approved, otherwise escalate
+        if evaluation.decision == "APPROVE":
+            fast = _fast_path_response(ticket, rag_result)
+            if fast is not None:
+                return fast
+            with stage_span("generate_response", tid):
+                return _respond(ticket, rag_result, evaluation.confidence_score)
+        return _escalated_response(ticket, evaluation)
+
+
+async def _run_pipeline_async(ticket: TicketInput, cosine_threshold: float, should_abort: AbortCheck = None) -> FinalResponse:
+    """Same stages as _run_pipeline; blocking work goes to the inference executor."""
+
+    tid = ticket.ticket_id
+    # The client may be gone while the ticket waited for admission or a flight
+    await _check_abort(should_abort, "analyze_ticket")
+    speculative = asyncio.ensure_future(_rag_answer_async(ticket.content)) if SPECULATIVE_RETRIEVAL else None
+    with stage_span("process_ticket", tid):
+        try:
+            # Step 1: Analyze
+            with stage_span("analyze_ticket", tid):
+                analysis: AnalysisResult = await run_inference(analyze_ticket, ticket.content)
+            await _check_abort(should_abort, "rag_answer")
+        except BaseException:
+            if speculative is not None:
+                _drop_speculative(speculative)
+            raise
+
+        if deadline.expired():
+            if speculative is not None:
+                _drop_speculative(speculative)
+            return _out_of_time(ticket, "rag_answer")
+
+        # Step 2: RAG retrieval (embedding + FAISS)
+        with stage_span("rag_answer", tid):
+            if speculative is not None:
+                raw_result = await _take_speculative_async(speculative, ticket.content, analysis.summary)
+            else:
+                raw_result = await _rag_answer_async(analysis.summary)
+            rag_result: RagResult = _filter_by_similarity(raw_result, cosine_threshold)
+
+        if SPECULATIVE_RESPONSE and _worth_speculating(rag_result):
+            return await _evaluate_and_respond_speculatively(ticket, analysis, rag_result, should_abort)
+
+        # Step 3: Evaluate (sentiment)
+        with stage_span("evaluate", tid):
+            # Lexicon scoring only, cheaper inline than a thread hop
+            evaluation = _evaluate(analysis, rag_result)
+
+        # Step 4: Generate response if approved, otherwise escalate
+        if evaluation.decision == "APPROVE":
+            fast = _fast_path_response(ticket, rag_result)
+            if fast is not None:
+                return fast
+            await _check_abort(should_abort, "generate_response")
+            with stage_span("generate_response", tid):
+                return await _respond_async(ticket, rag_result, evaluation.confidence_score)
+        return _escalated_response(ticket, evaluation)
+
+
+def _worth_speculating(rag_result: RagResult) -> bool:
+    """
+    Skip speculation when evaluate() is certain to escalate on KB confidence
+    alone, or when the FAQ fast path would answer without the LLM.
+    """
+    if "INSUFFICIENT_CONTEXT" in rag_result.context or _faq_hit(rag_result) is not None:
+        return False
+    return _expected_confidence(rag_result) >= CONFIDENCE_THRESHOLD
+
+
+async def _evaluate_and_respond_speculatively(
+    ticket: TicketInput,
+    analysis: AnalysisResult,
+    rag_result: RagResult,
+    should_abort: AbortCheck = None,
+) -> FinalResponse:
+    """Steps 3 and 4 overlapped: the responder call is in flight while evaluation runs."""
+    tid = ticket.ticket_id
+    await _check_abort(should_abort, "generate_response")
+    generation = asyncio.ensure_future(_respond_async(ticket, rag_result, _expected_confidence(rag_result)))
+    try:
+        with stage_span("evaluate", tid):
+            # On the executor, so the responder call is sent while evaluation runs
+            evaluation = await run_inference(_evaluate, analysis, rag_result)
+    except BaseException:
+        _drop_speculative(generation)
+        raise
 
-    # Step 3: Evaluate
-    evaluation: EvaluationResult = evaluate(
-    summary=analysis.summary,
-    rag_answer=rag_result.context,
-    snippets_confidences=[rag_result.similarity_score] * 5,  # assume 5 snippets
-    keywords=analysis.keywords
-)
-    print(f"Evaluation decision: {evaluation.decision}, reason: {evaluation.reason}")
-    # Step 4: Generate response if approved
     if evaluation.decision == "APPROVE":
-        final_response: FinalResponse = generate_response(
-            context=rag_result.context,
-            ticket=ticket
-        )
-    else:
-        # Escalated ticket
-        final_response = FinalResponse(
-            ticket_id=ticket.ticket_id,
-            response=f"Ticket escalated to human support.",
-            escalated=True,
-            reason=evaluation.reason
-        )
-    
-    return final_response
+        speculative_responses.inc(outcome="used")
+        with stage_span("generate_response", tid):
+            return await generation
+
+    _drop_speculative(generation)
+    # Consume the error of a call that fails before the cancel lands
+    generation.add_done_callback(lambda f: f.cancelled() or f.exception())
+    speculative_responses.inc(outcome="wasted")
+    return _escalated_response(ticket, evaluation)
+
+
+async def process_tickets_batch_async(
+    tickets: list[TicketInput],
+    cosine_threshold: float = 0.6,
+    concurrency: int = BATCH_LLM_CONCURRENCY,
+) -> list[Union[FinalResponse, Exception]]:
+    """
+    Process a batch of tickets together:
+    1. Analyze every ticket
+    2. Retrieve for all summaries with one batched embedding + FAISS search
+    3. Evaluate and generate responses concurrently, at most `concurrency` at a time
+
+    Results keep the input order. A failing item yields its exception in place
+    of a FinalResponse; the other items are unaffected.
+    """
+    async def analyze(ticket):
+        try:
+            with stage_span("analyze_ticket", ticket.ticket_id):
+                return await run_inference(analyze_ticket, ticket.content)
+        except Exception as e:
+            return e
+
+    analyses = await asyncio.gather(*[analyze(t) for t in tickets])
 
+    ok_idx = [i for i, a in enumerate(analyses) if not isinstance(a, Exception)]
+    sentiments: list = [None] * len(tickets)
+    for i, score in zip(ok_idx, polarity_batch([analyses[i].summary for i in ok_idx])):
+        sentiments[i] = score
+    rag_results: list = [None] * len(tickets)
+    try:
+        with stage_span("rag_answer_batch"):
+            batch = await run_inference(rag_answer_batch, [analyses[i].summary for i in ok_idx])
+        for i, result in zip(ok_idx, batch):
+            rag_results[i] = result
+    except Exception as e:
+        # Batched retrieval failed as a whole: retry item by item to isolate the bad input
+        print(f"Batch retrieval failed, falling back to per-ticket retrieval: {e}")
+        for i in ok_idx:
+            try:
+                rag_results[i] = await run_inference(rag_answer, analyses[i].summary)
+            except Exception as item_error:
+                rag_results[i] = item_error
 
+    semaphore = asyncio.Semaphore(max(1, concurrency))
 
+    async def finish(i):
+        if isinstance(analyses[i], Exception):
+            return analyses[i]
+        if isinstance(rag_results[i], Exception):
+            return rag_results[i]
+        try:
+            async with semaphore:
+                tid = tickets[i].ticket_id
+                rag_result = _filter_by_similarity(rag_results[i], cosine_threshold)
+                with stage_span("evaluate", tid):
+                    evaluation = _evaluate(analyses[i], rag_result, sentiments[i])
+                if evaluation.decision == "APPROVE":
+                    fast = _fast_path_response(tickets[i], rag_result)
+                    if fast is not None:
+                        return fast
+                    with stage_span("generate_response", tid):
+                        return await _respond_async(tickets[i], rag_result, evaluation.confidence_score)
+                return _escalated_response(tickets[i], evaluation)
+        except Exception as e:
+            return e
 
+    return list(await asyncio.gather(*[finish(i) for i in range(len(tickets))]))
@@ -1,22 +1,84 @@
-from app.schemas import RagResult
-from app.rag.vectorstore import retrieve
+import os
+
+from app.schemas import RagResult, RagSnippet
+from app.rag import scoring
+from app.rag.scoring import cosine_from_distance
+from app.rag.vectorstore import index_version, retrieve, retrieve_batch
+from app.utils import metrics
+from app.utils.lru import LRUCache
+from app.utils.text import normalize_text
+
+TOP_K = 5
+# Adaptive top-k: fetch RAG_CANDIDATES hits and keep 1..TOP_K of them, cut at
+# the first cosine drop >= RAG_SCORE_GAP or once the softmax mass of the kept
+# hits reaches RAG_CUMULATIVE_CONFIDENCE
+ADAPTIVE_TOP_K = os.environ.get("RAG_ADAPTIVE_TOP_K", "0") == "1"
+CANDIDATES = int(os.environ.get("RAG_CANDIDATES", "8"))
+SCORE_GAP = float(os.environ.get("RAG_SCORE_GAP", "0.1"))
+CUMULATIVE_CONFIDENCE = float(os.environ.get("RAG_CUMULATIVE_CONFIDENCE", "0.9"))
+SOFTMAX_TEMPERATURE = 0.05
+# RagResults kept per worker, keyed by normalized query + KB index version
+RAG_CACHE_SIZE = int(os.environ.get("RAG_CACHE_SIZE", "1024"))
+
+rag_cache = LRUCache("rag", RAG_CACHE_SIZE)
+
+returned_k = metrics.histogram("rag_returned_snippets", "Snippets forwarded to the LLM per retrieval", buckets=tuple(range(1, TOP_K + 1)))
+
 
 def rag_answer(summary: str) -> RagResult:
     """
     Perform Retrieval-Augmented Generation (RAG) retrieval from a ticket summary.
 
-    - Retrieve top N=5 snippets
-    - Apply reranking
+    - Retrieve top N=5 snippets (up to CANDIDATES in adaptive mode)
+    - Score them: cosine from distance, calibrated confidence (app.rag.scoring)
     - Sort snippets by relevance
     - Return confidence scores in [0, 1]
     """
 
     query = summary
+    key = _cache_key(query)
+    cached = rag_cache.get(key)
+    if cached is not None:
+        return cached
 
     # 1. First-pass retrieval 
-    docs_with_scores = retrieve(query, k=5)
+    docs_with_scores = retrieve(query, k=_fetch_k())
     # [(doc, raw_score), ...]
 
+    result = build_rag_result(docs_with_scores)
+    rag_cache.put(key, result)
+    return result
+
+
+def rag_answer_batch(summaries: list[str]) -> list[RagResult]:
+    """
+    Same as rag_answer for several summaries, embedded and searched as one batch.
+    Only the summaries missing from the cache are retrieved.
+    """
+    keys = [_cache_key(s) for s in summaries]
+    results = [rag_cache.get(k) for k in keys]
+    misses = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        for i, hits in zip(misses, retrieve_batch([summaries[i] for i in misses], k=_fetch_k())):
+            results[i] = build_rag_result(hits)
+            rag_cache.put(keys[i], results[i])
+    return results
+
+
+def _cache_key(query: str) -> tuple:
+    # Adaptive mode changes the result for the same query, so it is part of the key
+    return index_version(), ADAPTIVE_TOP_K, normalize_text(query)
+
+
+def _fetch_k() -> int:
+    return max(TOP_K, CANDIDATES) if ADAPTIVE_TOP_K else TOP_K
+
+
+def build_rag_result(docs_with_scores, adaptive: bool | None = None) -> RagResult:
+    """
+    Turn raw [(doc, distance), ...] hits into a RagResult (steps 2-4 of rag_answer).
+    adaptive defaults to ADAPTIVE_TOP_K.
+    """
     if not docs_with_scores:
         return RagResult(
             context="INSUFFICIENT_CONTEXT",
@@ -24,40 +86,74 @@ def rag_answer(summary: str) -> RagResult:
             similarity_score=0.0
         )
 
-    # 2. Reranking (placeholder logic)
-    # If score = distance → lower is better, so invert
-    reranked = [
-        {
-            "doc": doc,
-            "rerank_score": 1.0 / (score + 1e-8)
-        }
-        for doc, score in docs_with_scores
-    ]
-
-    # 3. Sort by rerank score (descending)
-    reranked.sort(key=lambda x: x["rerank_score"], reverse=True)
+    import numpy as np
 
-    # 4. Keep top N=5 snippets
-    top_docs = reranked[:5]
+    # 2. Score every candidate in one pass: cosine, then calibrated confidence
+    distances = np.array([float(score) for _, score in docs_with_scores])
+    order = np.argsort(distances, kind="stable")
+    distances = distances[order]
+    confidences = scoring.confidences(distances)
 
-    # 5. Normalize confidence scores to [0, 1]
-    scores = [d["rerank_score"] for d in top_docs]
-    min_s, max_s = min(scores), max(scores)
-    denom = (max_s - min_s) or 1.0
+    # 3. Keep top N=5 snippets (closest first), or fewer at a natural cut-off in adaptive mode
+    if ADAPTIVE_TOP_K if adaptive is None else adaptive:
+        kept = adaptive_cutoff(distances)
+    else:
+        kept = min(TOP_K, len(order))
+    returned_k.observe(kept)
 
     snippets = []
-    sources = []
+    for i in range(kept):
+        doc = docs_with_scores[order[i]][0]
+        snippets.append(RagSnippet(
+            text=doc.page_content,
+            source=doc.metadata.get("source", "unknown"),
+            chunk_id=doc.metadata.get("chunk_id"),
+            category=doc.metadata.get("category"),
+            distance=float(distances[i]),
+            score=round(float(confidences[i]), 3),
+        ))
+
+    # 4. Final context = sorted snippets
+    return result_from_snippets(snippets)
+
 
-    for d in top_docs:
-        confidence = (d["rerank_score"] - min_s) / denom
-        snippets.append(d["doc"].page_content)
-        sources.append(d["doc"].metadata.get("source", "unknown"))
+def adaptive_cutoff(distances: list[float], k: int = TOP_K, gap: float = SCORE_GAP, mass: float = CUMULATIVE_CONFIDENCE) -> int:
+    """
+    Number of hits to keep (1..k) from ascending squared-L2 distances of
+    normalized embeddings, where cosine = 1 - d / 2. Stops before the first
+    cosine drop of at least `gap`, or once the kept hits hold `mass` of the
+    softmax weight over the candidates.
+    """
+    import numpy as np
+    if len(distances) == 0:
+        return 0
+    cos = scoring.cosines(distances)
+    limit = min(k, len(cos))
+    weights = np.exp((cos - cos[0]) / SOFTMAX_TEMPERATURE)
+    cumulative = np.cumsum(weights) / weights.sum()
+    # Stop after hit i when the kept mass is reached or the next hit drops by gap
+    stop = (cumulative[:limit - 1] >= mass) | (cos[:limit - 1] - cos[1:limit] >= gap)
+    return int(np.argmax(stop)) + 1 if stop.any() else limit
 
-    # 6. Final context = sorted snippets
-    context = "\n".join(snippets)
 
+def result_from_snippets(snippets: list[RagSnippet]) -> RagResult:
+    """
+    Build a RagResult (context, sources, best score) from an ordered snippet list.
+    """
+    if not snippets:
+        return RagResult(
+            context="INSUFFICIENT_CONTEXT",
+            sources=[],
+            similarity_score=0.0
+        )
     return RagResult(
-        context=context,
-        sources=sources,
-        similarity_score=round(max((s - min_s) / denom for s in scores), 3)
+        context=pack_context(snippets),
+        sources=[s.source for s in snippets],
+        similarity_score=max(s.score for s in snippets),
+        snippets=snippets,
     )
+
+
+def pack_context(snippets: list[RagSnippet]) -> str:
+    """Prompt context: snippet texts in relevance order, one block per snippet."""
+    return "\n\n".join(s.text for s in snippets)
@@ -1,6 +1,12 @@
 from app.schemas import FinalResponse, TicketInput
-from app.utils.llm import call_llm
+from app.utils.llm import call_llm, call_llm_async
+from app.utils.routing import choose_route, record_route_outcome
+from app.utils.text import collapse_whitespace, detect_language, extract_keywords
+from typing import Optional
 import json
+import re
+import time
+import unicodedata
 
 SYSTEM = """
 You are a customer support assistant.
@@ -26,14 +32,95 @@ Response Template Examples:
 - English: "Thank you for your request. We understand that [problem]. [Solution based on context]. Required action: [specific action]."
 """
 
-def generate_response(
-    context: str,
-    ticket: TicketInput,
-) -> FinalResponse:
+# Thanks + Problem + Solution, for answers served straight from an FAQ chunk
+FAQ_TEMPLATES = {
+    "en": "Thank you for your request. We understand that your question is: \"{question}\". {answer}",
+    "fr": "Merci pour votre demande. Nous comprenons que votre question est : « {question} ». {answer}",
+    "ar": "شكرًا على طلبك. فهمنا أن سؤالك هو: «{question}». {answer}",
+}
+QUESTION_EXCERPT_CHARS = 160
+_ANSWER_LABEL = re.compile(r"^\s*(?:A|R|Answer|Réponse|Reponse|الجواب|الإجابة)\s*[:：]\s*", re.IGNORECASE)
+# FAQ question markers as they come out of ingest.chunk_text: "### 1.1 Q1. Qu'est-ce que Doxa ?",
+# "2.5 Q10. Puis-je ...", possibly in the middle of the flattened overlap line that starts a chunk
+_FAQ_QUESTION = re.compile(r"(?<!\S)(?:#+\s*)?(?:\d+(?:\.\d+)*\s+)?Q\d+\s*\.\s*(?P<question>[^\n?]*\?|[^\n]*)")
+# Page / section headings, also the "4 SECTION 4 : ..." ones OCR left without "#"
+_HEADING_TAIL = re.compile(r"(?:#|(?<!\S)\d+\s+SECTION\s+\d+\s*:).*", re.IGNORECASE)
+# Share of the FAQ question's keywords the ticket must contain for its answer to be quoted
+FAQ_MIN_QUESTION_OVERLAP = 0.6
+
+
+def faq_blocks(chunk: str) -> list[tuple[str, str]]:
     """
-    Generate a professional customer support reply based strictly on the provided context.
+    (question, answer) pairs of an FAQ chunk. Only answers known to be
+    complete are returned: the chunk must also hold the next question, and a
+    question without "?" must start its line (otherwise the overlap line has
+    merged it with its answer). Page and section headings are dropped.
     """
-    prompt = f"""
+    markers = list(_FAQ_QUESTION.finditer(chunk))
+    blocks = []
+    for marker, following in zip(markers, markers[1:]):
+        question = marker.group("question").strip()
+        line_start = chunk.rfind("\n", 0, marker.start()) + 1
+        if not question.endswith("?") and chunk[line_start:marker.start()].strip():
+            continue
+        lines = [_HEADING_TAIL.sub("", l) for l in chunk[marker.end():following.start()].splitlines()]
+        answer = _ANSWER_LABEL.sub("", collapse_whitespace(" ".join(lines)))
+        if question and answer:
+            blocks.append((question, answer))
+    return blocks
+
+
+def _question_words(text: str) -> set[str]:
+    words = set()
+    for word in extract_keywords(text, limit=256):
+        decomposed = unicodedata.normalize("NFKD", word)
+        words.add("".join(c for c in decomposed if not unicodedata.combining(c)))
+    return words
+
+
+def faq_answer_text(chunk: str, question: str) -> str:
+    """
+    Answer of the one FAQ entry of chunk that matches question: at least
+    FAQ_MIN_QUESTION_OVERLAP of its question keywords appear in question, and
+    no other entry matches as well. Empty string when no entry qualifies.
+    """
+    asked = _question_words(question)
+    scored = []
+    for faq_question, answer in faq_blocks(chunk):
+        words = _question_words(faq_question)
+        if words:
+            scored.append((len(words & asked) / len(words), answer))
+    scored.sort(key=lambda s: s[0], reverse=True)
+    if not scored or scored[0][0] < FAQ_MIN_QUESTION_OVERLAP:
+        return ""
+    if len(scored) > 1 and scored[1][0] == scored[0][0]:
+        return ""
+    return scored[0][1]
+
+
+def extractive_response(chunk: str, ticket: TicketInput) -> Optional[FinalResponse]:
+    """
+    Templated reply quoting the FAQ answer of chunk that matches the ticket,
+    without an LLM call. None when no entry matches or the answer is not in
+    the ticket's language.
+    """
+    answer = faq_answer_text(chunk, ticket.content)
+    language = detect_language(ticket.content)
+    if not answer or detect_language(answer) != language:
+        return None
+    question = collapse_whitespace(ticket.content)
+    if len(question) > QUESTION_EXCERPT_CHARS:
+        question = question[:QUESTION_EXCERPT_CHARS].rstrip() + "…"
+    return FinalResponse(
+        response=FAQ_TEMPLATES[language].format(question=question, answer=answer),
+        ticket_id=ticket.ticket_id,
+        escalated=False,
+        reason="Answered from FAQ."
+    )
+
+
+def _build_prompt(context: str, ticket: TicketInput) -> str:
+    return f"""
 QUESTION:
 {ticket.content}
 
@@ -73,19 +160,16 @@ Example structure for English:
 "Thank you for your request. We understand that [problem summary]. [Solution based on context]. Required action: [specific action]."
 """
 
-    raw = call_llm(
-        SYSTEM,
-        prompt,
-        temperature=0.1,
-    )
-    
+
+def _parse_response(raw: str, ticket: TicketInput, route, elapsed: float) -> FinalResponse:
     if raw.startswith("```"):
         raw = raw.split("```")[1]
     if raw.startswith("json"):
         raw = raw[4:]
     parsed = json.loads(raw)
 # Try to parse JSON
-    
+    record_route_outcome(route, elapsed, escalated=parsed.get("escalate") is True)
+
     if parsed.get("escalate") is True:
         return FinalResponse(
             response=parsed.get("response"),
@@ -100,3 +184,50 @@ Example structure for English:
         escalated=False,
         reason="Answered by automated system."
     )
+
+
+def generate_response(
+    context: str,
+    ticket: TicketInput,
+    confidence: Optional[float] = None,
+    latency_target: Optional[float] = None,
+) -> FinalResponse:
+    """
+    Generate a professional customer support reply based strictly on the provided context.
+
+    - confidence: retrieval confidence, used with the prompt size to route the model
+    - latency_target: seconds available for the LLM call (None = routing default)
+    """
+    prompt = _build_prompt(context, ticket)
+    route = choose_route(SYSTEM, prompt, confidence=confidence, latency_target=latency_target)
+    start = time.perf_counter()
+    raw = call_llm(
+        SYSTEM,
+        prompt,
+        temperature=0.1,
+        stage="responder",
+        model=route.model,
+    )
+    return _parse_response(raw, ticket, route, time.perf_counter() - start)
+
+
+async def generate_response_async(
+    context: str,
+    ticket: TicketInput,
+    confidence: Optional[float] = None,
+    latency_target: Optional[float] = None,
+) -> FinalResponse:
+    """
+    Same as generate_response, awaiting the LLM call natively.
+    """
+    prompt = _build_prompt(context, ticket)
+    route = choose_route(SYSTEM, prompt, confidence=confidence, latency_target=latency_target)
+    start = time.perf_counter()
+    raw = await call_llm_async(
+        SYSTEM,
+        prompt,
+        temperature=0.1,
+        stage="responder",
+        model=route.model,
+    )
+    return _parse_response(raw, ticket, route, time.perf_counter() - start)
@@ -0,0 +1,116 @@
+# app/agents/semantic_cache.py
+"""
+Semantic answer cache for the ticket pipeline.
+
+Past ticket embeddings live in a small FAISS inner-product index (the vectors
+are normalized, so the score is the cosine) next to the FinalResponse they
+produced. A new ticket whose embedding is within SEMANTIC_CACHE_THRESHOLD of a
+cached one, in the same language and for the same similarity threshold, gets
+that response back without running the pipeline.
+
+Every entry belongs to the KB index version it was answered from; the whole
+cache is dropped as soon as the vector store on disk changes.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from app.schemas import FinalResponse
+from app.utils import metrics
+
+SEMANTIC_CACHE_ENABLED = os.environ.get("SEMANTIC_CACHE", "0") == "1"
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_CACHE_TTL = float(os.environ.get("SEMANTIC_CACHE_TTL", "86400"))
+# Neighbours inspected per lookup, so a closer entry in another language does not hide a match
+SEARCH_K = 4
+
+# Only answers produced by the normal pipeline are reused, never escalations or degraded replies
+CACHEABLE_REASONS = {"Answered by automated system.", "Answered from FAQ."}
+
+semantic_cache_entries = metrics.gauge("semantic_cache_entries", "Entries in the semantic answer cache")
+
+
+class SemanticAnswerCache:
+    """
+    Parameters:
+    - threshold: minimum cosine between ticket embeddings for a hit
+    - max_entries: the oldest half is dropped when full
+    - ttl: seconds an entry stays valid
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, ttl: float = SEMANTIC_CACHE_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self._index = None
+        self._entries: list[tuple] = []  # (language, cosine_threshold, response, stored_at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _sync_version(self, version: str):
+        if version != self.version:
+            self._reset()
+            self.version = version
+
+    def _reset(self):
+        self._index = None
+        self._entries = []
+        semantic_cache_entries.set(0)
+
+    def _rebuild(self, vectors, entries):
+        import faiss
+        self._index = faiss.IndexFlatIP(vectors.shape[1])
+        self._index.add(vectors)
+        self._entries = entries
+
+    def lookup(self, vector, language: str, cosine_threshold: float, version: str) -> Optional[FinalResponse]:
+        import numpy as np
+        with self._lock:
+            self._sync_version(version)
+            if self._index is None or not self._entries:
+                metrics.cache_requests.inc(cache="semantic", result="miss")
+                return None
+            query = np.asarray(vector, dtype="float32").reshape(1, -1)
+            scores, ids = self._index.search(query, min(SEARCH_K, len(self._entries)))
+            now = time.time()
+            for score, idx in zip(scores[0], ids[0]):
+                if idx == -1 or score < self.threshold:
+                    break
+                entry_language, entry_threshold, response, stored_at = self._entries[idx]
+                if entry_language == language and entry_threshold == cosine_threshold and now - stored_at < self.ttl:
+                    metrics.cache_requests.inc(cache="semantic", result="hit")
+                    return response
+        metrics.cache_requests.inc(cache="semantic", result="miss")
+        return None
+
+    def store(self, vector, language: str, cosine_threshold: float, version: str, response: FinalResponse):
+        if response.escalated or response.reason not in CACHEABLE_REASONS:
+            return
+        import numpy as np
+        row = np.asarray(vector, dtype="float32").reshape(1, -1)
+        with self._lock:
+            self._sync_version(version)
+            entry = (language, cosine_threshold, response, time.time())
+            if self._index is None:
+                self._rebuild(row, [entry])
+            elif len(self._entries) >= self.max_entries:
+                keep = len(self._entries) // 2
+                kept = self._index.reconstruct_n(self._index.ntotal - keep, keep)
+                self._rebuild(np.vstack([kept, row]), self._entries[-keep:] + [entry])
+            else:
+                self._index.add(row)
+                self._entries.append(entry)
+            semantic_cache_entries.set(len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.version = None
+
+
+answer_cache = SemanticAnswerCache()
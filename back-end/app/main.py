@@ -1,17 +1,44 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 
 from app.core.config import settings
 from app.core.database import Base, engine
 
 # Agents
-from app.schemas import TicketInput, FinalResponse
-from app.agents.orchestrator import process_ticket
+from app.schemas import (
+    TicketInput,
+    FinalResponse,
+    BatchQuestionsInput,
+    BatchAnswersOutput,
+    BatchAnswer,
+    TicketJobInput,
+    TicketJob,
+    TicketJobAccepted,
+)
+from app.rag import inference_service
+from app.agents.orchestrator import process_ticket_async, process_tickets_batch_async, TicketAborted
+from app.utils.llm_usage import token_budget_view
+from app.utils.routing import route_stats
+from app.utils.degradation import controller as llm_health
+from app.utils.executor import shutdown_inference_executor
+from app.utils.metrics import render_prometheus
+from app.utils.tracing import configure_tracing
+from app.workers.jobs import get_job_pool, InvalidCallbackUrl, JobQueueFull
+from app.utils.admission import AdmissionController, Overloaded
+from app.utils.deadline import DEADLINE_HEADER, budget_from_header, deadline_scope
+
+# nginx's "client closed request" status, logged when a disconnected client's ticket is dropped
+CLIENT_CLOSED_REQUEST = 499
 
 # Routers (if you have other routers)
 from app.api.router import api_router
 
 
+# Answer of a batch item that failed; provider errors and internals stay in the logs
+BATCH_ITEM_ERROR = "Error: this question could not be processed."
+
+
 def create_app() -> FastAPI:
     """
     Factory for FastAPI app
@@ -40,6 +67,19 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     def on_startup():
         Base.metadata.create_all(bind=engine)
+        configure_tracing()
+        if inference_service.INFERENCE_SOCKET:
+            # Fail at boot, not on the first ticket, when INFERENCE_AUTHKEY is missing
+            inference_service.get_client()
+
+    @app.on_event("startup")
+    async def start_job_pool():
+        await get_job_pool().start()
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        await get_job_pool().stop()
+        shutdown_inference_executor()
 
     # Health check
     @app.get("/", tags=["Health"])
@@ -50,11 +90,16 @@ def create_app() -> FastAPI:
             "environment": settings.ENV,
         }
 
+    ticket_admission = AdmissionController("ticket")
+
     # Ticket endpoint
     @app.post("/ticket", response_model=FinalResponse)
-    def handle_ticket(ticket: TicketInput):
+    async def handle_ticket(ticket: TicketInput, request: Request):
         """
-        Accepts a ticket and returns the processed response
+        Accepts a ticket and returns the processed response.
+        Returns 429 + Retry-After when the admission queue is full.
+        The pipeline works within TICKET_DEADLINE_SECONDS, or less when the
+        client sends X-Request-Timeout (seconds).
         """
         print(f"\n=== RECEIVED TICKET ===")
         print(f"ID: {ticket.ticket_id}")
@@ -62,13 +107,93 @@ def create_app() -> FastAPI:
         print(f"Full object: {ticket.model_dump()}")
         print("=" * 30)
 
-        final_response = process_ticket(ticket)
+        try:
+            with deadline_scope(budget_from_header(request.headers.get(DEADLINE_HEADER))):
+                async with ticket_admission.slot():
+                    final_response = await process_ticket_async(ticket, should_abort=request.is_disconnected)
+        except Overloaded as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except TicketAborted:
+            print(f"Client disconnected, dropped ticket {ticket.ticket_id}")
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
 
         print(f"\n=== FINAL RESPONSE ===")
         print(f"Response: {final_response.response}")
         print("=" * 30)
         return final_response
 
+    # Job mode: enqueue and return immediately, poll or get a callback
+    @app.post("/ticket/jobs", response_model=TicketJobAccepted, status_code=202)
+    async def submit_ticket_job(job_input: TicketJobInput):
+        """
+        Queues a ticket for processing and returns its job id (202 Accepted)
+        """
+        try:
+            job = get_job_pool().submit(job_input)
+        except JobQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+        except InvalidCallbackUrl as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return TicketJobAccepted(job_id=job.job_id, status=job.status, status_url=f"/ticket/jobs/{job.job_id}")
+
+    @app.get("/ticket/jobs/{job_id}", response_model=TicketJob)
+    async def get_ticket_job(job_id: str):
+        """
+        Returns the job status, with the FinalResponse once done
+        """
+        job = get_job_pool().get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    # Batch endpoint (Questions/Answers evaluation format)
+    @app.post("/tickets/batch", response_model=BatchAnswersOutput)
+    async def handle_ticket_batch(batch: BatchQuestionsInput):
+        """
+        Accepts {"Questions": [{id, query}]} and returns {"Answers": [{id, answer}]}.
+        Failed items get a generic error answer instead of failing the batch;
+        the exception itself is only logged.
+        """
+        print(f"\n=== RECEIVED BATCH: {len(batch.Questions)} questions ===")
+        tickets = [TicketInput(ticket_id=q.id, content=q.query) for q in batch.Questions]
+        results = await process_tickets_batch_async(tickets)
+
+        answers = []
+        for question, result in zip(batch.Questions, results):
+            if isinstance(result, Exception):
+                print(f"Error processing {question.id}: {result!r}")
+                answers.append(BatchAnswer(id=question.id, answer=BATCH_ITEM_ERROR))
+            else:
+                answers.append(BatchAnswer(id=question.id, answer=result.response))
+        return BatchAnswersOutput(Answers=answers)
+
+    # Prometheus scrape endpoint (pipeline stages, LLM calls, caches)
+    @app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    # LLM token accounting
+    @app.get("/llm/usage", tags=["Health"])
+    def llm_usage():
+        """
+        Rolling per-day LLM token usage, split by pipeline stage
+        """
+        return token_budget_view()
+
+    @app.get("/llm/routes", tags=["Health"])
+    def llm_routes():
+        """
+        Per-route LLM latency and escalation rate, for tuning model routing
+        """
+        return route_stats()
+
+    @app.get("/llm/health", tags=["Health"])
+    def llm_health_view():
+        """
+        Degradation mode, circuit breaker state and rolling LLM error rate / p95
+        """
+        return llm_health.snapshot()
+
     return app
 
 
@@ -26,6 +26,11 @@ class Ticket(Base):
     category = Column(String(100), nullable=False)  
     reference = Column(String(50), unique=True, nullable=True, index=True)
 
+    # Bail du worker IA (app.workers.ticket_worker) : ticket en cours de traitement depuis
+    ai_claimed_at = Column(DateTime, nullable=True)
+    # Nombre de fois où le worker IA a réclamé ce ticket (limité par AI_MAX_ATTEMPTS)
+    ai_attempts = Column(Integer, default=0, nullable=True)
+
     # Réponse
     response = Column(Text, nullable=True)
     responded_at = Column(DateTime, nullable=True)
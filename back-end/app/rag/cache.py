@@ -1,22 +1,32 @@
 import hashlib, pickle, time
 import sqlite3
+import threading
 
 CACHE_DB = "embedding_cache.db"
 TTL = 86400  # 24h
 
-conn = sqlite3.connect(CACHE_DB)
-c = conn.cursor()
-c.execute("""
-CREATE TABLE IF NOT EXISTS embeddings_cache(
-    key TEXT PRIMARY KEY,
-    embedding BLOB,
-    timestamp REAL
-)
-""")
-conn.commit()
+# Opened on first use so importing the RAG package does not touch the disk
+_conn = None
+_lock = threading.Lock()
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings_cache(
+            key TEXT PRIMARY KEY,
+            embedding BLOB,
+            timestamp REAL
+        )
+        """)
+        conn.commit()
+        _conn = conn
+    return _conn
 
 def get_cached_embedding(key: str):
-    row = c.execute("SELECT embedding, timestamp FROM embeddings_cache WHERE key=?", (key,)).fetchone()
+    with _lock:
+        row = _get_conn().execute("SELECT embedding, timestamp FROM embeddings_cache WHERE key=?", (key,)).fetchone()
     if row:
         emb, ts = row
         if time.time() - ts < TTL:
@@ -24,15 +34,19 @@ def get_cached_embedding(key: str):
     return None
 
 def cache_embedding(key: str, emb):
-    c.execute(
-        "REPLACE INTO embeddings_cache(key, embedding, timestamp) VALUES (?, ?, ?)",
-        (key, pickle.dumps(emb), time.time())
-    )
-    conn.commit()
+    with _lock:
+        conn = _get_conn()
+        conn.execute(
+            "REPLACE INTO embeddings_cache(key, embedding, timestamp) VALUES (?, ?, ?)",
+            (key, pickle.dumps(emb), time.time())
+        )
+        conn.commit()
 
 def invalidate_cache_for_key(key: str):
-    c.execute("DELETE FROM embeddings_cache WHERE key=?", (key,))
-    conn.commit()
+    with _lock:
+        conn = _get_conn()
+        conn.execute("DELETE FROM embeddings_cache WHERE key=?", (key,))
+        conn.commit()
 
 def invalidate_cache_for_file(file_path: str):
     key = hashlib.sha256(file_path.encode()).hexdigest()
@@ -0,0 +1,299 @@
+# app/rag/inference_service.py
+"""
+Shared embedding / FAISS process for all uvicorn workers.
+
+Without it every worker loads its own MiniLM model and FAISS index, and the
+torch thread pools of N workers oversubscribe the cores. Run one inference
+process per host instead:
+
+    python -m app.rag.inference_service --socket /tmp/ticket-inference.sock --threads 4
+
+and start the API with INFERENCE_SOCKET=/tmp/ticket-inference.sock. The
+vectorstore functions (retrieve, retrieve_batch, embed_texts) then go over the
+Unix socket; when INFERENCE_SOCKET is unset they run in-process as before.
+
+multiprocessing.connection unpickles what it receives, so whoever can connect
+can run code in the peer. Both sides therefore need the same
+INFERENCE_AUTHKEY, a random secret with no default:
+
+    export INFERENCE_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+
+and the socket is created with umask 077, readable by its owner only.
+"""
+import argparse
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from app.utils import metrics
+from app.utils.executor import INFERENCE_THREADS, set_thread_budget
+
+INFERENCE_SOCKET = os.environ.get("INFERENCE_SOCKET")
+# Shared secret of the server and its clients; required, the peers exchange pickles
+INFERENCE_AUTHKEY = os.environ.get("INFERENCE_AUTHKEY", "").encode()
+AUTHKEY_MIN_BYTES = 32
+# Requests computed at once; the rest wait, so concurrent callers cannot multiply the thread budget
+INFERENCE_CONCURRENCY = int(os.environ.get("INFERENCE_CONCURRENCY", "2"))
+# Seconds a client reuses the index version the service reported (cache keys may lag a rebuild this long)
+INDEX_VERSION_TTL = float(os.environ.get("INFERENCE_INDEX_VERSION_TTL", "1"))
+
+rpc_seconds = metrics.histogram("inference_rpc_seconds", "Round trip of calls to the shared inference process")
+
+
+class InferenceError(Exception):
+    """Raised client-side when the inference process failed a request."""
+
+
+def check_authkey(authkey: bytes) -> bytes:
+    """Return authkey, or raise InferenceError when it is missing or too short to be a secret."""
+    if len(authkey or b"") < AUTHKEY_MIN_BYTES:
+        raise InferenceError(
+            f"INFERENCE_AUTHKEY must be set to a random secret of at least {AUTHKEY_MIN_BYTES} bytes"
+        )
+    return authkey
+
+
+class RemoteDocument:
+    """page_content + metadata, the part of a langchain Document the pipeline reads."""
+
+    __slots__ = ("page_content", "metadata")
+
+    def __init__(self, page_content: str, metadata: dict):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+# ---------------------------------------------------------------------------
+# Client (web workers)
+# ---------------------------------------------------------------------------
+
+class InferenceClient:
+    """
+    One connection per calling thread, reopened once if the server restarted.
+
+    Parameters:
+    - address: path of the Unix socket the inference process listens on
+    - authkey: shared secret, INFERENCE_AUTHKEY by default
+    """
+
+    def __init__(self, address: str, authkey: bytes | None = None):
+        self.address = address
+        self.authkey = check_authkey(INFERENCE_AUTHKEY if authkey is None else authkey)
+        self._local = threading.local()
+        self._version = (None, 0.0)  # (version, fetched at)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, op: str, payload):
+        started = time.perf_counter()
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                conn.send((op, payload))
+                status, result = conn.recv()
+                break
+            except (EOFError, OSError):
+                self.close()
+                if attempt == 2:
+                    raise
+        rpc_seconds.observe(time.perf_counter() - started, op=op)
+        if status != "ok":
+            raise InferenceError(result)
+        return result
+
+    def embed(self, texts: list[str]):
+        return self._call("embed", texts)
+
+    def search(self, queries: list[str], k: int = 5):
+        return self._documents(self._call("search", (queries, k)))
+
+    def search_vectors(self, vectors, k: int = 5):
+        """Search for query embeddings computed (or cached) by the caller."""
+        return self._documents(self._call("search_vectors", (vectors, k)))
+
+    @staticmethod
+    def _documents(rows):
+        return [[(RemoteDocument(text, meta), dist) for text, meta, dist in hits] for hits in rows]
+
+    def index_version(self) -> str:
+        """Version of the index the service searches, refetched every INDEX_VERSION_TTL seconds."""
+        version, fetched_at = self._version
+        if version is None or time.monotonic() - fetched_at >= INDEX_VERSION_TTL:
+            version = self._call("version", None)
+            self._version = (version, time.monotonic())
+        return version
+
+    def ping(self) -> bool:
+        return self._call("ping", None) == "pong"
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> InferenceClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = InferenceClient(INFERENCE_SOCKET)
+    return _client
+
+
+# ---------------------------------------------------------------------------
+# Server (inference process)
+# ---------------------------------------------------------------------------
+
+class LocalBackend:
+    """Model and index loaded in this process, through app.rag.vectorstore."""
+
+    def load(self):
+        from app.rag import vectorstore
+        vectorstore.get_db()
+
+    def embed(self, texts):
+        from app.rag import vectorstore
+        return vectorstore.embed_local(texts)
+
+    def search(self, queries, k):
+        from app.rag import vectorstore
+        return vectorstore.search_local(queries, k)
+
+    def search_vectors(self, vectors, k):
+        from app.rag import vectorstore
+        return vectorstore.search_vectors(vectors, k)
+
+    def index_version(self):
+        from app.rag import vectorstore
+        return vectorstore.loaded_index_version()
+
+
+class InferenceServer:
+    """
+    Parameters:
+    - address: Unix socket path (replaced if a stale one exists)
+    - backend: object with embed(texts), search(queries, k),
+      search_vectors(vectors, k) and index_version(); LocalBackend by default
+    - concurrency: requests computed at the same time
+    - authkey: shared secret, INFERENCE_AUTHKEY by default
+    """
+
+    def __init__(self, address: str, backend=None, concurrency: int = INFERENCE_CONCURRENCY, authkey: bytes | None = None):
+        self.address = address
+        self.backend = backend or LocalBackend()
+        self.authkey = check_authkey(INFERENCE_AUTHKEY if authkey is None else authkey)
+        self._slots = threading.Semaphore(concurrency)
+        self._listener = None
+        self._closed = threading.Event()
+
+    def start(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        # Owner-only from the moment it is bound, no window before a chmod
+        previous = os.umask(0o077)
+        try:
+            self._listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        finally:
+            os.umask(previous)
+
+    def serve_forever(self):
+        if self._listener is None:
+            self.start()
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed.is_set():
+                    return
+                continue
+            except Exception as e:
+                # Failed handshake (wrong authkey), keep serving the others
+                print(f"Inference connection rejected: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.close()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", self._dispatch(op, payload))
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                try:
+                    conn.send(reply)
+                except OSError:
+                    return
+
+    def _dispatch(self, op: str, payload):
+        if op == "ping":
+            return "pong"
+        if op == "version":
+            return self.backend.index_version()
+        with self._slots:
+            if op == "embed":
+                return self.backend.embed(payload)
+            if op == "search":
+                queries, k = payload
+                return self._rows(self.backend.search(queries, k))
+            if op == "search_vectors":
+                vectors, k = payload
+                return self._rows(self.backend.search_vectors(vectors, k))
+        raise ValueError(f"Unknown inference op: {op}")
+
+    @staticmethod
+    def _rows(results):
+        return [[(doc.page_content, dict(doc.metadata), float(dist)) for doc, dist in hits] for hits in results]
+
+
+def serve(address: str, threads: int = INFERENCE_THREADS, concurrency: int = INFERENCE_CONCURRENCY):
+    # Refuse to start before loading anything when the secret is missing
+    check_authkey(INFERENCE_AUTHKEY)
+    # The cores are shared by the requests computed at once
+    set_thread_budget(max(1, threads // concurrency))
+    backend = LocalBackend()
+    # Load MiniLM and the index before accepting, so the first request is not a cold start
+    backend.load()
+    server = InferenceServer(address, backend, concurrency)
+    server.start()
+    print(f"Inference service listening on {address} (threads={threads}, concurrency={concurrency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host the embedding model and FAISS index for all API workers")
+    parser.add_argument("--socket", default=INFERENCE_SOCKET or "/tmp/ticket-inference.sock")
+    parser.add_argument("--threads", type=int, default=INFERENCE_THREADS, help="cores for torch/FAISS, split across --concurrency")
+    parser.add_argument("--concurrency", type=int, default=INFERENCE_CONCURRENCY)
+    args = parser.parse_args()
+    serve(args.socket, args.threads, args.concurrency)
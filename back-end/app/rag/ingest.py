@@ -1,11 +1,8 @@
 import os
 from pathlib import Path
-from langchain_community.vectorstores.faiss import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.docstore.document import Document
-from PIL import Image
-import pytesseract
-import pdfplumber
+
+# langchain, PIL, pytesseract and pdfplumber are imported where they are used,
+# so chunk_text can be imported (e.g. by tests) without the ingestion stack
 
 # ---------- Config ----------
 DOCS_FOLDER = "docs/"
@@ -23,6 +20,7 @@ def load_text_file(file_path: str) -> str:
     return ""
 
 def extract_text_from_pdf(file_path: str) -> str:
+    import pdfplumber
     text = ""
     try:
         with pdfplumber.open(file_path) as pdf:
@@ -35,6 +33,8 @@ def extract_text_from_pdf(file_path: str) -> str:
     return text
 
 def extract_text_from_image(file_path: str) -> str:
+    from PIL import Image
+    import pytesseract
     try:
         image = Image.open(file_path)
         return pytesseract.image_to_string(image)
@@ -101,6 +101,9 @@ def chunk_text(text: str, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
 
 # ---------- Main ingestion ----------
 def ingest_docs():
+    from langchain_community.docstore.document import Document
+    from langchain_community.vectorstores.faiss import FAISS
+    from langchain_huggingface import HuggingFaceEmbeddings
     embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
     all_docs = []
 
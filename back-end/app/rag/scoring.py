@@ -0,0 +1,135 @@
+# app/rag/scoring.py
+"""
+Snippet scoring for retrieval results.
+
+The KB embeddings are normalized, so the squared L2 distance FAISS returns
+maps straight to a cosine (1 - d / 2). Cosines are then turned into
+confidences with a piecewise-linear calibration curve. The default curve is a
+hand-set placeholder, not fitted on data: no labelled hits exist for this KB
+yet. Fit a real one from labelled (cosine, relevant) pairs with
+fit_calibration() and load it through SCORE_CALIBRATION_PATH. Both steps are
+single NumPy array operations over all hits of a query; the confidences they
+produce are the snippet scores used for filtering, evaluation and the order
+of the prompt context.
+
+Usage (from back-end/), to refit the curve:
+    python -m app.rag.scoring labelled_hits.json calibration.json
+where labelled_hits.json holds [[cosine, 0 or 1], ...]; point
+SCORE_CALIBRATION_PATH at the output to use it.
+"""
+import json
+import os
+import sys
+from typing import Optional
+
+# Hand-set placeholder curve (cosine -> confidence) for the MiniLM index, not
+# fitted: its knots were picked so that 0.6 confidence sits at cosine 0.6, the
+# old raw-cosine threshold. Replace it with a fit_calibration() curve
+CALIBRATION_COSINES = (0.0, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+CALIBRATION_CONFIDENCES = (0.0, 0.02, 0.1, 0.3, 0.6, 0.8, 0.92, 0.97, 0.99)
+# JSON file {"cosines": [...], "confidences": [...]} overriding the default curve
+SCORE_CALIBRATION_PATH = os.environ.get("SCORE_CALIBRATION_PATH")
+CALIBRATION_BINS = 10
+
+_curve: Optional[tuple] = None
+
+
+def cosine_from_distance(distance: float) -> float:
+    """Cosine similarity from a FAISS squared-L2 distance between normalized embeddings."""
+    return 1.0 - distance / 2.0
+
+
+def cosines(distances):
+    """Array of cosines for an array of squared-L2 distances, clipped to [-1, 1]."""
+    import numpy as np
+    return np.clip(1.0 - np.asarray(distances, dtype="float64") / 2.0, -1.0, 1.0)
+
+
+def load_calibration(path: Optional[str] = SCORE_CALIBRATION_PATH) -> tuple:
+    """(cosines, confidences) knots from path, or the default curve when path is None."""
+    if not path:
+        return CALIBRATION_COSINES, CALIBRATION_CONFIDENCES
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    xs, ys = tuple(data["cosines"]), tuple(data["confidences"])
+    if len(xs) != len(ys) or len(xs) < 2 or list(xs) != sorted(xs):
+        raise ValueError(f"Invalid calibration curve in {path}")
+    return xs, ys
+
+
+def get_calibration() -> tuple:
+    global _curve
+    if _curve is None:
+        _curve = load_calibration()
+    return _curve
+
+
+def set_calibration(xs, ys):
+    """Replace the curve in use (None, None: back to SCORE_CALIBRATION_PATH / default)."""
+    global _curve
+    _curve = None if xs is None else (tuple(xs), tuple(ys))
+
+
+def calibrate(values):
+    """Confidences in [0, 1] for an array of cosines (linear between knots, flat outside)."""
+    import numpy as np
+    xs, ys = get_calibration()
+    return np.interp(np.asarray(values, dtype="float64"), xs, ys)
+
+
+def confidences(distances):
+    """Calibrated confidence of each hit from its squared-L2 distance."""
+    return calibrate(cosines(distances))
+
+
+def fit_calibration(values, relevant, bins: int = CALIBRATION_BINS) -> tuple:
+    """
+    Fit a monotone curve from labelled hits.
+
+    Parameters:
+    - values: cosine of each hit
+    - relevant: 1 when the hit answered the ticket, else 0
+    - bins: number of equal-count cosine bins
+
+    Returns (cosines, confidences) knots: mean cosine and relevance rate per
+    bin, made non-decreasing by pooling adjacent violators.
+    """
+    import numpy as np
+    values = np.asarray(values, dtype="float64")
+    relevant = np.asarray(relevant, dtype="float64")
+    if values.size < 2 or values.size != relevant.size:
+        raise ValueError("Need at least two labelled hits, one label per cosine")
+    order = np.argsort(values, kind="stable")
+    groups = [g for g in np.array_split(order, min(bins, values.size)) if g.size]
+    xs = [float(values[g].mean()) for g in groups]
+    blocks = [[float(relevant[g].mean()), float(g.size), 1] for g in groups]  # [rate, weight, bins merged]
+
+    pooled = []
+    for block in blocks:
+        pooled.append(block)
+        while len(pooled) > 1 and pooled[-2][0] > pooled[-1][0]:
+            rate, weight, merged = pooled.pop()
+            prev = pooled[-1]
+            prev[0] = (prev[0] * prev[1] + rate * weight) / (prev[1] + weight)
+            prev[1] += weight
+            prev[2] += merged
+    ys = [round(rate, 4) for rate, _, merged in pooled for _ in range(merged)]
+    return tuple(round(x, 4) for x in xs), tuple(ys)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python -m app.rag.scoring LABELLED_HITS.json OUTPUT.json")
+        return 2
+    with open(argv[0], encoding="utf-8") as f:
+        pairs = json.load(f)
+    xs, ys = fit_calibration([p[0] for p in pairs], [p[1] for p in pairs])
+    with open(argv[1], "w", encoding="utf-8") as f:
+        json.dump({"cosines": xs, "confidences": ys}, f, indent=2)
+    print(f"Calibration curve ({len(xs)} knots) written to {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,36 @@
-from langchain_community.vectorstores.faiss import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 from app.rag.cache import get_cached_embedding, cache_embedding
+from app.rag import inference_service
+from app.utils.batching import MicroBatcher
+from app.utils.executor import call_inference, on_inference_worker
+from app.utils.lru import LRUCache
 import hashlib
+import os
+import threading
 
+VECTORSTORE_PATH = "vectorstore"
+
+# Micro-batch query embeddings from concurrent requests into one forward pass:
+# flush at EMBED_BATCH_MAX_ITEMS queries or EMBED_BATCH_MAX_WAIT_MS after the first
+EMBED_MICRO_BATCH = os.environ.get("EMBED_MICRO_BATCH", "0") == "1"
+EMBED_BATCH_MAX_ITEMS = int(os.environ.get("EMBED_BATCH_MAX_ITEMS", "32"))
+EMBED_BATCH_MAX_WAIT_MS = float(os.environ.get("EMBED_BATCH_MAX_WAIT_MS", "5"))
+# Query embeddings kept per worker, keyed by exact text: the raw ticket and its
+# summary are embedded once, then reused by retrieval, speculation and the answer cache
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+query_embeddings = LRUCache("query_embedding", QUERY_EMBEDDING_CACHE_SIZE)
+
+# langchain / HuggingFace / FAISS are imported inside the accessors below,
+# so only workers that actually retrieve pay for loading them.
 _embeddings = None
 _db = None
+_db_version = None
+_db_lock = threading.Lock()
 
 def get_embeddings():
     global _embeddings
     if _embeddings is None:
+        from langchain_huggingface import HuggingFaceEmbeddings
         _embeddings = HuggingFaceEmbeddings(
             model_name="sentence-transformers/all-MiniLM-L6-v2",
             model_kwargs={'device': 'cpu'},
@@ -27,14 +49,186 @@ def embed_with_cache(text: str):
     return emb
 
 def get_db():
-    global _db
-    if _db is None:
-        _db = FAISS.load_local(
-            "vectorstore",
-            get_embeddings(),
-            allow_dangerous_deserialization=True
-        )
+    """
+    The FAISS store, loaded on first use and reloaded when ingest.py rebuilt
+    the files on disk (checked with two stat calls per access). A failed
+    reload keeps serving the index already loaded and is retried on the next
+    access.
+    """
+    global _db, _db_version
+    version = disk_index_version()
+    if _db is not None and version == _db_version:
+        return _db
+    with _db_lock:
+        if _db is None or version != _db_version:
+            try:
+                # version was read before loading: files rewritten meanwhile trigger another reload
+                _db, _db_version = _load_db(), version
+            except Exception as e:
+                if _db is None:
+                    raise
+                print(f"Reloading the vector store failed, keeping version {_db_version}: {e}")
     return _db
 
+
+def _load_db():
+    from langchain_community.vectorstores.faiss import FAISS
+    return FAISS.load_local(
+        VECTORSTORE_PATH,
+        get_embeddings(),
+        allow_dangerous_deserialization=True
+    )
+
+
+def disk_index_version() -> str:
+    """
+    Identifier of the KB index on disk (mtime + size of the saved files); it
+    changes whenever ingest.py rebuilds the vector store.
+    """
+    parts = []
+    for name in ("index.faiss", "index.pkl"):
+        try:
+            st = os.stat(os.path.join(VECTORSTORE_PATH, name))
+            parts.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append("missing")
+    return "/".join(parts)
+
+
+def loaded_index_version() -> str:
+    """
+    Version of the index this process searches: the loaded one (reloaded
+    first if the files changed), or the files on disk while nothing is loaded
+    yet, since the first load will read at least those.
+    """
+    if _db is None:
+        return disk_index_version()
+    get_db()
+    return _db_version
+
+
+def index_version() -> str:
+    """
+    Version of the index retrieval searches, the key of the RAG and answer
+    caches. With INFERENCE_SOCKET it is the shared inference process's.
+    Retrieved hits always come from this version or a newer one.
+    """
+    if inference_service.INFERENCE_SOCKET:
+        return inference_service.get_client().index_version()
+    return loaded_index_version()
+
+
+# In-process embedding and search go through call_inference (app.utils.executor):
+# with INFERENCE_THREAD_BUDGET they run on the executor, within the INFERENCE_THREADS
+# budget, otherwise in the calling thread. Micro-batched queries are queued before
+# their caller takes an executor worker (see embed_ahead_async).
+
 def retrieve(query: str, k=5):
-    return get_db().similarity_search_with_score(query, k=k)
+    """[(doc, squared L2 distance), ...] for one query, closest first."""
+    return retrieve_batch([query], k)[0]
+
+
+def embed_texts(texts: list[str]):
+    """
+    Normalized MiniLM embeddings as a float32 (n, dim) matrix, computed by the
+    shared inference process when INFERENCE_SOCKET is set. Only the texts
+    missing from query_embeddings are embedded.
+    """
+    import numpy as np
+    vectors = [query_embeddings.get(t) for t in texts]
+    misses = [i for i, v in enumerate(vectors) if v is None]
+    if misses:
+        for i, vector in zip(misses, _embed_uncached([texts[i] for i in misses])):
+            vectors[i] = vector
+            query_embeddings.put(texts[i], vector)
+    return np.vstack(vectors) if vectors else np.empty((0, 0), dtype="float32")
+
+
+def _embed_uncached(texts: list[str]):
+    if inference_service.INFERENCE_SOCKET:
+        return inference_service.get_client().embed(list(texts))
+    return embed_queries(texts)
+
+
+def embed_local(texts: list[str]):
+    import numpy as np
+    return np.asarray(get_embeddings().embed_documents(list(texts)), dtype="float32")
+
+
+_embed_batcher = MicroBatcher(
+    "embedding", lambda texts: list(call_inference(embed_local, texts)),
+    max_items=EMBED_BATCH_MAX_ITEMS, max_wait=EMBED_BATCH_MAX_WAIT_MS / 1000,
+)
+
+
+def _micro_batched(texts: list[str]) -> bool:
+    # Lists that already fill a batch gain nothing from waiting for others. A
+    # caller holding an inference worker embeds inline: the batch it would wait
+    # for needs a worker too, and would never grow past the worker count
+    return EMBED_MICRO_BATCH and len(texts) < EMBED_BATCH_MAX_ITEMS and not on_inference_worker()
+
+
+def embed_queries(texts: list[str]):
+    """
+    embed_local for the few queries of one request, on the inference executor.
+    With EMBED_MICRO_BATCH they share a forward pass with the queries of
+    concurrent requests.
+    """
+    if not _micro_batched(texts):
+        return call_inference(embed_local, texts)
+    import numpy as np
+    return np.vstack(_embed_batcher.submit_many(list(texts)))
+
+
+async def embed_ahead_async(texts: list[str]):
+    """
+    With EMBED_MICRO_BATCH, embed the texts missing from query_embeddings
+    through the micro-batcher, awaited on the event loop. A retrieval run on
+    an inference worker afterwards finds the vectors cached and only searches,
+    so batches fill with every pending request, not just those holding a worker.
+    No-op without micro-batching or with INFERENCE_SOCKET.
+    """
+    if not EMBED_MICRO_BATCH or inference_service.INFERENCE_SOCKET:
+        return
+    missing = [t for t in dict.fromkeys(texts) if t not in query_embeddings]
+    if not missing or len(missing) >= EMBED_BATCH_MAX_ITEMS:
+        return
+    for text, vector in zip(missing, await _embed_batcher.submit_many_async(missing)):
+        query_embeddings.put(text, vector)
+
+
+def retrieve_batch(queries: list[str], k=5):
+    """
+    Retrieve for several queries at once: one batched embedding forward pass
+    (for the queries not in query_embeddings) and one FAISS search over the
+    whole query matrix. Returns one [(doc, score), ...] list per query.
+    In-process and through the shared inference process, the search is the
+    same search_vectors.
+    """
+    if not queries:
+        return []
+    vectors = embed_texts(list(queries))
+    if inference_service.INFERENCE_SOCKET:
+        return inference_service.get_client().search_vectors(vectors, k)
+    return call_inference(search_vectors, vectors, k)
+
+
+def search_local(queries: list[str], k=5):
+    """Embed (uncached) and search queries with the model and index loaded in this process."""
+    return search_vectors(embed_queries(queries), k)
+
+
+def search_vectors(vectors, k=5):
+    """FAISS search for a (n, dim) matrix of query embeddings, one hit list per row."""
+    db = get_db()
+    distances, indices = db.index.search(vectors, k)
+    results = []
+    for row_dist, row_idx in zip(distances, indices):
+        hits = []
+        for dist, idx in zip(row_dist, row_idx):
+            if idx == -1:
+                continue
+            doc = db.docstore.search(db.index_to_docstore_id[idx])
+            hits.append((doc, float(dist)))
+        results.append(hits)
+    return results
@@ -0,0 +1,33 @@
+# Agent pipeline models are re-exported here so `from app.schemas import TicketInput`
+# keeps working next to the API schema modules (auth, ticket, user, ...).
+from app.schemas.pipeline import (
+    TicketInput,
+    AnalysisResult,
+    RagSnippet,
+    RagResult,
+    EvaluationResult,
+    FinalResponse,
+    BatchQuestion,
+    BatchQuestionsInput,
+    BatchAnswer,
+    BatchAnswersOutput,
+    TicketJobInput,
+    TicketJob,
+    TicketJobAccepted,
+)
+
+__all__ = [
+    "TicketInput",
+    "AnalysisResult",
+    "RagSnippet",
+    "RagResult",
+    "EvaluationResult",
+    "FinalResponse",
+    "BatchQuestion",
+    "BatchQuestionsInput",
+    "BatchAnswer",
+    "BatchAnswersOutput",
+    "TicketJobInput",
+    "TicketJob",
+    "TicketJobAccepted",
+]
@@ -0,0 +1,68 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+class TicketInput(BaseModel):
+    ticket_id: str
+    content: str
+
+class AnalysisResult(BaseModel):
+    summary: str
+    keywords: List[str]
+
+class RagSnippet(BaseModel):
+    text: str
+    source: str
+    chunk_id: Optional[int] = None
+    category: Optional[str] = None
+    distance: float          # raw FAISS distance (lower is closer)
+    score: float             # calibrated confidence in [0, 1] (app.rag.scoring)
+
+class RagResult(BaseModel):
+    context: str
+    sources: List[str]
+    similarity_score: Optional[float] = 0.0  
+    snippets: List[RagSnippet] = []
+
+class EvaluationResult(BaseModel):
+    decision: Literal["APPROVE", "ESCALATE"]
+    confidence_score: float
+    reason: str
+
+class FinalResponse(BaseModel):
+    ticket_id: str
+    response: str
+    escalated: bool
+    reason: str
+
+class BatchQuestion(BaseModel):
+    id: str
+    query: str
+
+class BatchQuestionsInput(BaseModel):
+    Questions: List[BatchQuestion]
+
+class BatchAnswer(BaseModel):
+    id: str
+    answer: str
+
+class BatchAnswersOutput(BaseModel):
+    Answers: List[BatchAnswer]
+
+class TicketJobInput(TicketInput):
+    callback_url: Optional[str] = None   # POSTed the finished job when set
+
+class TicketJob(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    ticket: TicketInput
+    callback_url: Optional[str] = None
+    result: Optional[FinalResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+class TicketJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
@@ -1,3 +1,3 @@
-from .llm import call_llm
+from .llm import call_llm, call_llm_async
 
-__all__ = ["call_llm"]
\ No newline at end of file
+__all__ = ["call_llm", "call_llm_async"]
\ No newline at end of file
@@ -0,0 +1,94 @@
+# app/utils/admission.py
+"""
+Admission control for the synchronous ticket endpoint.
+
+At most `max_concurrent` tickets run the pipeline at once; up to `max_queue`
+more wait for a slot, each for at most `max_wait` seconds. Anything beyond that
+is rejected straight away with Overloaded (429 + Retry-After at the HTTP layer)
+instead of piling up until clients time out.
+"""
+import asyncio
+import math
+import os
+from contextlib import asynccontextmanager
+
+from app.utils import deadline, metrics
+
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", "16"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT", "10"))
+# Service time assumed before any ticket has been timed (seconds)
+DEFAULT_SERVICE_TIME = 2.0
+
+queue_depth = metrics.gauge("admission_queue_depth", "Requests waiting for a pipeline slot")
+in_flight = metrics.gauge("admission_in_flight", "Requests currently running the pipeline")
+admission_rejected = metrics.counter("admission_rejected_total", "Requests rejected by admission control by reason")
+admission_wait = metrics.histogram("admission_wait_seconds", "Time spent waiting for a pipeline slot")
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait: float = ADMISSION_MAX_WAIT,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        self._running = 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        from app.utils.tracing import stage_seconds
+
+        count = stage_seconds.count(stage="process_ticket")
+        service = stage_seconds.sum(stage="process_ticket") / count if count else DEFAULT_SERVICE_TIME
+        backlog = self._waiting + self._running
+        return max(1, math.ceil(service * backlog / max(1, self.max_concurrent)))
+
+    def _reject(self, reason: str):
+        admission_rejected.inc(endpoint=self.name, reason=reason)
+        raise Overloaded(reason, self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one pipeline slot for the duration of the block."""
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            self._reject("queue_full")
+
+        self._waiting += 1
+        queue_depth.set(self._waiting, endpoint=self.name)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            # Never queue past the request deadline
+            left = deadline.remaining()
+            timeout = self.max_wait if left is None else max(0.0, min(self.max_wait, left))
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._reject("wait_timeout")
+        finally:
+            self._waiting -= 1
+            queue_depth.set(self._waiting, endpoint=self.name)
+        admission_wait.observe(loop.time() - start, endpoint=self.name)
+
+        self._running += 1
+        in_flight.set(self._running, endpoint=self.name)
+        try:
+            yield
+        finally:
+            self._running -= 1
+            in_flight.set(self._running, endpoint=self.name)
+            self._semaphore.release()
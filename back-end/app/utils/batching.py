@@ -0,0 +1,102 @@
+# app/utils/batching.py
+"""
+Micro-batching: concurrent callers submit single items, a background thread
+groups them and runs one batched call for the whole group.
+
+A batch is flushed as soon as it holds max_items items, or max_wait seconds
+after its first item arrived, whichever comes first. A larger max_wait gives
+fuller batches (throughput) at the cost of up to max_wait extra latency for
+each caller.
+
+Async callers await submit_many_async on the event loop, so they hold no
+thread while their batch fills.
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app.utils import metrics
+
+batch_size = metrics.histogram("micro_batch_size", "Items per flushed micro-batch", buckets=(1, 2, 4, 8, 16, 32, 64))
+batch_wait_seconds = metrics.histogram("micro_batch_wait_seconds", "Time the first item of a micro-batch waited for the flush")
+
+
+class MicroBatcher:
+    """
+    Parameters:
+    - name: label of the batch metrics
+    - fn: called with a list of items, returns one result per item in order
+    - max_items: flush when this many items are queued
+    - max_wait: seconds to wait for more items after the first one
+    """
+
+    def __init__(self, name: str, fn, max_items: int = 32, max_wait: float = 0.005):
+        self.name = name
+        self.fn = fn
+        self.max_items = max_items
+        self.max_wait = max_wait
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        """Block until the batch holding item has run; return its result."""
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items: list) -> list:
+        """Queue several items (they may land in different batches) and wait for all results."""
+        return [f.result() for f in self.enqueue(items)]
+
+    async def submit_many_async(self, items: list) -> list:
+        """submit_many for the event loop: awaits the results without blocking a thread."""
+        return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in self.enqueue(items))))
+
+    def enqueue(self, items: list) -> list[Future]:
+        """Queue items without waiting; one Future per item. A cancelled Future drops its item."""
+        self._ensure_thread()
+        futures = []
+        for item in items:
+            future = Future()
+            self._queue.put((item, future, time.perf_counter()))
+            futures.append(future)
+        return futures
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def _collect(self) -> list:
+        first = self._queue.get()
+        batch = [first]
+        flush_at = first[2] + self.max_wait
+        while len(batch) < self.max_items:
+            left = flush_at - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=left) if left > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            # Items whose caller gave up are not computed
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            batch_size.observe(len(batch), batcher=self.name)
+            batch_wait_seconds.observe(time.perf_counter() - batch[0][2], batcher=self.name)
+            try:
+                results = self.fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,83 @@
+# app/utils/deadline.py
+"""
+Per-request deadline carried through the ticket pipeline.
+
+The HTTP layer opens a deadline_scope(); every stage below reads remaining()
+from a context variable, so no signature has to thread it through. The
+variable follows asyncio tasks, and run_inference copies the context into the
+executor thread.
+"""
+import contextvars
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Default budget of a synchronous /ticket request (seconds), below typical client timeouts
+TICKET_DEADLINE_SECONDS = float(os.environ.get("TICKET_DEADLINE_SECONDS", "25"))
+# Clients may ask for less (never more) with this header, in seconds
+DEADLINE_HEADER = "X-Request-Timeout"
+# Below this many seconds left, the responder LLM call is skipped for an extractive answer / escalation
+LLM_MIN_BUDGET_SECONDS = float(os.environ.get("LLM_MIN_BUDGET_SECONDS", "1.5"))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("ticket_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request budget ran out before the work could be done."""
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Run the block with a deadline `seconds` from now (None: no deadline).
+    A tighter enclosing deadline is kept."""
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), None when there is none."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def budget_bucket() -> Optional[int]:
+    """
+    Coarse class of the time left, for keys shared by concurrent requests:
+    None without a deadline, else floor(log2(seconds left)) clipped to 0..4
+    (under 2s, 2-4s, 4-8s, 8-16s, 16s and more).
+    """
+    left = remaining()
+    if left is None:
+        return None
+    return min(4, max(0, int(math.floor(math.log2(left))) if left > 0 else 0))
+
+
+def check(stage: str):
+    if expired():
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+
+def budget_from_header(value: Optional[str]) -> float:
+    """Request budget: TICKET_DEADLINE_SECONDS, lowered by a valid header value."""
+    try:
+        asked = float(value) if value else None
+    except ValueError:
+        asked = None
+    if asked is None or asked <= 0:
+        return TICKET_DEADLINE_SECONDS
+    return min(asked, TICKET_DEADLINE_SECONDS)
@@ -0,0 +1,175 @@
+# app/utils/degradation.py
+"""
+Degradation controller for the LLM provider.
+
+Every Mistral attempt made by call_llm / call_llm_async is recorded here
+(latency, success). From the rolling window the controller derives a mode the
+pipeline adapts to:
+
+- normal: full prompt, routed model
+- reduced: p95 latency or error rate past their thresholds; the responder gets
+  fewer snippets and the fast model
+- open: the circuit breaker tripped; no LLM call is made, tickets are answered
+  extractively from the top snippet or escalated (DEGRADED_OPEN_MODE)
+
+The breaker opens after BREAKER_FAILURES consecutive failures or when the
+error rate reaches BREAKER_ERROR_RATE, lets a single probe through after
+BREAKER_COOLDOWN seconds, and closes again when that probe succeeds. A probe
+that ends without an outcome (cancelled) is released for the next caller.
+While the probe is in flight the mode stays open, as allow() refuses others.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from app.utils import metrics
+
+WINDOW_SECONDS = float(os.environ.get("LLM_HEALTH_WINDOW_SECONDS", "60"))
+# Calls needed in the window before rates are trusted
+MIN_CALLS = int(os.environ.get("LLM_HEALTH_MIN_CALLS", "5"))
+REDUCED_LATENCY_P95 = float(os.environ.get("LLM_REDUCED_LATENCY_P95", "8.0"))
+REDUCED_ERROR_RATE = float(os.environ.get("LLM_REDUCED_ERROR_RATE", "0.2"))
+BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))
+BREAKER_ERROR_RATE = float(os.environ.get("LLM_BREAKER_ERROR_RATE", "0.5"))
+BREAKER_COOLDOWN = float(os.environ.get("LLM_BREAKER_COOLDOWN", "30"))
+# Reduced mode: responder context cut to this many snippets, and a latency
+# target tight enough for app.utils.routing to pick the fast model
+REDUCED_MAX_SNIPPETS = int(os.environ.get("LLM_REDUCED_MAX_SNIPPETS", "2"))
+REDUCED_LATENCY_TARGET = 2.0
+# What the pipeline does while the breaker is open: "extractive" or "escalate"
+DEGRADED_OPEN_MODE = os.environ.get("DEGRADED_OPEN_MODE", "extractive")
+# Retry backoff (seconds): full jitter over base * 2^attempt, capped
+RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", "4.0"))
+
+NORMAL = "normal"
+REDUCED = "reduced"
+OPEN = "open"
+
+CLOSED, HALF_OPEN = "closed", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = metrics.gauge("llm_circuit_state", "LLM circuit breaker state (0 closed, 1 half-open, 2 open)")
+circuit_transitions = metrics.counter("llm_circuit_transitions_total", "LLM circuit breaker transitions by new state")
+circuit_rejected = metrics.counter("llm_circuit_rejected_total", "LLM calls refused while the circuit was open")
+degraded_responses = metrics.counter("degraded_responses_total", "Tickets answered in a degraded mode, by mode")
+
+
+class CircuitOpen(Exception):
+    """Raised by call_llm when the breaker refuses the call."""
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter delay before retry number attempt + 1."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+
+class DegradationController:
+    def __init__(self, window: float = WINDOW_SECONDS, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._calls: deque = deque()  # (timestamp, seconds, ok)
+        self._consecutive_failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            self._state = state
+            circuit_transitions.inc(state=state)
+            circuit_state.set(_STATE_VALUES[state])
+
+    def allow(self) -> bool:
+        """False while the breaker is open; in half-open, only one probe at a time."""
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= BREAKER_COOLDOWN:
+                self._set_state(HALF_OPEN)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+        circuit_rejected.inc()
+        return False
+
+    def release(self):
+        """Give back the half-open probe of a call that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            now = self._clock()
+            self._calls.append((now, seconds, ok))
+            self._trim(now)
+            self._consecutive_failures = 0 if ok else self._consecutive_failures + 1
+
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._calls.clear()
+                    self._set_state(CLOSED)
+                else:
+                    self._trip(now)
+            elif self._state == CLOSED and not ok:
+                if self._consecutive_failures >= BREAKER_FAILURES or (
+                    len(self._calls) >= MIN_CALLS and self._error_rate() >= BREAKER_ERROR_RATE
+                ):
+                    self._trip(now)
+
+    def _trip(self, now: float):
+        self._opened_at = now
+        self._set_state(OPEN)
+        print(f"LLM circuit opened ({self._consecutive_failures} consecutive failures)")
+
+    def _error_rate(self) -> float:
+        return sum(1 for _, _, ok in self._calls if not ok) / len(self._calls) if self._calls else 0.0
+
+    def _p95(self) -> float:
+        latencies = sorted(s for _, s, ok in self._calls if ok)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+
+    def mode(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at < BREAKER_COOLDOWN:
+                return OPEN
+            if self._state == HALF_OPEN and self._probe_in_flight:
+                return OPEN
+            self._trim(self._clock())
+            if len(self._calls) >= MIN_CALLS and (
+                self._error_rate() >= REDUCED_ERROR_RATE or self._p95() >= REDUCED_LATENCY_P95
+            ):
+                return REDUCED
+            return NORMAL
+
+    def snapshot(self) -> dict:
+        mode = self.mode()
+        with self._lock:
+            return {
+                "mode": mode,
+                "circuit": self._state,
+                "calls_in_window": len(self._calls),
+                "error_rate": round(self._error_rate(), 3),
+                "p95_seconds": round(self._p95(), 3),
+                "consecutive_failures": self._consecutive_failures,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._calls.clear()
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+
+controller = DegradationController()
@@ -0,0 +1,140 @@
+# app/utils/executor.py
+"""
+Bounded executor for the CPU-bound parts of the pipeline (embedding, FAISS
+search), so they never run on the event loop and never compete
+for FastAPI's request threadpool.
+
+With INFERENCE_THREAD_BUDGET=1 it also owns the CPU thread budget of
+inference. Left alone, torch, FAISS and BLAS each size their OpenMP pools to
+every core, so N request threads running a forward pass or a search at once
+start N x cores threads. With the budget, every in-process embedding and
+search runs on the executor (call_inference), and INFERENCE_THREADS cores are
+split between INFERENCE_WORKERS workers: the intra-op thread count is set
+once, process-wide, to INFERENCE_THREADS // INFERENCE_WORKERS. The embedding
+micro-batcher (app.utils.batching) then runs its batches on a worker too.
+
+The budget is off by default: on 1 vCPU it lost throughput at 16 concurrent
+requests (bench/inference_threads_bench.py, README step 10), and it has not
+been measured on multi-core hosts, where it also takes the cores of a lone
+forward pass. Without it, synchronous callers embed and search in their own
+thread, and only the async pipeline uses the executor.
+Thread variables (OMP_NUM_THREADS, ...) set by the operator are never
+overridden.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Run all in-process inference on the executor, within INFERENCE_THREADS cores
+INFERENCE_THREAD_BUDGET = os.environ.get("INFERENCE_THREAD_BUDGET", "0") == "1"
+# Cores given to embedding + FAISS search in this process
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(INFERENCE_THREADS)))
+# torch / FAISS / BLAS threads per job, so that workers x threads stays within the budget
+INTRA_OP_THREADS = max(1, INFERENCE_THREADS // INFERENCE_WORKERS)
+
+# Read by OpenMP, MKL and OpenBLAS when the libraries load
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+# The ones the operator set before start-up: they win over the budget
+_OPERATOR_THREAD_ENV = {var: os.environ[var] for var in _THREAD_ENV_VARS if var in os.environ}
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+_worker = threading.local()
+
+
+def set_thread_budget(threads: int):
+    """
+    Limit torch / FAISS / BLAS intra-op parallelism to `threads` for the whole
+    process. Libraries not loaded yet pick it up from the environment when
+    they are imported; torch, when already loaded, is set directly, without
+    importing anything. Variables the operator set are kept, and torch is
+    left alone when OMP_NUM_THREADS is one of them. FAISS's OpenMP count is
+    per thread: see set_openmp_threads.
+    """
+    for var in _THREAD_ENV_VARS:
+        if var in _OPERATOR_THREAD_ENV:
+            if _OPERATOR_THREAD_ENV[var] != str(threads):
+                print(f"Keeping {var}={_OPERATOR_THREAD_ENV[var]} set by the operator (inference budget: {threads})")
+            continue
+        os.environ[var] = str(threads)
+    if "torch" in sys.modules and "OMP_NUM_THREADS" not in _OPERATOR_THREAD_ENV:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+def set_openmp_threads(threads: int):
+    """
+    OpenMP thread count of the calling thread. FAISS reads it per thread, and
+    threads started after the library loaded do not inherit a value set
+    with omp_set_num_threads, so each inference worker sets it on start.
+    No-op when the operator set OMP_NUM_THREADS.
+    """
+    if "faiss" in sys.modules and "OMP_NUM_THREADS" not in _OPERATOR_THREAD_ENV:
+        sys.modules["faiss"].omp_set_num_threads(threads)
+
+
+def _init_worker(threads: int | None):
+    _worker.active = True
+    if threads is not None:
+        set_openmp_threads(threads)
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                threads = None
+                if INFERENCE_THREAD_BUDGET:
+                    threads = INTRA_OP_THREADS
+                    if INFERENCE_WORKERS * threads > (os.cpu_count() or 1):
+                        print(f"WARNING: {INFERENCE_WORKERS} inference workers x {threads} threads "
+                              f"exceed the {os.cpu_count()} cores of this machine")
+                    # Once, before the first job, so torch / FAISS load with the budget
+                    set_thread_budget(threads)
+                _executor = ThreadPoolExecutor(
+                    max_workers=INFERENCE_WORKERS,
+                    thread_name_prefix="inference",
+                    initializer=_init_worker,
+                    initargs=(threads,),
+                )
+    return _executor
+
+
+def on_inference_worker() -> bool:
+    return getattr(_worker, "active", False)
+
+
+def call_inference(fn, *args, **kwargs):
+    """
+    Run a blocking function on the inference executor from synchronous code
+    and wait for it. Runs inline without INFERENCE_THREAD_BUDGET, and when
+    already on an inference worker, so jobs that nest (rag_answer -> retrieve)
+    never wait on a worker they hold.
+    """
+    if not INFERENCE_THREAD_BUDGET or on_inference_worker():
+        return fn(*args, **kwargs)
+    ctx = contextvars.copy_context()
+    return get_inference_executor().submit(ctx.run, fn, *args, **kwargs).result()
+
+
+async def run_inference(fn, *args, **kwargs):
+    """
+    Run a blocking function on the inference executor and await its result.
+    The caller's context (e.g. the request deadline) is visible to fn.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_inference_executor(), functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+def shutdown_inference_executor():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
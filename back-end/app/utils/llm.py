@@ -1,35 +1,205 @@
 # app/utils/llm.py
-from mistralai import Mistral
+import asyncio
 import os
+import threading
+import time
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load .env file from the app directory
+from app.utils import deadline
+from app.utils.degradation import CircuitOpen, backoff_delay, controller
+from app.utils.llm_usage import record_call
+from app.utils.routing import DEFAULT_MODEL
+
+# .env file in the app directory, loaded on first use
 env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
 
-# Initialize Mistral client with API key from environment
-api_key = os.environ.get("MISTRAL_API_KEY")
-if not api_key:
-    raise ValueError("MISTRAL_API_KEY not found in environment variables")
+# Mistral client, created on first call (see get_client)
+_client = None
+_client_lock = threading.Lock()
+
+# Extra attempts after the first failure, spaced by jittered backoff
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+# A failed attempt ending this close to the request deadline was cut short by
+# our own timeout_ms, not by the provider
+DEADLINE_SLACK_SECONDS = 0.05
+
+
+def get_client():
+    """
+    Return the shared Mistral client, creating it on first use.
+    Importing this module stays cheap: the SDK and .env are only loaded here.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from dotenv import load_dotenv
+                from mistralai import Mistral
+
+                load_dotenv(env_path)
+                api_key = os.environ.get("MISTRAL_API_KEY")
+                if not api_key:
+                    raise ValueError("MISTRAL_API_KEY not found in environment variables")
+                _client = Mistral(api_key=api_key)
+    return _client
+
+
+def _usage(response) -> tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0, 0
+    return (getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+
+def _messages(system_prompt: str, user_prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def _finish(response, stage: str, model: str, start: float, retries: int) -> str:
+    prompt_tokens, completion_tokens = _usage(response)
+    record_call(
+        stage,
+        model,
+        time.perf_counter() - start,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        retries=retries,
+    )
+    return response.choices[0].message.content
+
+
+def _admit(stage: str, model: str):
+    if deadline.expired():
+        record_call(stage, model, 0.0, ok=False)
+        raise deadline.DeadlineExceeded(f"Deadline exceeded before the {stage} LLM call")
+    if not controller.allow():
+        record_call(stage, model, 0.0, ok=False)
+        raise CircuitOpen(f"LLM circuit open, {stage} call refused")
+
 
-client = Mistral(api_key=api_key)
+def _timeout_kwargs() -> dict:
+    """timeout_ms for the Mistral SDK from the request deadline, none without one."""
+    left = deadline.remaining()
+    return {} if left is None else {"timeout_ms": max(1, int(left * 1000))}
 
-def call_llm(system_prompt: str, user_prompt: str, temperature:float):
+
+def _cut_by_deadline() -> bool:
+    left = deadline.remaining()
+    return left is not None and left <= DEADLINE_SLACK_SECONDS
+
+
+def _record_failure(seconds: float):
+    """
+    Feed a failed attempt to the degradation controller, unless the request
+    deadline ended it: a tight X-Request-Timeout says nothing about provider
+    health and must not trip the breaker for everyone. Such an attempt is
+    neutral (a half-open probe is released).
+    """
+    if _cut_by_deadline():
+        controller.release()
+        return
+    controller.record(seconds, ok=False)
+
+
+def _give_up(e: Exception, stage: str, model: str, start: float, attempt: int, delay: float) -> bool:
+    """Log a failed attempt; True when no retry should follow."""
+    print(f"Error calling Mistral API (stage={stage}, attempt={attempt + 1}): {e}")
+    left = deadline.remaining()
+    out_of_time = left is not None and left <= delay
+    if attempt >= MAX_RETRIES or out_of_time or not controller.allow():
+        record_call(stage, model, time.perf_counter() - start, retries=attempt, ok=False)
+        return True
+    return False
+
+
+def _failure(e: Exception) -> Exception:
+    """The exception to raise after the last attempt: DeadlineExceeded once out of time."""
+    if _cut_by_deadline():
+        return deadline.DeadlineExceeded(f"Deadline exceeded during LLM call: {e}")
+    return e
+
+
+def call_llm(system_prompt: str, user_prompt: str, temperature: float, stage: str = "unknown", model: str | None = None):
     """
     Calls Mistral model with a system and user prompt and returns the output text.
+
+    `model` defaults to DEFAULT_MODEL; callers pick another one through
+    app.utils.routing. Every call records model, prompt/completion tokens,
+    wall time and retries under the caller `stage` (see app.utils.llm_usage).
+    Each attempt feeds app.utils.degradation; raises CircuitOpen instead of
+    calling Mistral while the breaker is open. Under a request deadline
+    (app.utils.deadline) attempts get the remaining time as timeout and no
+    retry starts that could not finish in time.
+    """
+    client = get_client()
+    model = model or DEFAULT_MODEL
+    _admit(stage, model)
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt_start = time.perf_counter()
+        try:
+            response = client.chat.complete(
+                model=model,
+                messages=_messages(system_prompt, user_prompt),
+                temperature=temperature,
+                **_timeout_kwargs()
+            )
+        except Exception as e:
+            _record_failure(time.perf_counter() - attempt_start)
+            delay = backoff_delay(attempt)
+            if _give_up(e, stage, model, start, attempt, delay):
+                failure = _failure(e)
+                if failure is e:
+                    raise
+                raise failure from e
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled or interrupted: no verdict on the provider, free a half-open probe
+            controller.release()
+            raise
+        controller.record(time.perf_counter() - attempt_start, ok=True)
+        return _finish(response, stage, model, start, attempt)
+
+
+async def call_llm_async(system_prompt: str, user_prompt: str, temperature: float, stage: str = "unknown", model: str | None = None):
+    """
+    Async variant of call_llm: awaits the Mistral HTTP call on the event loop
+    instead of holding a worker thread. Same accounting, retry policy and breaker.
     """
-    try:
-        response = client.chat.complete(
-            model="mistral-small-latest",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=temperature
-        )
-        
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Error calling Mistral API: {e}")
-        raise
+    client = get_client()
+    model = model or DEFAULT_MODEL
+    _admit(stage, model)
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        attempt_start = time.perf_counter()
+        try:
+            response = await client.chat.complete_async(
+                model=model,
+                messages=_messages(system_prompt, user_prompt),
+                temperature=temperature,
+                **_timeout_kwargs()
+            )
+        except Exception as e:
+            _record_failure(time.perf_counter() - attempt_start)
+            delay = backoff_delay(attempt)
+            if _give_up(e, stage, model, start, attempt, delay):
+                failure = _failure(e)
+                if failure is e:
+                    raise
+                raise failure from e
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled or interrupted: no verdict on the provider, free a half-open probe
+            controller.release()
+            raise
+        controller.record(time.perf_counter() - attempt_start, ok=True)
+        return _finish(response, stage, model, start, attempt)
@@ -0,0 +1,109 @@
+# app/utils/llm_usage.py
+"""
+Per-call LLM accounting: latency, tokens, retries, split by caller stage and model.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+
+from app.utils import metrics
+
+# Daily token budget (prompt + completion), 0 disables the limit
+DAILY_TOKEN_BUDGET = int(os.environ.get("LLM_DAILY_TOKEN_BUDGET", "0"))
+# How many days the rolling budget view keeps
+BUDGET_WINDOW_DAYS = 7
+
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+llm_latency = metrics.histogram("llm_call_seconds", "Wall time of LLM calls, including retries")
+llm_prompt_tokens = metrics.histogram("llm_prompt_tokens", "Prompt tokens per LLM call", TOKEN_BUCKETS)
+llm_completion_tokens = metrics.histogram("llm_completion_tokens", "Completion tokens per LLM call", TOKEN_BUCKETS)
+llm_calls = metrics.counter("llm_calls_total", "LLM calls by outcome")
+llm_retries = metrics.counter("llm_retries_total", "Retried LLM attempts")
+llm_tokens = metrics.counter("llm_tokens_total", "LLM tokens by kind")
+
+_days: "OrderedDict[date, dict]" = OrderedDict()
+_days_lock = threading.Lock()
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def record_call(
+    stage: str,
+    model: str,
+    seconds: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    retries: int = 0,
+    ok: bool = True,
+):
+    """Record one logical call_llm invocation (all attempts included)."""
+    outcome = "ok" if ok else "error"
+    llm_latency.observe(seconds, stage=stage, model=model)
+    llm_calls.inc(stage=stage, model=model, outcome=outcome)
+    if retries:
+        llm_retries.inc(retries, stage=stage, model=model)
+    if ok:
+        llm_prompt_tokens.observe(prompt_tokens, stage=stage, model=model)
+        llm_completion_tokens.observe(completion_tokens, stage=stage, model=model)
+        llm_tokens.inc(prompt_tokens, stage=stage, model=model, kind="prompt")
+        llm_tokens.inc(completion_tokens, stage=stage, model=model, kind="completion")
+
+    today = _today()
+    with _days_lock:
+        day = _days.get(today)
+        if day is None:
+            day = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "by_stage": {}}
+            _days[today] = day
+            while len(_days) > BUDGET_WINDOW_DAYS:
+                _days.popitem(last=False)
+        day["calls"] += 1
+        day["prompt_tokens"] += prompt_tokens
+        day["completion_tokens"] += completion_tokens
+        per_stage = day["by_stage"].setdefault(stage, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        per_stage["calls"] += 1
+        per_stage["prompt_tokens"] += prompt_tokens
+        per_stage["completion_tokens"] += completion_tokens
+
+
+def tokens_used_today() -> int:
+    with _days_lock:
+        day = _days.get(_today())
+        if not day:
+            return 0
+        return day["prompt_tokens"] + day["completion_tokens"]
+
+
+def token_budget_view() -> dict:
+    """
+    Rolling per-day token usage, newest day first.
+    `remaining` is None when no daily budget is configured.
+    """
+    with _days_lock:
+        days = [
+            {
+                "date": d.isoformat(),
+                "calls": v["calls"],
+                "prompt_tokens": v["prompt_tokens"],
+                "completion_tokens": v["completion_tokens"],
+                "total_tokens": v["prompt_tokens"] + v["completion_tokens"],
+                "by_stage": {s: dict(u) for s, u in v["by_stage"].items()},
+            }
+            for d, v in reversed(_days.items())
+        ]
+    used = tokens_used_today()
+    return {
+        "daily_budget": DAILY_TOKEN_BUDGET or None,
+        "used_today": used,
+        "remaining_today": max(0, DAILY_TOKEN_BUDGET - used) if DAILY_TOKEN_BUDGET else None,
+        "days": days,
+    }
+
+
+def reset():
+    """Clear the rolling view (used by tests and benchmarks)."""
+    with _days_lock:
+        _days.clear()
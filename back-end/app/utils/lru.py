@@ -0,0 +1,49 @@
+# app/utils/lru.py
+"""
+Small thread-safe LRU cache that reports hits and misses to
+cache_requests_total{cache=<name>}.
+"""
+import threading
+from collections import OrderedDict
+
+from app.utils import metrics
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, name: str, maxsize: int = 1024):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        # Membership test only: not counted as a hit or a miss
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+        hit = value is not _MISSING
+        metrics.cache_requests.inc(cache=self.name, result="hit" if hit else "miss")
+        return value if hit else default
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
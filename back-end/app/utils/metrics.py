@@ -0,0 +1,219 @@
+# app/utils/metrics.py
+"""
+Minimal in-process metrics (counters, gauges and histograms) for the agent pipeline.
+
+Metrics are keyed by a sorted tuple of label pairs so they can be read back
+per stage / per model without an external client library.
+"""
+import threading
+from bisect import bisect_left
+from collections import deque
+
+# Latency buckets in seconds, tuned for LLM round trips
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+# Recent raw observations kept per label set (for quantiles)
+SAMPLE_WINDOW = 2048
+
+_registry: dict[str, "Counter | Gauge | Histogram"] = {}
+_registry_lock = threading.Lock()
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def items(self) -> list[tuple[tuple, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge:
+    """Value that can go up and down (queue depth, in-flight requests)."""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def items(self) -> list[tuple[tuple, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Bucketed histogram that also keeps a window of recent samples."""
+
+    def __init__(self, name: str, description: str = "", buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                    "samples": deque(maxlen=SAMPLE_WINDOW),
+                }
+                self._series[key] = series
+            series["counts"][bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["samples"].append(value)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_key(labels))
+        return series["count"] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(_key(labels))
+        return series["sum"] if series else 0.0
+
+    def quantile(self, q: float, **labels) -> float | None:
+        """Quantile over the recent sample window, None when empty."""
+        series = self._series.get(_key(labels))
+        if not series or not series["samples"]:
+            return None
+        ordered = sorted(series["samples"])
+        idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+        return ordered[idx]
+
+    def items(self) -> list[tuple[tuple, dict]]:
+        with self._lock:
+            return [
+                (key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]})
+                for key, s in self._series.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name: str, description: str = "") -> Counter:
+    return _register(Counter(name, description))
+
+
+def gauge(name: str, description: str = "") -> Gauge:
+    return _register(Gauge(name, description))
+
+
+def histogram(name: str, description: str = "", buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, description, buckets))
+
+
+def all_metrics() -> list:
+    with _registry_lock:
+        return list(_registry.values())
+
+
+# Shared by every cache in the pipeline: cache_requests_total{cache=..., result=hit|miss}
+cache_requests = counter("cache_requests_total", "Cache lookups by cache and result")
+
+
+def cache_hit_rates() -> dict:
+    """Hit rate per cache name, from cache_requests_total."""
+    totals: dict[str, dict] = {}
+    for key, value in cache_requests.items():
+        labels = dict(key)
+        entry = totals.setdefault(labels.get("cache", "unknown"), {"hit": 0.0, "miss": 0.0})
+        entry[labels.get("result", "miss")] = entry.get(labels.get("result", "miss"), 0.0) + value
+    return {
+        name: {
+            "hits": int(c["hit"]),
+            "misses": int(c["miss"]),
+            "hit_rate": round(c["hit"] / (c["hit"] + c["miss"]), 3) if (c["hit"] + c["miss"]) else 0.0,
+        }
+        for name, c in totals.items()
+    }
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in all_metrics():
+        if metric.description:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+        if isinstance(metric, (Counter, Gauge)):
+            kind = "counter" if isinstance(metric, Counter) else "gauge"
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for key, value in metric.items():
+                lines.append(f"{metric.name}{_format_labels(key)} {value}")
+        else:
+            lines.append(f"# TYPE {metric.name} histogram")
+            for key, series in metric.items():
+                cumulative = 0
+                for bound, count in zip(metric.buckets, series["counts"]):
+                    cumulative += count
+                    lines.append(f"{metric.name}_bucket{_format_labels(key, (('le', bound),))} {cumulative}")
+                lines.append(f"{metric.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series['count']}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {series['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,105 @@
+# app/utils/routing.py
+"""
+Per-request model routing for call_llm.
+
+Picks a model from the prompt size, the retrieval confidence and the latency
+target of the caller. Short prompts backed by a confident KB match go to the
+fast model; long prompts go to the larger model when the latency target
+allows it. Everything else, including calls whose confidence is unknown, stays
+on the default model.
+
+Weak retrieval (confidence below LLM_LARGE_MAX_CONFIDENCE) is also sent to the
+larger model, on the bet that it copes better with thin context. That is the
+most expensive route, so it can be switched off with
+LLM_LARGE_ON_LOW_CONFIDENCE=0.
+"""
+import os
+from typing import NamedTuple, Optional
+
+from app.utils import metrics
+
+FAST_MODEL = os.environ.get("LLM_FAST_MODEL", "ministral-8b-latest")
+DEFAULT_MODEL = os.environ.get("LLM_DEFAULT_MODEL", "mistral-small-latest")
+LARGE_MODEL = os.environ.get("LLM_LARGE_MODEL", "mistral-medium-latest")
+
+# Rough token estimate: ~4 characters per token for EN/FR text
+CHARS_PER_TOKEN = 4
+FAST_MAX_PROMPT_TOKENS = 1200
+FAST_MIN_CONFIDENCE = 0.8
+LARGE_MIN_PROMPT_TOKENS = 3000
+LARGE_MAX_CONFIDENCE = float(os.environ.get("LLM_LARGE_MAX_CONFIDENCE", "0.65"))
+LARGE_ON_LOW_CONFIDENCE = os.environ.get("LLM_LARGE_ON_LOW_CONFIDENCE", "1") == "1"
+# Below this target (seconds) only the fast model is fast enough
+TIGHT_LATENCY_TARGET = 3.0
+# The large model is only used when the caller can wait this long (seconds)
+LARGE_MIN_LATENCY_TARGET = 10.0
+DEFAULT_LATENCY_TARGET = 10.0
+
+route_latency = metrics.histogram("llm_route_seconds", "LLM latency per routing decision")
+route_calls = metrics.counter("llm_route_calls_total", "LLM calls per routing decision")
+route_escalations = metrics.counter("llm_route_escalations_total", "Responder escalations per routing decision")
+
+
+class Route(NamedTuple):
+    name: str
+    model: str
+    reason: str
+
+
+def estimate_tokens(*texts: str) -> int:
+    return sum(len(t or "") for t in texts) // CHARS_PER_TOKEN
+
+
+def choose_route(
+    system_prompt: str,
+    user_prompt: str,
+    confidence: Optional[float] = None,
+    latency_target: Optional[float] = None,
+) -> Route:
+    """
+    Parameters:
+    - system_prompt / user_prompt: the prompt that will be sent
+    - confidence: retrieval confidence in [0, 1] (None when unknown: no
+      confidence-based rule applies)
+    - latency_target: seconds the caller can afford for the LLM call
+    """
+    tokens = estimate_tokens(system_prompt, user_prompt)
+    target = DEFAULT_LATENCY_TARGET if latency_target is None else latency_target
+    known = confidence is not None
+
+    if target < TIGHT_LATENCY_TARGET:
+        return Route("fast", FAST_MODEL, "tight latency target")
+    if known and tokens <= FAST_MAX_PROMPT_TOKENS and confidence >= FAST_MIN_CONFIDENCE:
+        return Route("fast", FAST_MODEL, "short prompt, confident retrieval")
+    if target >= LARGE_MIN_LATENCY_TARGET:
+        if tokens >= LARGE_MIN_PROMPT_TOKENS:
+            return Route("large", LARGE_MODEL, "long prompt")
+        if LARGE_ON_LOW_CONFIDENCE and known and confidence < LARGE_MAX_CONFIDENCE:
+            return Route("large", LARGE_MODEL, "weak retrieval")
+    return Route("default", DEFAULT_MODEL, "default")
+
+
+def record_route_outcome(route: Route, seconds: float, escalated: bool):
+    """Record latency and whether the answer on this route ended up escalated."""
+    route_latency.observe(seconds, route=route.name, model=route.model)
+    route_calls.inc(route=route.name, model=route.model)
+    if escalated:
+        route_escalations.inc(route=route.name, model=route.model)
+
+
+def route_stats() -> dict:
+    """
+    Call count, escalation rate and latency quantiles per route and model
+    ({route: {model: stats}}), so a model swap on a route stays visible.
+    """
+    stats = {}
+    for key, calls in route_calls.items():
+        labels = dict(key)
+        escalations = route_escalations.value(**labels)
+        stats.setdefault(labels["route"], {})[labels["model"]] = {
+            "calls": int(calls),
+            "escalation_rate": round(escalations / calls, 3) if calls else 0.0,
+            "p50_seconds": route_latency.quantile(0.5, **labels),
+            "p95_seconds": route_latency.quantile(0.95, **labels),
+        }
+    return stats
@@ -0,0 +1,94 @@
+# app/utils/singleflight.py
+"""
+Single-flight: concurrent calls with the same key share one computation.
+"""
+import asyncio
+import threading
+
+from app.utils import metrics
+
+singleflight_calls = metrics.counter("singleflight_calls_total", "Single-flight calls by role (leader/follower)")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    The first caller for a key (the leader) runs `fn`; callers arriving while it
+    is in flight block and receive the same result or exception.
+    Nothing is cached once the leader finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn):
+        """Return (result, shared) where shared is True for followers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        metrics.cache_requests.inc(cache="singleflight", result="miss" if leader else "hit")
+        if not leader:
+            singleflight_calls.inc(group=self.name, role="follower")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        singleflight_calls.inc(group=self.name, role="leader")
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    asyncio flavour of SingleFlight. The computation runs as its own task, so
+    a caller being cancelled (e.g. client gone) does not cancel it for others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, coro_fn):
+        """Return (result, shared) where shared is True for followers."""
+        task = self._tasks.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        singleflight_calls.inc(group=self.name, role="follower" if shared else "leader")
+        metrics.cache_requests.inc(cache="singleflight", result="hit" if shared else "miss")
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
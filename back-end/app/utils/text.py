@@ -0,0 +1,139 @@
+# app/utils/text.py
+"""
+Shared text helpers for the agent pipeline.
+"""
+import re
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache / dedup keys:
+    Unicode NFKC, casefolded, whitespace collapsed and stripped.
+    """
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text.casefold()).strip()
+
+
+# ---------------------------------------------------------------------------
+# Keyword extraction (analyzer fallback)
+# ---------------------------------------------------------------------------
+
+_WORD = re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ']+")
+_SENTIMENT_TOKEN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+STOPWORDS_EN = frozenset({
+    "the", "a", "an", "and", "or", "for", "to", "of", "in", "on", "with", "without",
+    "my", "your", "i", "you", "he", "she", "we", "they", "is", "are", "be", "been",
+})
+STOPWORDS_FR = frozenset({
+    "le", "la", "les", "un", "une", "des", "de", "du", "dans", "et", "ou", "pour", "sur",
+    "avec", "sans", "mon", "ma", "mes", "votre", "vos", "je", "tu", "il", "elle", "nous",
+    "vous", "ils", "elles", "ne", "pas", "au", "aux", "ce", "cet", "cette", "ces", "est",
+    "été", "être",
+})
+STOPWORDS = STOPWORDS_EN | STOPWORDS_FR
+
+
+def collapse_whitespace(text: str) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+def extract_keywords(text: str, limit: int = 8, min_length: int = 3) -> list[str]:
+    """First `limit` distinct non-stopword tokens of text, lowercased, in order."""
+    keywords = []
+    seen = set()
+    for token in _WORD.findall(text.lower()):
+        if token in STOPWORDS or len(token) < min_length or token in seen:
+            continue
+        seen.add(token)
+        keywords.append(token)
+        if len(keywords) >= limit:
+            break
+    return keywords
+
+
+# ---------------------------------------------------------------------------
+# Language
+# ---------------------------------------------------------------------------
+
+_ARABIC = re.compile(r"[\u0600-\u06FF]")
+_FRENCH_MARKS = re.compile(r"[àâçéèêëîïôûùüÿœ]")
+
+
+def detect_language(text: str) -> str:
+    """
+    "ar", "fr" or "en" for the languages the support desk handles:
+    Arabic script first, then French vs English stopword / accent counts.
+    """
+    text = text or ""
+    if len(_ARABIC.findall(text)) * 3 >= len(text.replace(" ", "")) > 0:
+        return "ar"
+    tokens = _WORD.findall(text.lower())
+    fr = sum(t in STOPWORDS_FR for t in tokens) + len(_FRENCH_MARKS.findall(text.lower()))
+    en = sum(t in STOPWORDS_EN for t in tokens)
+    return "fr" if fr > en else "en"
+
+
+# ---------------------------------------------------------------------------
+# Polarity (evaluator)
+# ---------------------------------------------------------------------------
+
+# Support-ticket oriented lexicon, scores in [-1, 1] on the same scale as
+# TextBlob so NEGATIVE_EMOTION_THRESHOLD keeps its meaning.
+POLARITY_LEXICON = {
+    # EN
+    "good": 0.7, "great": 0.8, "excellent": 1.0, "perfect": 1.0, "thanks": 0.2, "thank": 0.2,
+    "happy": 0.8, "love": 0.5, "nice": 0.6, "helpful": 0.5, "easy": 0.4, "works": 0.2,
+    "bad": -0.7, "terrible": -1.0, "awful": -1.0, "horrible": -1.0, "worst": -1.0, "useless": -0.5,
+    "angry": -0.5, "furious": -0.9, "frustrated": -0.7, "frustrating": -0.7, "annoying": -0.8,
+    "unacceptable": -0.8, "disappointed": -0.75, "disappointing": -0.6, "ridiculous": -0.33,
+    "broken": -0.4, "slow": -0.3, "stupid": -0.8, "hate": -0.8, "scam": -0.8, "wrong": -0.5,
+    "lost": -0.3, "impossible": -0.67, "poor": -0.4, "fail": -0.5, "failed": -0.5,
+    # FR
+    "bien": 0.5, "bon": 0.7, "bonne": 0.7, "parfait": 1.0, "merci": 0.2,
+    "content": 0.6, "contente": 0.6, "satisfait": 0.6, "super": 0.7, "génial": 0.8, "facile": 0.4,
+    "mauvais": -0.7, "mauvaise": -0.7, "nul": -0.8, "nulle": -0.8, "catastrophe": -0.9,
+    "inacceptable": -0.8, "inadmissible": -0.8, "déçu": -0.75, "déçue": -0.75, "décevant": -0.6,
+    "énervé": -0.7, "énervée": -0.7, "furieux": -0.9, "furieuse": -0.9, "frustré": -0.7, "frustrée": -0.7,
+    "lent": -0.3, "lente": -0.3, "cassé": -0.4, "arnaque": -0.8, "honteux": -0.8, "marre": -0.7,
+    "ridicule": -0.33, "perdu": -0.3,
+}
+NEGATIONS = frozenset({"not", "no", "don't", "doesn't", "isn't", "can't", "won't", "never", "pas", "jamais", "aucun", "aucune"})
+INTENSIFIERS = {"very": 1.3, "really": 1.3, "extremely": 1.5, "so": 1.2, "très": 1.3, "vraiment": 1.3, "trop": 1.2}
+# TextBlob flips negated words by -0.5 rather than -1
+NEGATION_FACTOR = -0.5
+
+
+def polarity(text: str) -> float:
+    """
+    Lexicon polarity of text in [-1, 1]: mean score of the sentiment words,
+    a negation just before a word scales it by NEGATION_FACTOR and an
+    intensifier multiplies it. 0.0 when no sentiment word is found.
+    """
+    scores = []
+    negate = False
+    boost = 1.0
+    for token in _SENTIMENT_TOKEN.findall(text.casefold()):
+        if token in NEGATIONS:
+            negate = True
+            continue
+        if token in INTENSIFIERS:
+            boost *= INTENSIFIERS[token]
+            continue
+        score = POLARITY_LEXICON.get(token)
+        if score is not None:
+            score *= boost
+            if negate:
+                score *= NEGATION_FACTOR
+            scores.append(max(-1.0, min(1.0, score)))
+        negate = False
+        boost = 1.0
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def polarity_batch(texts: list[str]) -> list[float]:
+    """polarity() for several texts (e.g. one ticket batch) in one call."""
+    return [polarity(t) for t in texts]
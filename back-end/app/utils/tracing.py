@@ -0,0 +1,90 @@
+# app/utils/tracing.py
+"""
+Per-stage tracing for the ticket pipeline.
+
+Every stage is timed into the `pipeline_stage_seconds` histogram (served on
+/metrics). When OpenTelemetry is installed, each stage is also an OTel span
+tagged with the ticket id; spans are exported over OTLP when
+OTEL_EXPORTER_OTLP_ENDPOINT is set (e.g. http://localhost:4317 for a local
+collector).
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from app.utils import metrics
+
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "ticket-pipeline")
+
+stage_seconds = metrics.histogram("pipeline_stage_seconds", "Duration of each ticket pipeline stage")
+stage_errors = metrics.counter("pipeline_stage_errors_total", "Ticket pipeline stages that raised")
+
+_tracer = None
+
+
+def configure_tracing() -> bool:
+    """
+    Install an OTLP exporter when OTEL_EXPORTER_OTLP_ENDPOINT is set and the
+    OpenTelemetry SDK is available. Returns True when traces are exported.
+    """
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if not endpoint:
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        print(f"Tracing disabled, OpenTelemetry SDK/exporter not installed: {e}")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    trace.set_tracer_provider(provider)
+    print(f"Exporting pipeline traces to {endpoint}")
+    return True
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        try:
+            from opentelemetry import trace
+            _tracer = trace.get_tracer("app.agents")
+        except ImportError:
+            _tracer = False
+    return _tracer or None
+
+
+@contextmanager
+def stage_span(stage: str, ticket_id: str | None = None):
+    """
+    Time one pipeline stage. Usable around sync and awaited code alike:
+
+        with stage_span("rag_answer", ticket.ticket_id):
+            rag_result = await run_inference(rag_answer, summary)
+    """
+    tracer = _get_tracer()
+    start = time.perf_counter()
+    if tracer is None:
+        try:
+            yield
+        except BaseException:
+            stage_errors.inc(stage=stage)
+            raise
+        finally:
+            stage_seconds.observe(time.perf_counter() - start, stage=stage)
+        return
+
+    with tracer.start_as_current_span(stage) as span:
+        if ticket_id is not None:
+            span.set_attribute("ticket.id", ticket_id)
+        try:
+            yield
+        except BaseException:
+            stage_errors.inc(stage=stage)
+            raise
+        finally:
+            stage_seconds.observe(time.perf_counter() - start, stage=stage)
@@ -0,0 +1,3 @@
+from .jobs import TicketJobPool, JobQueueFull, get_job_pool
+
+__all__ = ["TicketJobPool", "JobQueueFull", "get_job_pool"]
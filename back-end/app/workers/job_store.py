@@ -0,0 +1,190 @@
+# app/workers/job_store.py
+"""
+Storage for ticket jobs: in memory by default, SQLite when JOB_STORE_PATH is set
+so queued jobs survive a restart.
+
+A job runs in the pool that claims it. claim() moves it from queued to running
+and records the owner and claim time in one atomic step, so pools sharing a
+SQLite file (one per uvicorn worker) never run the same job twice. A running
+job whose claim is older than the lease (its owner died) can be claimed again;
+owners renew the claim while the job runs. The in-memory store lives in one
+process: it only works with a single uvicorn worker.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from app.schemas import TicketJob
+
+# In-memory store keeps at most this many jobs (oldest finished ones go first)
+MAX_MEMORY_JOBS = 10000
+
+FINISHED = ("done", "failed")
+# Seconds a SQLite write waits for another process holding the file
+JOB_STORE_BUSY_TIMEOUT = 10.0
+
+
+class MemoryJobStore:
+    def __init__(self, max_jobs: int = MAX_MEMORY_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs: dict[str, TicketJob] = {}
+        self._claims: dict[str, tuple[str, float]] = {}  # job_id -> (owner, claimed_at)
+        # Finished job ids in finishing order, so eviction and sweeps start from the oldest
+        self._finished: "OrderedDict[str, datetime]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, job: TicketJob):
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if job.status in FINISHED:
+                self._finished[job.job_id] = job.finished_at or job.created_at
+            while len(self._jobs) > self.max_jobs and self._finished:
+                job_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(job_id, None)
+
+    def get(self, job_id: str) -> Optional[TicketJob]:
+        return self._jobs.get(job_id)
+
+    def pending(self, stale_before: float) -> list[TicketJob]:
+        # Nothing outlives the process, and this process queues its own jobs
+        return []
+
+    def claim(self, job_id: str, owner: str, stale_before: float) -> Optional[TicketJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not _claimable(job.status, self._claims.get(job_id, (None, None))[1], stale_before):
+                return None
+            job = job.model_copy(update={"status": "running"})
+            self._jobs[job_id] = job
+            self._claims[job_id] = (owner, time.time())
+            return job
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        with self._lock:
+            if self._claims.get(job_id, (None,))[0] != owner:
+                return False
+            self._claims[job_id] = (owner, time.time())
+            return True
+
+    def finish(self, job: TicketJob, owner: str) -> bool:
+        with self._lock:
+            if self._claims.get(job.job_id, (None,))[0] != owner:
+                return False
+            self._claims.pop(job.job_id)
+        self.save(job)
+        return True
+
+    def sweep(self, before: datetime) -> int:
+        """Drop jobs that finished before `before`; returns how many were dropped."""
+        removed = 0
+        with self._lock:
+            while self._finished:
+                job_id, finished_at = next(iter(self._finished.items()))
+                if finished_at >= before:
+                    break
+                self._finished.popitem(last=False)
+                self._jobs.pop(job_id, None)
+                removed += 1
+        return removed
+
+
+def _claimable(status: str, claimed_at: Optional[float], stale_before: float) -> bool:
+    return status == "queued" or (status == "running" and (claimed_at is None or claimed_at < stale_before))
+
+
+class SQLiteJobStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Several processes may share the file: wait for their writes instead of failing
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=JOB_STORE_BUSY_TIMEOUT)
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS ticket_jobs(
+            job_id TEXT PRIMARY KEY,
+            status TEXT,
+            payload TEXT,
+            created_at TEXT,
+            finished_at TEXT
+        )
+        """)
+        # Stores created before finished jobs were swept, or jobs were claimed
+        for column in ("finished_at TEXT", "owner TEXT", "claimed_at REAL"):
+            try:
+                self._conn.execute(f"ALTER TABLE ticket_jobs ADD COLUMN {column}")
+            except sqlite3.OperationalError:
+                pass
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ticket_jobs_finished_at ON ticket_jobs(finished_at)")
+        self._conn.commit()
+
+    def save(self, job: TicketJob):
+        finished_at = job.finished_at.isoformat() if job.finished_at else None
+        with self._lock:
+            self._conn.execute(
+                "REPLACE INTO ticket_jobs(job_id, status, payload, created_at, finished_at) VALUES (?, ?, ?, ?, ?)",
+                (job.job_id, job.status, job.model_dump_json(), job.created_at.isoformat(), finished_at)
+            )
+            self._conn.commit()
+
+    def sweep(self, before: datetime) -> int:
+        """Delete jobs that finished before `before`; returns how many were deleted."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM ticket_jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (before.isoformat(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[TicketJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM ticket_jobs WHERE job_id=?", (job_id,)).fetchone()
+        return TicketJob.model_validate_json(row[0]) if row else None
+
+    def pending(self, stale_before: float) -> list[TicketJob]:
+        """
+        Jobs a pool may claim: queued ones, and running ones whose claim is
+        older than stale_before (a Unix time), i.e. whose owner stopped.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM ticket_jobs WHERE status='queued' "
+                "OR (status='running' AND (claimed_at IS NULL OR claimed_at < ?)) ORDER BY created_at",
+                (stale_before,)
+            ).fetchall()
+        return [TicketJob.model_validate_json(r[0]) for r in rows]
+
+    def claim(self, job_id: str, owner: str, stale_before: float) -> Optional[TicketJob]:
+        """Atomically mark a claimable job running for owner; None when another pool has it."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ticket_jobs SET status='running', owner=?, claimed_at=?, "
+                "payload=json_set(payload, '$.status', 'running') "
+                "WHERE job_id=? AND (status='queued' "
+                "OR (status='running' AND (claimed_at IS NULL OR claimed_at < ?)))",
+                (owner, time.time(), job_id, stale_before)
+            )
+            self._conn.commit()
+        return self.get(job_id) if cursor.rowcount else None
+
+    def renew(self, job_id: str, owner: str) -> bool:
+        """Extend owner's claim on a running job; False when it was reclaimed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ticket_jobs SET claimed_at=? WHERE job_id=? AND owner=? AND status='running'",
+                (time.time(), job_id, owner)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def finish(self, job: TicketJob, owner: str) -> bool:
+        """Store the outcome of a job still claimed by owner; False when it was reclaimed."""
+        finished_at = job.finished_at.isoformat() if job.finished_at else None
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ticket_jobs SET status=?, payload=?, finished_at=? WHERE job_id=? AND owner=? AND status='running'",
+                (job.status, job.model_dump_json(), finished_at, job.job_id, owner)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
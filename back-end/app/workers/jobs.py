@@ -0,0 +1,265 @@
+# app/workers/jobs.py
+"""
+Job mode for the ticket pipeline.
+
+POST /ticket/jobs enqueues a ticket and returns 202 right away; a bounded pool
+of in-process workers runs process_ticket_async and stores the outcome, which
+clients poll on GET /ticket/jobs/{job_id} or receive on their callback_url.
+
+Each uvicorn worker runs its own pool. With more than one, JOB_STORE_PATH must
+point at a SQLite file they share: pools claim jobs in the store before
+running them (app.workers.job_store), so each job runs once, and any worker
+can answer GET /ticket/jobs/{job_id}.
+"""
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import urlsplit
+
+from app.schemas import TicketInput, TicketJob, TicketJobInput
+from app.utils import metrics
+from app.workers.job_store import MemoryJobStore, SQLiteJobStore
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "200"))
+# SQLite file for durable jobs; in-memory when unset
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH")
+CALLBACK_TIMEOUT = 10.0
+# Retry-After (seconds) suggested when the queue is full
+QUEUE_FULL_RETRY_AFTER = 5
+# Finished jobs are kept this long (seconds), swept every JOB_SWEEP_INTERVAL
+JOB_TTL_SECONDS = float(os.environ.get("JOB_TTL_SECONDS", "86400"))
+JOB_SWEEP_INTERVAL = float(os.environ.get("JOB_SWEEP_INTERVAL", "300"))
+# A running job whose owner has not renewed its claim for this long (seconds)
+# is taken over by another pool; owners renew every JOB_LEASE_SECONDS / 3
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "120"))
+# Callbacks only go to these hosts when set (comma-separated); otherwise to any
+# host whose addresses are all public
+CALLBACK_ALLOWED_HOSTS = {h.strip().lower() for h in os.environ.get("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if h.strip()}
+CALLBACK_SCHEMES = ("https", "http")
+
+jobs_total = metrics.counter("ticket_jobs_total", "Ticket jobs by final status")
+job_wait_seconds = metrics.histogram("ticket_job_wait_seconds", "Time ticket jobs spend queued before a worker picks them up")
+job_run_seconds = metrics.histogram("ticket_job_run_seconds", "Time spent processing a ticket job")
+
+
+class JobQueueFull(Exception):
+    def __init__(self, retry_after: int = QUEUE_FULL_RETRY_AFTER):
+        super().__init__("Ticket job queue is full")
+        self.retry_after = retry_after
+
+
+class InvalidCallbackUrl(ValueError):
+    """callback_url is not a public http(s) URL (or not on the allowlist)."""
+
+
+def check_callback_url(url: str) -> str:
+    """
+    Checks that need no DNS: scheme, host present, allowlist, and literal IP
+    addresses that are not public. Returns the host.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in CALLBACK_SCHEMES or not host:
+        raise InvalidCallbackUrl("callback_url must be an http(s) URL")
+    if CALLBACK_ALLOWED_HOSTS and host not in CALLBACK_ALLOWED_HOSTS:
+        raise InvalidCallbackUrl("callback_url host is not allowed")
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if not address.is_global:
+        raise InvalidCallbackUrl("callback_url must not point to a private or local address")
+    return host
+
+
+async def resolve_callback_url(url: str):
+    """
+    Full check before a callback is sent: every address the host resolves to
+    must be public (private, loopback, link-local such as cloud metadata, ...
+    are refused), so a public name cannot point at an internal service.
+    Allowlisted hosts are trusted as configured.
+    """
+    host = check_callback_url(url)
+    if CALLBACK_ALLOWED_HOSTS:
+        return
+    port = urlsplit(url).port or (443 if url.startswith("https") else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise InvalidCallbackUrl(f"callback_url host does not resolve: {e}")
+    for info in infos:
+        if not ipaddress.ip_address(info[4][0].split("%")[0]).is_global:
+            raise InvalidCallbackUrl("callback_url resolves to a private or local address")
+
+
+class TicketJobPool:
+    """
+    Parameters:
+    - store: MemoryJobStore or SQLiteJobStore
+    - workers: number of concurrent pipeline runs
+    - max_queue: queued (not yet running) jobs accepted before rejecting
+    - process: async callable(TicketInput) -> FinalResponse
+    - lease: seconds after which a running job with no renewed claim is reclaimed
+    """
+
+    def __init__(self, store, workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_SIZE, process=None,
+                 lease: float = JOB_LEASE_SECONDS):
+        self.store = store
+        self.workers = workers
+        self.max_queue = max_queue
+        self.lease = lease
+        # Identifies this pool's claims in a store shared with other processes
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._process = process
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: set[str] = set()  # job ids on _queue, so reclaim() does not queue them twice
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        if self._process is None:
+            from app.agents.orchestrator import process_ticket_async
+            self._process = process_ticket_async
+        self._queue = asyncio.Queue()
+        # Jobs left queued, or running by a process that stopped (durable store only)
+        self.reclaim()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, job_input: TicketJobInput) -> TicketJob:
+        if self._queue is None:
+            raise RuntimeError("Job pool not started")
+        if job_input.callback_url:
+            check_callback_url(job_input.callback_url)
+        if self._queue.qsize() >= self.max_queue:
+            jobs_total.inc(status="rejected")
+            raise JobQueueFull()
+        job = TicketJob(
+            job_id=uuid.uuid4().hex,
+            status="queued",
+            ticket=TicketInput(ticket_id=job_input.ticket_id, content=job_input.content),
+            callback_url=job_input.callback_url,
+            created_at=datetime.utcnow(),
+        )
+        self.store.save(job)
+        self._enqueue(job.job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[TicketJob]:
+        return self.store.get(job_id)
+
+    def reclaim(self) -> int:
+        """
+        Queue the jobs this pool may claim from the store. Other pools may
+        queue the same ones; the claim in _run lets only one of them run each.
+        """
+        jobs = [j for j in self.store.pending(self._stale_before()) if j.job_id not in self._queued]
+        for job in jobs:
+            self._enqueue(job.job_id)
+        return len(jobs)
+
+    def _enqueue(self, job_id: str):
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    def _stale_before(self) -> float:
+        return time.time() - self.lease
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(min(JOB_SWEEP_INTERVAL, self.lease))
+            try:
+                self.sweep()
+                self.reclaim()
+            except Exception as e:
+                print(f"Job sweep failed: {e}")
+
+    def sweep(self) -> int:
+        """Drop finished jobs older than JOB_TTL_SECONDS from the store."""
+        removed = self.store.sweep(datetime.utcnow() - timedelta(seconds=JOB_TTL_SECONDS))
+        if removed:
+            print(f"Swept {removed} finished ticket jobs")
+        return removed
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"Job worker {index} failed on {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self.store.claim(job_id, self.owner, self._stale_before())
+        if job is None:
+            # Finished, swept, or claimed by another pool
+            return
+        started = datetime.utcnow()
+        job_wait_seconds.observe((started - job.created_at).total_seconds())
+
+        renewer = asyncio.create_task(self._renew(job_id))
+        try:
+            result = await self._process(job.ticket)
+            job = job.model_copy(update={"status": "done", "result": result, "finished_at": datetime.utcnow()})
+        except Exception as e:
+            job = job.model_copy(update={"status": "failed", "error": str(e), "finished_at": datetime.utcnow()})
+        finally:
+            renewer.cancel()
+        if not self.store.finish(job, self.owner):
+            # The lease ran out and another pool took the job over; its outcome wins
+            print(f"Job {job_id} was reclaimed by another worker, dropping this result")
+            return
+        jobs_total.inc(status=job.status)
+        job_run_seconds.observe((job.finished_at - started).total_seconds())
+
+        if job.callback_url:
+            await self._notify(job)
+
+    async def _renew(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                if not self.store.renew(job_id, self.owner):
+                    return
+            except Exception as e:
+                print(f"Renewing the claim on job {job_id} failed: {e}")
+
+    async def _notify(self, job: TicketJob):
+        import httpx
+        try:
+            # Checked again at send time: DNS may have changed since submit
+            await resolve_callback_url(job.callback_url)
+            async with httpx.AsyncClient(timeout=CALLBACK_TIMEOUT, follow_redirects=False) as client:
+                await client.post(job.callback_url, content=job.model_dump_json(), headers={"Content-Type": "application/json"})
+        except Exception as e:
+            print(f"Callback for job {job.job_id} to {job.callback_url} failed: {e}")
+
+
+_pool: Optional[TicketJobPool] = None
+
+
+def get_job_pool() -> TicketJobPool:
+    global _pool
+    if _pool is None:
+        store = SQLiteJobStore(JOB_STORE_PATH) if JOB_STORE_PATH else MemoryJobStore()
+        _pool = TicketJobPool(store)
+    return _pool
@@ -0,0 +1,171 @@
+# app/workers/ticket_worker.py
+"""
+Background AI worker: drains tickets created through POST /api/tickets
+(stored with processed=False) through the agent pipeline and writes the
+outcome back to the database.
+
+Several worker processes can run side by side. A batch is claimed in a short
+transaction: SELECT ... FOR UPDATE SKIP LOCKED picks free rows, their
+ai_claimed_at lease is set, and the transaction commits before the pipeline
+runs, so no row lock is held during the LLM calls. Other workers skip tickets
+with a live lease; a lease older than CLAIM_LEASE_SECONDS (crashed worker) is
+claimable again.
+
+Every claim counts as an attempt. A ticket whose processing fails keeps a
+lease that runs out after an exponential backoff (AI_RETRY_BACKOFF_SECONDS,
+doubled per attempt), so it does not head every batch. After AI_MAX_ATTEMPTS
+attempts it is escalated to a human agent and leaves the queue.
+
+Escalated tickets are flagged for a human agent and keep an empty response.
+
+Usage:
+    python -m app.workers.ticket_worker --batch-size 16 --poll-interval 5
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.tickets import Ticket
+from app.models.users import User  # noqa: F401  (registers the Ticket.client / Ticket.agent mappers)
+from app.schemas import TicketInput
+from app.utils import metrics
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_POLL_INTERVAL = 5.0
+# A claimed ticket not written back within this many seconds is claimed again
+CLAIM_LEASE_SECONDS = float(os.environ.get("AI_CLAIM_LEASE_SECONDS", "600"))
+# Failed tickets are retried after AI_RETRY_BACKOFF_SECONDS * 2^(attempts - 1),
+# and escalated once AI_MAX_ATTEMPTS attempts have failed
+AI_MAX_ATTEMPTS = int(os.environ.get("AI_MAX_ATTEMPTS", "3"))
+AI_RETRY_BACKOFF_SECONDS = float(os.environ.get("AI_RETRY_BACKOFF_SECONDS", "60"))
+
+worker_tickets = metrics.counter("ticket_worker_tickets_total", "Tickets handled by the background AI worker by outcome")
+
+
+def claim_unprocessed(db: Session, batch_size: int) -> list[TicketInput]:
+    """
+    Lease up to batch_size tickets still waiting for the AI, oldest first, and
+    commit. Tickets locked or leased by another worker, or backing off after a
+    failure, are skipped, not waited on. Each claim counts as an attempt.
+    Returns the claimed tickets as pipeline inputs, keyed by Ticket.id.
+    """
+    now = datetime.utcnow()
+    tickets = (
+        db.query(Ticket)
+        .filter(Ticket.processed == False, Ticket.escalated == False, Ticket.response.is_(None))
+        .filter(or_(Ticket.ai_claimed_at.is_(None), Ticket.ai_claimed_at < now - timedelta(seconds=CLAIM_LEASE_SECONDS)))
+        .filter(func.coalesce(Ticket.ai_attempts, 0) < AI_MAX_ATTEMPTS)
+        .order_by(Ticket.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = [(t.id, ticket_to_input(t)) for t in tickets]
+    if claimed:
+        db.execute(update(Ticket), [
+            {"id": t.id, "ai_claimed_at": now, "ai_attempts": (t.ai_attempts or 0) + 1} for t in tickets
+        ])
+    db.commit()
+    return claimed
+
+
+def retry_lease(now: datetime, attempts: int) -> datetime:
+    """
+    ai_claimed_at that makes a failed ticket claimable again after its backoff:
+    the lease is CLAIM_LEASE_SECONDS long, so it is set that far minus the
+    backoff in the past.
+    """
+    backoff = AI_RETRY_BACKOFF_SECONDS * 2 ** max(0, attempts - 1)
+    return now + timedelta(seconds=backoff - CLAIM_LEASE_SECONDS)
+
+
+def ticket_to_input(ticket: Ticket) -> TicketInput:
+    return TicketInput(
+        ticket_id=ticket.reference or str(ticket.id),
+        content=f"{ticket.title}\n\n{ticket.description}",
+    )
+
+
+def process_batch(db: Session, batch_size: int = DEFAULT_BATCH_SIZE, process_batch_async=None) -> int:
+    """
+    Claim one batch, run it through the pipeline and write every result back in
+    a single bulk UPDATE. Returns the number of tickets claimed.
+    Tickets whose processing failed are retried after a backoff, and escalated
+    once they have failed AI_MAX_ATTEMPTS times.
+    """
+    if process_batch_async is None:
+        from app.agents.orchestrator import process_tickets_batch_async
+        process_batch_async = process_tickets_batch_async
+
+    claimed = claim_unprocessed(db, batch_size)
+    if not claimed:
+        return 0
+
+    # No transaction is open while the pipeline runs
+    results = asyncio.run(process_batch_async([ticket for _, ticket in claimed]))
+
+    now = datetime.utcnow()
+    attempts = dict(db.query(Ticket.id, Ticket.ai_attempts).filter(Ticket.id.in_([i for i, _ in claimed])).all())
+    rows = []
+    for (ticket_id, _), result in zip(claimed, results):
+        if isinstance(result, Exception):
+            tries = attempts.get(ticket_id) or 1
+            print(f"AI processing failed for ticket {ticket_id} (attempt {tries}/{AI_MAX_ATTEMPTS}): {result}")
+            if tries >= AI_MAX_ATTEMPTS:
+                # Out of attempts: hand the ticket to a human agent
+                worker_tickets.inc(outcome="gave_up")
+                rows.append({"id": ticket_id, "escalated": True, "escalated_at": now, "ai_claimed_at": None})
+            else:
+                worker_tickets.inc(outcome="error")
+                rows.append({"id": ticket_id, "ai_claimed_at": retry_lease(now, tries)})
+        elif result.escalated:
+            worker_tickets.inc(outcome="escalated")
+            rows.append({"id": ticket_id, "escalated": True, "escalated_at": now, "ai_claimed_at": None})
+        else:
+            worker_tickets.inc(outcome="answered")
+            rows.append({
+                "id": ticket_id,
+                "response": result.response,
+                "processed": True,
+                "responded_at": now,
+                "ai_claimed_at": None,
+            })
+
+    db.execute(update(Ticket), rows)
+    db.commit()
+    return len(claimed)
+
+
+def run_worker(batch_size: int = DEFAULT_BATCH_SIZE, poll_interval: float = DEFAULT_POLL_INTERVAL, once: bool = False):
+    print(f"Ticket AI worker started (batch_size={batch_size}, poll_interval={poll_interval}s)")
+    while True:
+        db = SessionLocal()
+        try:
+            claimed = process_batch(db, batch_size)
+        except Exception as e:
+            db.rollback()
+            print(f"Ticket AI worker batch failed: {e}")
+            claimed = 0
+        finally:
+            db.close()
+
+        if once:
+            return
+        # Keep draining while there is a backlog, sleep only when idle
+        if claimed < batch_size:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the agent pipeline on unprocessed tickets")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="process a single batch and exit")
+    args = parser.parse_args()
+    run_worker(args.batch_size, args.poll_interval, args.once)
@@ -0,0 +1,138 @@
+# bench/embed_batch_bench.py
+"""
+Ticket throughput and retrieval latency through process_ticket_async, with
+query embeddings computed one forward pass per ticket (EMBED_MICRO_BATCH=0)
+versus micro-batched across concurrent tickets (EMBED_MICRO_BATCH=1), at
+several concurrency levels.
+
+The LLM is the stub of bench.pipeline_bench (--llm-latency). By default the
+encoder is a stub whose cost follows a fixed per-call overhead plus a
+per-item cost (--overhead-ms, --per-item-ms), which is the shape of a MiniLM
+forward pass on CPU, and the FAISS search returns a fixed hit list. --model
+uses the real embedding model and vectorstore/ index instead. Every run
+starts with empty RAG and query embedding caches.
+
+Usage (from back-end/):
+    python -m bench.embed_batch_bench --concurrency 1,4,16,64
+    python -m bench.embed_batch_bench --max-items 16 --max-wait-ms 2 --workers 2
+    python -m bench.embed_batch_bench --model --concurrency 1,8,32
+"""
+import argparse
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from app.rag import vectorstore
+from app.utils import batching, executor
+from bench import pipeline_bench
+
+
+class StubEncoder:
+    """
+    Sleeps overhead + per_item * len(texts). Passes run one at a time, as on a
+    CPU where each forward pass already uses every core.
+    """
+
+    def __init__(self, overhead: float, per_item: float):
+        self.overhead = overhead
+        self.per_item = per_item
+        self._cpu = threading.Lock()
+
+    def __call__(self, texts: list[str]) -> list:
+        with self._cpu:
+            time.sleep(self.overhead + self.per_item * len(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def _stub_search(vectors, k=5):
+    """The STUB_KB documents in a fixed order, for every query vector."""
+    hits = []
+    for i, (source, category, text) in enumerate(pipeline_bench.STUB_KB[:k]):
+        doc = SimpleNamespace(page_content=text, metadata={"source": source, "chunk_id": i, "category": category})
+        hits.append((doc, 0.4 + 0.05 * i))
+    return [list(hits) for _ in range(len(vectors))]
+
+
+def _stub_model(encoder):
+    import numpy as np
+    vectorstore.embed_local = lambda texts: np.asarray(encoder(list(texts)), dtype="float32")
+    vectorstore.search_vectors = _stub_search
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def measure(tickets, concurrency: int, batched: bool) -> dict:
+    """Replay tickets through process_ticket_async with micro-batching on or off."""
+    vectorstore.EMBED_MICRO_BATCH = batched
+    vectorstore.query_embeddings.clear()
+    batching.batch_size.reset()
+    report = pipeline_bench.run(tickets, concurrency)
+    rag = report["stages_ms"].get("rag_answer", {})
+    batches = batching.batch_size.count(batcher="embedding")
+    return {
+        "throughput_per_second": report["throughput_per_second"],
+        "rag_p50_ms": rag.get("p50"),
+        "rag_p95_ms": rag.get("p95"),
+        "mean_batch": round(batching.batch_size.sum(batcher="embedding") / batches, 1) if batches else None,
+        "errors": report["errors"],
+    }
+
+
+def run(tickets, levels: list[int], max_items: int, max_wait: float, workers: int) -> list[dict]:
+    executor.INFERENCE_WORKERS = workers
+    executor.shutdown_inference_executor()
+    vectorstore._embed_batcher.max_items = vectorstore.EMBED_BATCH_MAX_ITEMS = max_items
+    vectorstore._embed_batcher.max_wait = max_wait
+    rows = []
+    for concurrency in levels:
+        rows.append({
+            "concurrency": concurrency,
+            "unbatched": measure(tickets, concurrency, batched=False),
+            "batched": measure(tickets, concurrency, batched=True),
+        })
+    executor.shutdown_inference_executor()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark process_ticket_async with and without embedding micro-batching")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated ticket concurrency levels")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the corpus this many times per run")
+    parser.add_argument("--max-items", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=executor.INFERENCE_WORKERS, help="INFERENCE_WORKERS")
+    parser.add_argument("--llm-latency", type=float, default=50.0, help="stub LLM latency in ms")
+    parser.add_argument("--overhead-ms", type=float, default=8.0, help="stub cost per forward pass")
+    parser.add_argument("--per-item-ms", type=float, default=0.5, help="stub cost per query")
+    parser.add_argument("--model", action="store_true", help="use the real embedding model and index")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    pipeline_bench.install_stubs(args.llm_latency / 1000, stub_retrieval=False, retrieval_latency=0.0)
+    if args.model:
+        vectorstore.get_db()
+    else:
+        _stub_model(StubEncoder(args.overhead_ms / 1000, args.per_item_ms / 1000))
+    corpus = pipeline_bench.load_corpus()
+    tickets = [t.model_copy(update={"ticket_id": f"{t.ticket_id}-{r}"}) for r in range(args.repeat) for t in corpus]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    rows = run(tickets, levels, args.max_items, args.max_wait_ms / 1000, args.workers)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"workers={args.workers} max_items={args.max_items} max_wait={args.max_wait_ms}ms tickets={len(tickets)}")
+    print(f"{'concurrency':>11} | {'unbatched t/s':>13} {'rag p50':>8} {'rag p95':>8} | "
+          f"{'batched t/s':>11} {'rag p50':>8} {'rag p95':>8} {'batch':>6}")
+    for row in rows:
+        u, b = row["unbatched"], row["batched"]
+        print(f"{row['concurrency']:>11} | {u['throughput_per_second']:>13} {u['rag_p50_ms']:>8} {u['rag_p95_ms']:>8} | "
+              f"{b['throughput_per_second']:>11} {b['rag_p50_ms']:>8} {b['rag_p95_ms']:>8} {b['mean_batch']:>6}")
+
+
+if __name__ == "__main__":
+    main()
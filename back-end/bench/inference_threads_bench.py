@@ -0,0 +1,131 @@
+# bench/inference_threads_bench.py
+"""
+Retrieval throughput at several request concurrencies: each request thread
+calling FAISS itself with the library default thread count (as before the
+budgeted executor), versus the same jobs scheduled onto the inference
+executor with INFERENCE_THREADS split across INFERENCE_WORKERS
+(INFERENCE_THREAD_BUDGET=1).
+
+By default the job is a FAISS search on a synthetic flat index of
+--index-size random vectors. --model runs the real retrieval instead
+(MiniLM forward pass + search on the vectorstore/ index).
+
+Usage (from back-end/):
+    python -m bench.inference_threads_bench --concurrency 1,4,16
+    python -m bench.inference_threads_bench --threads 8 --workers 4 --queries 8
+    python -m bench.inference_threads_bench --model --concurrency 1,4,16
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from app.utils import executor
+from bench.embed_batch_bench import _percentile
+from bench.pipeline_bench import load_corpus
+
+DIM = 384
+
+
+def _synthetic_job(index_size: int, queries: int):
+    import faiss
+    import numpy as np
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(DIM)
+    index.add(rng.random((index_size, DIM), dtype="float32"))
+    matrix = rng.random((queries, DIM), dtype="float32")
+    return lambda text: index.search(matrix, 5)
+
+
+def _model_job():
+    from app.rag import vectorstore
+    vectorstore.get_db()
+    return lambda text: vectorstore.search_local([text], 5)
+
+
+def measure(call, texts: list[str], concurrency: int, per_caller: int, setup=None) -> dict:
+    """`concurrency` request threads each run `per_caller` jobs through call."""
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def caller(offset: int):
+        if setup is not None:
+            setup()
+        mine = []
+        for i in range(per_caller):
+            started = time.perf_counter()
+            call(texts[(offset + i) % len(texts)])
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=caller, args=(n * per_caller,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "throughput_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+    }
+
+
+def run(job, texts: list[str], levels: list[int], per_caller: int, threads: int, workers: int, default_threads: int) -> list[dict]:
+    executor.INFERENCE_THREAD_BUDGET = True
+    executor.INFERENCE_WORKERS = workers
+    executor.INTRA_OP_THREADS = max(1, threads // workers)
+    rows = []
+    for concurrency in levels:
+        # What every request thread got before: library pools sized to the whole machine
+        executor.shutdown_inference_executor()
+        executor.set_thread_budget(default_threads)
+        per_request = measure(job, texts, concurrency, per_caller,
+                              setup=lambda: executor.set_openmp_threads(default_threads))
+        # A fresh executor sets the process-wide budget once, when it starts
+        executor.shutdown_inference_executor()
+        rows.append({
+            "concurrency": concurrency,
+            "per_request_threads": per_request,
+            "executor": measure(lambda text: executor.call_inference(job, text), texts, concurrency, per_caller),
+        })
+    executor.shutdown_inference_executor()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark retrieval with and without the budgeted inference executor")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated request counts")
+    parser.add_argument("--per-caller", type=int, default=10, help="jobs run by each request thread")
+    parser.add_argument("--threads", type=int, default=executor.INFERENCE_THREADS, help="INFERENCE_THREADS")
+    parser.add_argument("--workers", type=int, default=executor.INFERENCE_WORKERS, help="INFERENCE_WORKERS")
+    parser.add_argument("--default-threads", type=int, default=os.cpu_count() or 1,
+                        help="library thread count of each request thread without the executor")
+    parser.add_argument("--index-size", type=int, default=100_000, help="synthetic index vectors")
+    parser.add_argument("--queries", type=int, default=1, help="query vectors per synthetic search")
+    parser.add_argument("--model", action="store_true", help="use the real embedding model and index")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args(argv)
+
+    job = _model_job() if args.model else _synthetic_job(args.index_size, args.queries)
+    texts = [t.content for t in load_corpus()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+    rows = run(job, texts, levels, args.per_caller, args.threads, args.workers, args.default_threads)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"cores={os.cpu_count()} threads={args.threads} workers={args.workers} "
+          f"(x{max(1, args.threads // args.workers)} intra-op), per-request default={args.default_threads}")
+    print(f"{'concurrency':>11} | {'per-request q/s':>15} {'p50 ms':>8} {'p95 ms':>8} | {'executor q/s':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in rows:
+        u, b = row["per_request_threads"], row["executor"]
+        print(f"{row['concurrency']:>11} | {u['throughput_per_second']:>15} {u['p50_ms']:>8} {u['p95_ms']:>8} | "
+              f"{b['throughput_per_second']:>12} {b['p50_ms']:>8} {b['p95_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# bench/pipeline_bench.py
+"""
+Offline benchmark for the ticket pipeline.
+
+Replays a ticket corpus through process_ticket_async (or process_ticket on a
+thread pool with --sync) at a fixed concurrency, with the Mistral client
+replaced by a stub that sleeps for --llm-latency ms. Nothing leaves the
+machine, so runs are reproducible and need no API key.
+
+Reports p50/p95/p99 per pipeline stage (from pipeline_stage_seconds),
+throughput, peak RSS, cache hit rates and the host it ran on. --save-baseline writes the report as
+JSON; --baseline compares against a saved report and exits 1 when a stage p95
+or the throughput regressed by more than --tolerance.
+
+Usage (from back-end/):
+    python -m bench.pipeline_bench --concurrency 16 --repeat 3 --stub-retrieval
+    python -m bench.pipeline_bench --stub-retrieval --save-baseline bench/baseline.json
+    python -m bench.pipeline_bench --stub-retrieval --baseline bench/baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from app.agents import orchestrator, rag
+from app.schemas import TicketInput
+from app.utils import degradation, llm, metrics, tracing
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus.json")
+QUANTILES = (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+
+# Tiny knowledge base used by --stub-retrieval
+STUB_KB = [
+    ("faq.md", "faq", "To reset your password, click 'Forgot password' on the login page and follow the link sent by email."),
+    ("faq.md", "faq", "Two-factor authentication can be enabled in Settings > Security. Codes are valid for 30 seconds."),
+    ("pricing.md", "policies", "The Simple plan is free. The Pro plan costs 2000 DZD per user per month with a 14-day free trial."),
+    ("policies.md", "policies", "Refunds are available within 14 days of purchase. Data is deleted 30 days after account closure."),
+    ("guide.md", "guide", "Create a project from the dashboard with 'New project', then invite members by email."),
+    ("guide.md", "guide", "Reports can be exported as PDF or CSV from the Reports tab. Attachments are limited to 25 MB."),
+    ("security.md", "policies", "Data is encrypted in transit and at rest. Doxa complies with Algerian law 25-11 on personal data."),
+    ("mobile.md", "guide", "If the mobile app does not sync, sign out, update the app and sign in again."),
+]
+
+
+def load_corpus(path: str = CORPUS_PATH) -> list[TicketInput]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [TicketInput(ticket_id=t["id"], content=t["content"]) for t in data["tickets"]]
+
+
+# ---------------------------------------------------------------------------
+# Stubs
+# ---------------------------------------------------------------------------
+
+def _stub_completion(kwargs) -> SimpleNamespace:
+    prompt = kwargs["messages"][-1]["content"]
+    content = json.dumps({"response": f"Stub answer ({len(prompt)} prompt chars).", "escalate": False})
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4),
+    )
+
+
+class StubChat:
+    """Stands in for Mistral().chat: fixed latency, valid responder JSON."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def complete(self, **kwargs):
+        time.sleep(self.latency)
+        return _stub_completion(kwargs)
+
+    async def complete_async(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _stub_completion(kwargs)
+
+
+def _stub_hits(query: str, k: int, latency: float):
+    """Deterministic [(doc, distance), ...] ranked by word overlap with STUB_KB."""
+    time.sleep(latency)
+    words = set(query.lower().split())
+    hits = []
+    for i, (source, category, text) in enumerate(STUB_KB):
+        overlap = len(words & set(text.lower().split())) / (len(words) or 1)
+        jitter = int(hashlib.sha256(f"{query}|{i}".encode()).hexdigest()[:4], 16) / 0xFFFF * 0.05
+        doc = SimpleNamespace(page_content=text, metadata={"source": source, "chunk_id": i, "category": category})
+        hits.append((doc, round(2.0 * (1.0 - overlap) * 0.5 + jitter, 4)))
+    hits.sort(key=lambda h: h[1])
+    return hits[:k]
+
+
+def install_stubs(llm_latency: float, stub_retrieval: bool, retrieval_latency: float):
+    llm._client = SimpleNamespace(chat=StubChat(llm_latency))
+    if stub_retrieval:
+        rag.retrieve = lambda query, k=5: _stub_hits(query, k, retrieval_latency)
+        rag.retrieve_batch = lambda queries, k=5: [_stub_hits(q, k, retrieval_latency) for q in queries]
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+async def _replay_async(tickets: list[TicketInput], concurrency: int) -> int:
+    sem = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(ticket):
+        nonlocal errors
+        async with sem:
+            try:
+                await orchestrator.process_ticket_async(ticket)
+            except Exception as e:
+                errors += 1
+                print(f"Ticket {ticket.ticket_id} failed: {e}")
+
+    await asyncio.gather(*[one(t) for t in tickets])
+    return errors
+
+
+def _replay_sync(tickets: list[TicketInput], concurrency: int) -> int:
+    errors = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ticket, future in [(t, pool.submit(orchestrator.process_ticket, t)) for t in tickets]:
+            try:
+                future.result()
+            except Exception as e:
+                errors += 1
+                print(f"Ticket {ticket.ticket_id} failed: {e}")
+    return errors
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _host() -> dict:
+    """Hardware and runtime of the run, so saved baselines are compared like for like."""
+    return {
+        "cpu": _cpu_model(),
+        "cpus": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+    }
+
+
+def _stage_report() -> dict:
+    stages = {}
+    for key, series in tracing.stage_seconds.items():
+        labels = dict(key)
+        stage = labels.get("stage", "unknown")
+        stages[stage] = {"count": series["count"]}
+        for name, q in QUANTILES:
+            value = tracing.stage_seconds.quantile(q, **labels)
+            stages[stage][name] = round(value * 1000, 3) if value is not None else None
+    return stages
+
+
+def run(tickets: list[TicketInput], concurrency: int = 8, repeat: int = 1, sync: bool = False) -> dict:
+    """
+    Replay tickets `repeat` times and return the report dict
+    (stage latencies are in milliseconds).
+    """
+    tracing.stage_seconds.reset()
+    metrics.cache_requests.reset()
+    degradation.controller.reset()
+    rag.rag_cache.clear()
+    workload = [
+        t.model_copy(update={"ticket_id": f"{t.ticket_id}-{r}"}) for r in range(repeat) for t in tickets
+    ]
+
+    started = time.perf_counter()
+    if sync:
+        errors = _replay_sync(workload, concurrency)
+    else:
+        errors = asyncio.run(_replay_async(workload, concurrency))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "config": {
+            "tickets": len(workload),
+            "concurrency": concurrency,
+            "mode": "sync" if sync else "async",
+            "single_flight": orchestrator.SINGLE_FLIGHT_ENABLED,
+        },
+        "host": _host(),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(workload) / elapsed, 2) if elapsed else 0.0,
+        "errors": errors,
+        "stages_ms": _stage_report(),
+        "peak_rss_mb": _peak_rss_mb(),
+        "cache_hit_rates": metrics.cache_hit_rates(),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """
+    Regressions of report against baseline: stage p95 slower, or throughput
+    lower, by more than `tolerance` (a fraction). Empty list when within budget.
+    """
+    problems = []
+    for stage, base in baseline.get("stages_ms", {}).items():
+        current = report["stages_ms"].get(stage)
+        if not current or base.get("p95") is None or current.get("p95") is None:
+            continue
+        if current["p95"] > base["p95"] * (1 + tolerance):
+            problems.append(f"{stage} p95 {current['p95']}ms > baseline {base['p95']}ms (+{tolerance:.0%})")
+    base_tp = baseline.get("throughput_per_second", 0.0)
+    if base_tp and report["throughput_per_second"] < base_tp * (1 - tolerance):
+        problems.append(f"throughput {report['throughput_per_second']}/s < baseline {base_tp}/s (-{tolerance:.0%})")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a ticket corpus through the pipeline with a stub LLM")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1, help="replay the corpus this many times")
+    parser.add_argument("--llm-latency", type=float, default=200.0, help="stub LLM latency in ms")
+    parser.add_argument("--stub-retrieval", action="store_true", help="skip the FAISS vectorstore and embedding model")
+    parser.add_argument("--retrieval-latency", type=float, default=5.0, help="stub retrieval latency in ms")
+    parser.add_argument("--sync", action="store_true", help="use process_ticket on a thread pool")
+    parser.add_argument("--no-singleflight", action="store_true", help="disable duplicate coalescing")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="fail when slower than this saved report")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    install_stubs(args.llm_latency / 1000, args.stub_retrieval, args.retrieval_latency / 1000)
+    if args.no_singleflight:
+        orchestrator.SINGLE_FLIGHT_ENABLED = False
+
+    report = run(load_corpus(args.corpus), args.concurrency, args.repeat, args.sync)
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("host", {}).get("cpus") != report["host"]["cpus"]:
+            print(f"WARNING: baseline ran on {baseline.get('host', {}).get('cpus')} CPUs, this run on {report['host']['cpus']}")
+        problems = compare(report, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
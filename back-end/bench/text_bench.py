@@ -0,0 +1,75 @@
+# bench/text_bench.py
+"""
+Per-ticket cost of the analyzer keyword fallback and the evaluator polarity,
+before (stopword set rebuilt per call, regexes looked up per call, TextBlob)
+and after (app.utils.text: frozen tables, precompiled patterns, lexicon).
+
+Usage (from back-end/):
+    python -m bench.text_bench --repeat 200
+"""
+import argparse
+import re
+import time
+
+from app.utils import text
+from bench.pipeline_bench import load_corpus
+
+
+def legacy_keywords(raw: str) -> list[str]:
+    """_fallback_analysis keyword extraction as it was before app.utils.text."""
+    clean = re.sub(r"\s+", " ", raw).strip()
+    tokens = re.findall(r"[A-Za-zÀ-ÖØ-öø-ÿ']+", clean.lower())
+    stop = {"the","a","an","and","or","for","to","of","in","on","with","without","my","your","i","you","he","she","we","they","is","are","be","been","le","la","les","un","une","des","de","du","dans","et","ou","pour","sur","avec","sans","mon","ma","mes","votre","vos","je","tu","il","elle","nous","vous","ils","elles","ne","pas","au","aux","ce","cet","cette","ces","est","été","être"}
+    keywords = []
+    seen = set()
+    for t in tokens:
+        if t in stop or len(t) < 3:
+            continue
+        if t not in seen:
+            seen.add(t)
+            keywords.append(t)
+        if len(keywords) >= 8:
+            break
+    return keywords
+
+
+def _per_call_us(fn, texts: list[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for t in texts:
+            fn(t)
+    return (time.perf_counter() - started) / (repeat * len(texts)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark keyword extraction and polarity per ticket")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    texts = [t.content for t in load_corpus()]
+    rows = [
+        ("keywords (legacy)", _per_call_us(legacy_keywords, texts, args.repeat)),
+        ("keywords (text core)", _per_call_us(text.extract_keywords, texts, args.repeat)),
+        ("polarity (lexicon)", _per_call_us(text.polarity, texts, args.repeat)),
+    ]
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        text.polarity_batch(texts)
+    rows.append(("polarity_batch (per text)", (time.perf_counter() - started) / (args.repeat * len(texts)) * 1e6))
+
+    try:
+        started = time.perf_counter()
+        from textblob import TextBlob
+        import_ms = (time.perf_counter() - started) * 1000
+        tb_repeat = max(1, args.repeat // 20)
+        rows.append(("polarity (TextBlob)", _per_call_us(lambda t: TextBlob(t).sentiment.polarity, texts, tb_repeat)))
+        print(f"TextBlob import: {import_ms:.1f} ms")
+    except ImportError:
+        print("TextBlob not installed, skipping the legacy polarity baseline")
+
+    for name, us in rows:
+        print(f"{name:<28} {us:9.2f} us/ticket")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# tests/conftest.py
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import orchestrator, rag
+from app.rag import vectorstore
+from app.schemas import AnalysisResult, FinalResponse, RagResult
+from app.utils import degradation
+
+
+@pytest.fixture(autouse=True)
+def empty_rag_cache():
+    rag.rag_cache.clear()
+    vectorstore.query_embeddings.clear()
+    yield rag.rag_cache
+    rag.rag_cache.clear()
+    vectorstore.query_embeddings.clear()
+
+
+@pytest.fixture(autouse=True)
+def healthy_llm():
+    """Each test starts with a closed LLM circuit and an empty health window."""
+    degradation.controller.reset()
+    yield degradation.controller
+    degradation.controller.reset()
+
+
+@pytest.fixture
+def stub_stages(monkeypatch):
+    seen = {"threads": set(), "llm_calls": 0, "loop_thread": threading.get_ident()}
+
+    def analyze(text):
+        seen["threads"].add(threading.get_ident())
+        return AnalysisResult(summary=text, keywords=["password"])
+
+    def rag(summary):
+        seen["threads"].add(threading.get_ident())
+        return RagResult(context="Use the reset link.", sources=["faq.md"], similarity_score=0.9)
+
+    async def respond(context, ticket, confidence=None, latency_target=None):
+        seen["llm_calls"] += 1
+        await asyncio.sleep(0.05)
+        return FinalResponse(ticket_id=ticket.ticket_id, response=context, escalated=False, reason="ok")
+
+    monkeypatch.setattr(orchestrator, "analyze_ticket", analyze)
+    monkeypatch.setattr(orchestrator, "rag_answer", rag)
+    monkeypatch.setattr(orchestrator, "evaluate", lambda **kw: SimpleNamespace(decision="APPROVE", confidence_score=0.9, reason="ok"))
+    monkeypatch.setattr(orchestrator, "generate_response_async", respond)
+    return seen
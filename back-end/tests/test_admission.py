@@ -0,0 +1,61 @@
+# tests/test_admission.py
+import asyncio
+
+import pytest
+
+from app.agents import orchestrator
+from app.schemas import TicketInput
+from app.utils.admission import AdmissionController, Overloaded, admission_rejected, queue_depth
+
+
+def test_overflow_is_rejected_with_retry_after():
+    async def main():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, max_wait=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        running = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        assert queue_depth.value(endpoint="test") == 1
+
+        with pytest.raises(Overloaded) as exc:
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(running, queued)
+        return exc.value
+
+    error = asyncio.run(main())
+    assert error.reason == "queue_full"
+    assert error.retry_after >= 1
+    assert admission_rejected.value(endpoint="test", reason="queue_full") == 1
+
+
+def test_wait_timeout():
+    async def main():
+        controller = AdmissionController("test-timeout", max_concurrent=1, max_queue=5, max_wait=0.05)
+        async with controller.slot():
+            with pytest.raises(Overloaded) as exc:
+                async with controller.slot():
+                    pass
+        return exc.value
+
+    assert asyncio.run(main()).reason == "wait_timeout"
+
+
+def test_disconnected_client_is_dropped_before_analysis(stub_stages, monkeypatch):
+    retrieved = []
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda summary: retrieved.append(summary))
+
+    async def gone():
+        return True
+
+    with pytest.raises(orchestrator.TicketAborted):
+        asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="hello"), should_abort=gone))
+    assert retrieved == []
+    assert stub_stages["threads"] == set()  # analyze_ticket never ran
+    assert stub_stages["llm_calls"] == 0
@@ -0,0 +1,68 @@
+# tests/test_async_pipeline.py
+import asyncio
+from types import SimpleNamespace
+
+from app.agents import orchestrator
+from app.schemas import FinalResponse, RagResult, TicketInput
+from app.utils import llm, llm_usage
+
+
+def test_process_ticket_async_offloads_blocking_stages(stub_stages):
+    result = asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="reset password")))
+    assert result.response == "Use the reset link."
+    assert stub_stages["loop_thread"] not in stub_stages["threads"]
+
+
+def test_process_ticket_async_coalesces_duplicates(stub_stages):
+    async def main():
+        return await asyncio.gather(*[
+            orchestrator.process_ticket_async(TicketInput(ticket_id=f"T{i}", content="Reset password"))
+            for i in range(5)
+        ])
+
+    results = asyncio.run(main())
+    assert stub_stages["llm_calls"] == 1
+    assert [r.ticket_id for r in results] == [f"T{i}" for i in range(5)]
+
+
+def test_call_llm_async_records_usage(monkeypatch):
+    class Chat:
+        async def complete_async(self, **kwargs):
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="hi"))],
+                usage=SimpleNamespace(prompt_tokens=5, completion_tokens=2),
+            )
+
+    llm_usage.llm_tokens.reset()
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=Chat()))
+    assert asyncio.run(llm.call_llm_async("s", "u", temperature=0, stage="responder")) == "hi"
+    assert llm_usage.llm_tokens.value(stage="responder", model=llm.DEFAULT_MODEL, kind="prompt") == 5
+
+
+def test_batch_isolates_errors_and_limits_concurrency(stub_stages, monkeypatch):
+    batches = []
+    active = {"now": 0, "peak": 0}
+
+    def rag_batch(summaries):
+        batches.append(list(summaries))
+        return [RagResult(context=f"answer for {s}", sources=["faq.md"], similarity_score=0.9) for s in summaries]
+
+    async def respond(context, ticket, confidence=None, latency_target=None):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        if ticket.ticket_id == "Q3":
+            raise RuntimeError("LLM timeout")
+        return FinalResponse(ticket_id=ticket.ticket_id, response=context, escalated=False, reason="ok")
+
+    monkeypatch.setattr(orchestrator, "rag_answer_batch", rag_batch)
+    monkeypatch.setattr(orchestrator, "generate_response_async", respond)
+    tickets = [TicketInput(ticket_id=f"Q{i}", content=f"question {i}") for i in range(6)]
+
+    results = asyncio.run(orchestrator.process_tickets_batch_async(tickets, concurrency=2))
+
+    assert len(batches) == 1 and len(batches[0]) == 6
+    assert active["peak"] <= 2
+    assert isinstance(results[3], RuntimeError)
+    assert [r.ticket_id for i, r in enumerate(results) if i != 3] == ["Q0", "Q1", "Q2", "Q4", "Q5"]
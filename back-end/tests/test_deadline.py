@@ -0,0 +1,95 @@
+# tests/test_deadline.py
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import orchestrator
+from app.schemas import TicketInput
+from app.utils import deadline, degradation, llm
+from app.utils.executor import run_inference
+
+
+def test_scope_keeps_tighter_deadline_and_reaches_executor_threads():
+    async def main():
+        with deadline.deadline_scope(10):
+            with deadline.deadline_scope(60):
+                return await run_inference(deadline.remaining)
+
+    assert 9 < asyncio.run(main()) <= 10
+    assert deadline.remaining() is None
+
+
+def test_budget_from_header_only_lowers_the_default():
+    assert deadline.budget_from_header("5") == 5
+    assert deadline.budget_from_header("999") == deadline.TICKET_DEADLINE_SECONDS
+    assert deadline.budget_from_header("abc") == deadline.TICKET_DEADLINE_SECONDS
+
+
+def test_llm_timeout_derived_from_remaining_budget(monkeypatch):
+    seen = {}
+
+    class Chat:
+        async def complete_async(self, **kwargs):
+            seen.update(kwargs)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))], usage=None)
+
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=Chat()))
+
+    async def main():
+        with deadline.deadline_scope(4):
+            return await llm.call_llm_async("s", "u", temperature=0)
+
+    assert asyncio.run(main()) == "ok"
+    assert 3000 < seen["timeout_ms"] <= 4000
+
+
+def test_tight_deadline_skips_the_llm(stub_stages):
+    async def main():
+        with deadline.deadline_scope(deadline.LLM_MIN_BUDGET_SECONDS / 2):
+            return await orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="reset password"))
+
+    result = asyncio.run(main())
+    assert stub_stages["llm_calls"] == 0
+    assert result.escalated and result.reason == "Not enough time left to generate a response"
+
+
+def test_expired_deadline_escalates_before_retrieval(stub_stages):
+    async def main():
+        with deadline.deadline_scope(0):
+            return await orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="reset password"))
+
+    result = asyncio.run(main())
+    assert result.escalated and result.reason == "Deadline exceeded"
+
+
+def test_deadline_cut_attempts_do_not_trip_the_breaker(monkeypatch, healthy_llm):
+    class Chat:
+        def complete(self, **kwargs):
+            time.sleep(kwargs["timeout_ms"] / 1000)
+            raise TimeoutError("request timed out")
+
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=Chat()))
+    for _ in range(degradation.BREAKER_FAILURES + 1):
+        with deadline.deadline_scope(0.02):
+            with pytest.raises(deadline.DeadlineExceeded):
+                llm.call_llm("s", "u", temperature=0)
+
+    assert healthy_llm.allow() and healthy_llm.snapshot()["calls_in_window"] == 0
+
+
+def test_followers_only_share_runs_with_a_similar_budget(monkeypatch, stub_stages):
+    ticket = TicketInput(ticket_id="T1", content="reset password")
+
+    async def submit(budget):
+        with deadline.deadline_scope(budget):
+            return await orchestrator.process_ticket_async(ticket.model_copy(update={"ticket_id": f"T{budget}"}))
+
+    async def main():
+        return await asyncio.gather(submit(deadline.LLM_MIN_BUDGET_SECONDS / 2), submit(20))
+
+    tight, relaxed = asyncio.run(main())
+    assert tight.escalated and tight.reason == "Not enough time left to generate a response"
+    assert not relaxed.escalated and stub_stages["llm_calls"] == 1
+    assert deadline.budget_bucket() is None
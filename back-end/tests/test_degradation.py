@@ -0,0 +1,122 @@
+# tests/test_degradation.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.agents import orchestrator
+from app.schemas import RagResult, RagSnippet, TicketInput
+from app.utils import degradation, llm
+from app.utils.degradation import CircuitOpen, DegradationController
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_probes_and_closes():
+    clock = Clock()
+    c = DegradationController(clock=clock)
+    for _ in range(degradation.BREAKER_FAILURES):
+        assert c.allow()
+        c.record(1.0, ok=False)
+    assert c.mode() == degradation.OPEN and not c.allow()
+
+    clock.now += degradation.BREAKER_COOLDOWN
+    assert c.allow()          # single half-open probe
+    assert not c.allow()
+    c.record(0.5, ok=True)
+    assert c.allow() and c.mode() == degradation.NORMAL
+
+
+def test_mode_stays_open_while_the_probe_is_in_flight():
+    clock = Clock()
+    c = DegradationController(clock=clock)
+    for _ in range(degradation.BREAKER_FAILURES):
+        c.record(1.0, ok=False)
+    clock.now += degradation.BREAKER_COOLDOWN
+    assert c.mode() != degradation.OPEN  # the next caller will probe
+    assert c.allow()
+    # Others are refused until the probe ends, so the pipeline must not plan an LLM call
+    assert not c.allow() and c.mode() == degradation.OPEN
+    c.release()
+    assert c.mode() != degradation.OPEN and c.allow()
+
+
+def test_cancelled_probe_does_not_wedge_the_breaker(monkeypatch, healthy_llm):
+    started = []
+
+    class Chat:
+        async def complete_async(self, **kwargs):
+            started.append(1)
+            await asyncio.sleep(60)
+
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=Chat()))
+    while healthy_llm.allow():
+        healthy_llm.record(1.0, ok=False)
+    monkeypatch.setattr(degradation, "BREAKER_COOLDOWN", 0.0)
+
+    async def cancel_probe():
+        probe = asyncio.ensure_future(llm.call_llm_async("s", "u", temperature=0))
+        while not started:
+            await asyncio.sleep(0)
+        assert healthy_llm.mode() == degradation.OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    assert healthy_llm.snapshot()["circuit"] == degradation.HALF_OPEN
+    assert healthy_llm.mode() != degradation.OPEN and healthy_llm.allow()
+
+
+def test_slow_provider_switches_to_reduced_mode():
+    c = DegradationController(clock=Clock())
+    for _ in range(degradation.MIN_CALLS):
+        c.record(degradation.REDUCED_LATENCY_P95 + 1, ok=True)
+    assert c.mode() == degradation.REDUCED
+
+
+def test_call_llm_retries_with_backoff_then_refuses(monkeypatch, healthy_llm):
+    calls = []
+
+    class Chat:
+        def complete(self, **kwargs):
+            calls.append(1)
+            raise RuntimeError("503")
+
+    delays = []
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=Chat()))
+    monkeypatch.setattr(llm.time, "sleep", delays.append)
+
+    with pytest.raises(RuntimeError):
+        llm.call_llm("s", "u", temperature=0)
+    assert len(calls) == llm.MAX_RETRIES + 1
+    assert all(0 <= d <= degradation.RETRY_MAX_DELAY for d in delays) and len(delays) == llm.MAX_RETRIES
+
+    while healthy_llm.allow():
+        healthy_llm.record(1.0, ok=False)
+    with pytest.raises(CircuitOpen):
+        llm.call_llm("s", "u", temperature=0)
+    assert len(calls) == llm.MAX_RETRIES + 1
+
+
+def test_open_circuit_answers_extractively_or_escalates(monkeypatch, stub_stages, healthy_llm):
+    text = "### 1.1 Q1. How do I reset my password?\nClick 'Forgot password' on the login page.\n\n### 1.2 Q2. How do I enable 2FA?\nOpen Settings."
+    snippet = RagSnippet(text=text, source="faq.md", distance=0.9, score=1.0)
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda s: RagResult(
+        context=snippet.text, sources=["faq.md"], similarity_score=1.0, snippets=[snippet]))
+    while healthy_llm.allow():
+        healthy_llm.record(1.0, ok=False)
+
+    result = asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="How do I reset my password?")))
+    assert not result.escalated and "Forgot password" in result.response and "Settings" not in result.response
+    assert stub_stages["llm_calls"] == 0
+
+    monkeypatch.setattr(degradation, "DEGRADED_OPEN_MODE", "escalate")
+    result = asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T2", content="I forgot my password")))
+    assert result.escalated and result.reason == "LLM unavailable"
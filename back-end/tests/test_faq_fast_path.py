@@ -0,0 +1,92 @@
+# tests/test_faq_fast_path.py
+import asyncio
+from types import SimpleNamespace
+
+from app.agents import orchestrator
+from app.agents.rag import build_rag_result
+from app.agents.responder import extractive_response, faq_answer_text, faq_blocks
+from app.rag.ingest import chunk_text
+from app.schemas import TicketInput
+
+FAQ_PATH = "app/rag/docs/faq/faq.md"
+FAQ_CHUNK = (
+    "### 1.1 Q1. Comment réinitialiser mon mot de passe oublié ?\n\n"
+    "Réponse : Cliquez sur « Mot de passe oublié » et suivez le lien reçu par email.\n\n"
+    "### 1.2 Q2. Comment activer la double authentification ?\n\n"
+    "Paramètres → Sécurité."
+)
+TICKET = TicketInput(ticket_id="T1", content="J'ai oublié mon mot de passe, comment le réinitialiser ?")
+
+
+def _rag(text, category, distance):
+    doc = SimpleNamespace(page_content=text, metadata={"source": "faq.md", "chunk_id": 0, "category": category})
+    return build_rag_result([(doc, distance)])
+
+
+def _kb_chunks():
+    with open(FAQ_PATH, encoding="utf-8") as f:
+        return chunk_text(f.read())
+
+
+def test_faq_answer_text_quotes_the_matching_entry_only():
+    answer = faq_answer_text(FAQ_CHUNK, TICKET.content)
+    assert answer == "Cliquez sur « Mot de passe oublié » et suivez le lien reçu par email."
+    assert faq_answer_text(FAQ_CHUNK, "Quels sont vos tarifs ?") == ""
+
+
+def test_real_faq_chunks_split_on_their_questions():
+    chunk = _kb_chunks()[2]
+    # A 200-word pack: tail of Q5 carried over, Q6 and Q7 complete, Q8 cut off
+    assert [q for q, _ in faq_blocks(chunk)] == [
+        "Comment créer un nouveau projet ?",
+        "Quelle est la différence entre un projet Kanban, Agile et Waterfall ?",
+    ]
+    answer = faq_answer_text(chunk, "Comment créer un nouveau projet ?")
+    assert answer.startswith("1. Connectez-vous à votre compte Doxa.")
+    assert answer.endswith("6. Invitez les membres de l'équipe par email.")
+    assert "Flux continu" not in answer and "Q8" not in answer
+    # The entry whose answer may continue in the next chunk is never quoted
+    assert faq_answer_text(chunk, "Combien de projets puis-je créer avec mon plan ?") == ""
+
+
+def test_no_headings_leak_into_real_faq_answers():
+    for chunk in _kb_chunks():
+        for question, answer in faq_blocks(chunk):
+            assert question and answer
+            assert "#" not in answer and "SECTION" not in answer and "Q1" not in answer
+
+
+def test_extractive_response_follows_ticket_language():
+    result = extractive_response(FAQ_CHUNK, TICKET)
+    assert result.response.startswith("Merci pour votre demande.")
+    assert result.response.endswith("suivez le lien reçu par email.")
+    # French answer, English ticket: leave it to the LLM
+    assert extractive_response(FAQ_CHUNK, TicketInput(ticket_id="T2", content="I forgot my password")) is None
+
+
+def test_fast_path_skips_llm_for_close_faq_hits(monkeypatch, stub_stages):
+    monkeypatch.setattr(orchestrator, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(orchestrator, "FAQ_FAST_PATH", True)
+    orchestrator.faq_fast_path_tickets.reset()
+
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda summary: _rag(FAQ_CHUNK, "faq", 0.1))
+    result = asyncio.run(orchestrator.process_ticket_async(TICKET))
+    assert result.reason == "Answered from FAQ." and stub_stages["llm_calls"] == 0
+
+    # Same chunk from a guide, too far, or no matching question: the responder runs
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda summary: _rag(FAQ_CHUNK, "guide", 0.1))
+    asyncio.run(orchestrator.process_ticket_async(TICKET))
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda summary: _rag(FAQ_CHUNK, "faq", 0.6))
+    asyncio.run(orchestrator.process_ticket_async(TICKET))
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda summary: _rag(FAQ_CHUNK, "faq", 0.1))
+    asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T3", content="Quels sont vos tarifs ?")))
+    assert stub_stages["llm_calls"] == 3
+    assert orchestrator.faq_fast_path_tickets.value() == 1
+
+
+def test_fast_path_is_off_by_default(monkeypatch, stub_stages):
+    assert orchestrator.FAQ_FAST_PATH is False
+    monkeypatch.setattr(orchestrator, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(orchestrator, "rag_answer", lambda summary: _rag(FAQ_CHUNK, "faq", 0.1))
+    asyncio.run(orchestrator.process_ticket_async(TICKET))
+    assert stub_stages["llm_calls"] == 1
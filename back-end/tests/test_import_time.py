@@ -0,0 +1,56 @@
+# tests/test_import_time.py
+"""
+Guards start-up cost of the web workers: importing app.main must stay fast
+and must not pull in the LLM SDK or any ML library (they load on first use).
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = [
+    "mistralai",
+    "textblob",
+    "nltk",
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_community",
+    "langchain_huggingface",
+    "faiss",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def _probe():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        pytest.skip(f"app.main not importable in this environment: {result.stderr.strip().splitlines()[-1:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_app_main_does_not_load_ml_libraries():
+    assert _probe()["loaded"] == []
+
+
+def test_app_main_import_budget():
+    # best of three to smooth out cold disk caches
+    seconds = min(_probe()["seconds"] for _ in range(3))
+    assert seconds < IMPORT_BUDGET_SECONDS, f"import app.main took {seconds:.2f}s"
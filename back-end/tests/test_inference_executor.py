@@ -0,0 +1,77 @@
+# tests/test_inference_executor.py
+import sys
+import threading
+from types import SimpleNamespace
+
+from app.utils import executor
+
+
+def test_call_inference_runs_inline_without_the_budget(monkeypatch):
+    monkeypatch.setattr(executor, "INFERENCE_THREAD_BUDGET", False)
+    assert executor.call_inference(lambda: threading.current_thread().name) == threading.current_thread().name
+
+
+def test_call_inference_runs_on_a_worker_and_nests_inline(monkeypatch):
+    monkeypatch.setattr(executor, "INFERENCE_THREAD_BUDGET", True)
+
+    def where():
+        return threading.current_thread().name, executor.call_inference(lambda: threading.current_thread().name)
+
+    outer, inner = executor.call_inference(where)
+    assert outer.startswith("inference") and inner == outer
+    assert not executor.on_inference_worker()
+
+
+def test_thread_budget_sets_env_and_loaded_libraries_only(monkeypatch):
+    for var in executor._THREAD_ENV_VARS:
+        monkeypatch.setenv(var, "64")
+    monkeypatch.setattr(executor, "_OPERATOR_THREAD_ENV", {})
+    calls = []
+    monkeypatch.setitem(sys.modules, "torch", SimpleNamespace(set_num_threads=lambda n: calls.append(("torch", n))))
+    monkeypatch.delitem(sys.modules, "faiss", raising=False)
+
+    executor.set_thread_budget(2)
+
+    assert all(executor.os.environ[var] == "2" for var in executor._THREAD_ENV_VARS)
+    assert calls == [("torch", 2)]
+    assert "faiss" not in sys.modules
+
+
+def test_thread_budget_keeps_operator_settings(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "3")
+    monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+    monkeypatch.setattr(executor, "_OPERATOR_THREAD_ENV", {"OMP_NUM_THREADS": "3"})
+    calls = []
+    monkeypatch.setitem(sys.modules, "torch", SimpleNamespace(set_num_threads=calls.append))
+    monkeypatch.setitem(sys.modules, "faiss", SimpleNamespace(omp_set_num_threads=calls.append))
+
+    executor.set_thread_budget(2)
+    executor.set_openmp_threads(2)
+
+    assert executor.os.environ["OMP_NUM_THREADS"] == "3" and executor.os.environ["MKL_NUM_THREADS"] == "2"
+    # OMP_NUM_THREADS is the operator's: neither torch nor FAISS is overridden
+    assert calls == []
+
+
+def test_torch_budget_is_set_once_and_openmp_per_worker(monkeypatch):
+    torch_calls, omp_calls = [], []
+    monkeypatch.setitem(sys.modules, "torch", SimpleNamespace(set_num_threads=torch_calls.append))
+    monkeypatch.setitem(sys.modules, "faiss", SimpleNamespace(omp_set_num_threads=lambda n: omp_calls.append(threading.current_thread().name)))
+    monkeypatch.setattr(executor, "_OPERATOR_THREAD_ENV", {})
+    monkeypatch.setattr(executor, "INFERENCE_THREAD_BUDGET", True)
+    monkeypatch.setattr(executor, "INFERENCE_WORKERS", 3)
+    monkeypatch.setattr(executor, "INTRA_OP_THREADS", 2)
+    executor.shutdown_inference_executor()
+    try:
+        # Three jobs that wait for each other occupy the three workers
+        barrier = threading.Barrier(3)
+        pool = executor.get_inference_executor()
+        for future in [pool.submit(barrier.wait, 1) for _ in range(3)]:
+            future.result()
+    finally:
+        executor.shutdown_inference_executor()
+
+    # torch's count is process-wide: set once, not by every worker
+    assert torch_calls == [2]
+    # The OpenMP count is per thread: set by each worker only
+    assert len(omp_calls) == 3 and all(name.startswith("inference") for name in omp_calls)
@@ -0,0 +1,119 @@
+# tests/test_inference_service.py
+import os
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.rag import inference_service, vectorstore
+from app.rag.inference_service import InferenceClient, InferenceError, InferenceServer
+
+AUTHKEY = b"0123456789abcdef0123456789abcdef"
+
+DOC = SimpleNamespace(page_content="Use the reset link.", metadata={"source": "faq.md", "chunk_id": 1})
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(("embed", list(texts)))
+        return np.ones((len(texts), 3), dtype="float32")
+
+    def search(self, queries, k):
+        self.calls.append(("search", list(queries), k))
+        return [[(DOC, 0.25)] for _ in queries]
+
+    def search_vectors(self, vectors, k):
+        self.calls.append(("search_vectors", len(vectors), k))
+        return [[(DOC, 0.25)] for _ in vectors]
+
+    def index_version(self):
+        self.calls.append(("version",))
+        return "loaded-v1"
+
+
+@pytest.fixture
+def server(tmp_path):
+    backend = FakeBackend()
+    srv = InferenceServer(str(tmp_path / "inference.sock"), backend, authkey=AUTHKEY)
+    srv.start()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, backend
+    srv.close()
+
+
+def test_client_embeds_and_searches_over_the_socket(server):
+    srv, backend = server
+    client = InferenceClient(srv.address, AUTHKEY)
+
+    assert client.ping()
+    assert client.embed(["a", "b"]).shape == (2, 3)
+    hits = client.search(["reset password"], k=3)
+    doc, dist = hits[0][0]
+    assert doc.page_content == "Use the reset link." and doc.metadata["source"] == "faq.md"
+    assert dist == 0.25
+    assert backend.calls[-1] == ("search", ["reset password"], 3)
+    client.close()
+
+
+def test_server_errors_are_raised_client_side(server):
+    srv, backend = server
+    backend.search = lambda queries, k: (_ for _ in ()).throw(RuntimeError("index not loaded"))
+    with pytest.raises(InferenceError, match="index not loaded"):
+        InferenceClient(srv.address, AUTHKEY).search(["x"])
+
+
+def test_vectorstore_uses_the_service_when_configured(server, monkeypatch):
+    srv, backend = server
+    monkeypatch.setattr(inference_service, "INFERENCE_SOCKET", srv.address)
+    monkeypatch.setattr(inference_service, "_client", InferenceClient(srv.address, AUTHKEY))
+
+    assert vectorstore.retrieve("reset", k=2)[0][1] == 0.25
+    assert len(vectorstore.retrieve_batch(["a", "b"], k=2)) == 2
+    assert vectorstore.embed_texts(["a"]).shape == (1, 3)
+    assert backend.calls[-1] == ("search_vectors", 2, 2)
+    # Cache keys use the version the service has loaded, fetched once per TTL
+    assert vectorstore.index_version() == vectorstore.index_version() == "loaded-v1"
+    assert backend.calls.count(("version",)) == 1
+
+
+@pytest.mark.parametrize("authkey", [b"", b"ticket-inference"])
+def test_missing_or_weak_authkey_is_refused(tmp_path, authkey):
+    with pytest.raises(InferenceError, match="INFERENCE_AUTHKEY"):
+        InferenceServer(str(tmp_path / "inference.sock"), FakeBackend(), authkey=authkey)
+    with pytest.raises(InferenceError, match="INFERENCE_AUTHKEY"):
+        InferenceClient(str(tmp_path / "inference.sock"), authkey)
+
+
+def test_socket_is_owner_only_and_rejects_other_keys(server):
+    srv, backend = server
+    assert os.stat(srv.address).st_mode & 0o077 == 0
+    with pytest.raises(Exception):
+        InferenceClient(srv.address, b"another-secret-another-secret-32").ping()
+    assert backend.calls == []
+
+
+def test_in_process_retrieve_uses_the_service_search(monkeypatch):
+    embedded, searched = [], []
+
+    def embed_local(texts):
+        embedded.extend(texts)
+        return np.ones((len(texts), 3), dtype="float32")
+
+    def search_vectors(vectors, k=5):
+        searched.append((vectors.shape, k))
+        return [[("doc", 0.5)] for _ in vectors]
+
+    monkeypatch.setattr(inference_service, "INFERENCE_SOCKET", None)
+    monkeypatch.setattr(vectorstore, "EMBED_MICRO_BATCH", False)
+    monkeypatch.setattr(vectorstore, "embed_local", embed_local)
+    monkeypatch.setattr(vectorstore, "search_vectors", search_vectors)
+    assert vectorstore.retrieve("reset", k=3) == [("doc", 0.5)]
+    # The second retrieval reuses the cached query embedding
+    assert vectorstore.retrieve("reset", k=3) == [("doc", 0.5)]
+    assert embedded == ["reset"]
+    assert searched == [((1, 3), 3), ((1, 3), 3)]
@@ -0,0 +1,173 @@
+# tests/test_jobs.py
+import asyncio
+import socket
+import time
+from datetime import datetime
+
+import pytest
+
+from app.schemas import FinalResponse, TicketInput, TicketJob, TicketJobInput
+from app.workers.job_store import MemoryJobStore, SQLiteJobStore
+from app.workers.jobs import InvalidCallbackUrl, JobQueueFull, TicketJobPool, resolve_callback_url
+
+
+async def fake_process(ticket):
+    await asyncio.sleep(0.01)
+    if "crash" in ticket.content:
+        raise RuntimeError("pipeline crashed")
+    return FinalResponse(ticket_id=ticket.ticket_id, response="done", escalated=False, reason="ok")
+
+
+async def _wait(pool, job_id):
+    for _ in range(200):
+        job = pool.get(job_id)
+        if job.status in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_jobs_complete_and_fail_independently():
+    async def main():
+        pool = TicketJobPool(MemoryJobStore(), workers=2, process=fake_process)
+        await pool.start()
+        ok = pool.submit(TicketJobInput(ticket_id="T1", content="reset password"))
+        bad = pool.submit(TicketJobInput(ticket_id="T2", content="crash please"))
+        assert ok.status == "queued"
+        done, failed = await _wait(pool, ok.job_id), await _wait(pool, bad.job_id)
+        await pool.stop()
+        return done, failed
+
+    done, failed = asyncio.run(main())
+    assert done.result.ticket_id == "T1"
+    assert failed.status == "failed" and "crashed" in failed.error
+
+
+def test_full_queue_rejects():
+    async def main():
+        pool = TicketJobPool(MemoryJobStore(), workers=0, max_queue=1, process=fake_process)
+        await pool.start()
+        pool.submit(TicketJobInput(ticket_id="T1", content="a"))
+        with pytest.raises(JobQueueFull):
+            pool.submit(TicketJobInput(ticket_id="T2", content="b"))
+
+    asyncio.run(main())
+
+
+def test_sqlite_store_resumes_pending_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def enqueue_only():
+        pool = TicketJobPool(SQLiteJobStore(path), workers=0, process=fake_process)
+        await pool.start()
+        return pool.submit(TicketJobInput(ticket_id="T9", content="refund delay")).job_id
+
+    async def restart(job_id):
+        pool = TicketJobPool(SQLiteJobStore(path), workers=1, process=fake_process)
+        await pool.start()
+        job = await _wait(pool, job_id)
+        await pool.stop()
+        return job
+
+    job_id = asyncio.run(enqueue_only())
+    assert asyncio.run(restart(job_id)).status == "done"
+
+
+def test_pools_sharing_a_sqlite_store_run_each_job_once(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    seen = []
+
+    async def counting_process(ticket):
+        seen.append(ticket.ticket_id)
+        return await fake_process(ticket)
+
+    async def main():
+        # Left queued by a previous run; both workers find them at startup
+        seed = SQLiteJobStore(path)
+        ticket_ids = [f"T{i}" for i in range(10)]
+        for tid in ticket_ids:
+            seed.save(TicketJob(job_id=tid, status="queued", ticket=TicketInput(ticket_id=tid, content="c"), created_at=datetime.utcnow()))
+        pools = [TicketJobPool(SQLiteJobStore(path), workers=2, process=counting_process) for _ in range(2)]
+        for pool in pools:
+            await pool.start()
+        jobs = [await _wait(pools[0], tid) for tid in ticket_ids]
+        for pool in pools:
+            await pool.stop()
+        return ticket_ids, jobs
+
+    ticket_ids, jobs = asyncio.run(main())
+    assert all(job.status == "done" for job in jobs)
+    assert sorted(seen) == sorted(ticket_ids)
+
+
+def test_running_job_is_reclaimed_only_after_its_lease(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    now = datetime.utcnow()
+    store.save(TicketJob(job_id="J", status="queued", ticket=TicketInput(ticket_id="T", content="c"), created_at=now))
+    assert store.claim("J", "dead-worker", stale_before=0).status == "running"
+
+    # The owner's claim is fresh: nobody else may take the job
+    assert store.claim("J", "sibling", stale_before=0) is None
+    assert store.pending(stale_before=0) == []
+
+    # Its owner stopped renewing: the job is claimable again, and the late owner's result is dropped
+    later = time.time() + 1
+    assert [j.job_id for j in store.pending(stale_before=later)] == ["J"]
+    assert store.claim("J", "sibling", stale_before=later) is not None
+    late = store.get("J").model_copy(update={"status": "done", "finished_at": now})
+    assert not store.finish(late, "dead-worker")
+    assert store.finish(late, "sibling") and store.get("J").status == "done"
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://example.com/hook",
+    "http://127.0.0.1:8000/admin",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/hook",
+    "http://[::1]/hook",
+])
+def test_callback_to_local_or_non_http_url_is_rejected(url):
+    async def main():
+        pool = TicketJobPool(MemoryJobStore(), workers=0, process=fake_process)
+        await pool.start()
+        with pytest.raises(InvalidCallbackUrl):
+            pool.submit(TicketJobInput(ticket_id="T1", content="a", callback_url=url))
+        await pool.stop()
+
+    asyncio.run(main())
+
+
+def test_callback_host_resolving_to_private_address_is_rejected(monkeypatch):
+    async def getaddrinfo(host, port, type=0):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.168.1.10", port))]
+
+    async def main():
+        monkeypatch.setattr(asyncio.get_running_loop(), "getaddrinfo", getaddrinfo)
+        with pytest.raises(InvalidCallbackUrl):
+            await resolve_callback_url("https://hooks.example.com/job")
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("store_factory", [MemoryJobStore, lambda: SQLiteJobStore(":memory:")])
+def test_sweep_drops_only_old_finished_jobs(store_factory):
+    store = store_factory()
+    old, recent = datetime(2020, 1, 1), datetime.utcnow()
+    ticket = TicketInput(ticket_id="T", content="c")
+    store.save(TicketJob(job_id="old", status="done", ticket=ticket, created_at=old, finished_at=old))
+    store.save(TicketJob(job_id="new", status="done", ticket=ticket, created_at=recent, finished_at=recent))
+    store.save(TicketJob(job_id="queued", status="queued", ticket=ticket, created_at=old))
+
+    assert store.sweep(datetime(2021, 1, 1)) == 1
+    assert store.get("old") is None
+    assert store.get("new") is not None and store.get("queued") is not None
+
+
+def test_full_memory_store_evicts_oldest_finished_job():
+    store = MemoryJobStore(max_jobs=2)
+    ticket = TicketInput(ticket_id="T", content="c")
+    now = datetime.utcnow()
+    store.save(TicketJob(job_id="a", status="done", ticket=ticket, created_at=now, finished_at=now))
+    store.save(TicketJob(job_id="b", status="queued", ticket=ticket, created_at=now))
+    store.save(TicketJob(job_id="c", status="queued", ticket=ticket, created_at=now))
+    assert store.get("a") is None and store.get("b") and store.get("c")
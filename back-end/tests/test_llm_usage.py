@@ -0,0 +1,64 @@
+# tests/test_llm_usage.py
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import llm, llm_usage
+
+
+def _response(text="ok", prompt_tokens=12, completion_tokens=3):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+    )
+
+
+class FlakyChat:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def complete(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("boom")
+        return _response()
+
+
+@pytest.fixture(autouse=True)
+def clean_usage():
+    llm_usage.reset()
+    for m in (llm_usage.llm_calls, llm_usage.llm_retries, llm_usage.llm_tokens, llm_usage.llm_latency):
+        m.reset()
+    yield
+
+
+def test_call_llm_records_tokens_and_stage(monkeypatch):
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=FlakyChat()))
+    assert llm.call_llm("sys", "user", temperature=0, stage="responder") == "ok"
+
+    model = llm.DEFAULT_MODEL
+    assert llm_usage.llm_calls.value(stage="responder", model=model, outcome="ok") == 1
+    assert llm_usage.llm_tokens.value(stage="responder", model=model, kind="prompt") == 12
+    assert llm_usage.llm_tokens.value(stage="responder", model=model, kind="completion") == 3
+    assert llm_usage.llm_latency.count(stage="responder", model=model) == 1
+
+    view = llm_usage.token_budget_view()
+    assert view["used_today"] == 15
+    assert view["days"][0]["by_stage"]["responder"]["calls"] == 1
+
+
+def test_call_llm_counts_retries(monkeypatch):
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=FlakyChat(failures=1)))
+    monkeypatch.setattr(llm, "MAX_RETRIES", 2)
+    llm.call_llm("sys", "user", temperature=0, stage="analyzer")
+    assert llm_usage.llm_retries.value(stage="analyzer", model=llm.DEFAULT_MODEL) == 1
+
+
+def test_call_llm_records_failure(monkeypatch):
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=FlakyChat(failures=10)))
+    monkeypatch.setattr(llm, "MAX_RETRIES", 1)
+    with pytest.raises(RuntimeError):
+        llm.call_llm("sys", "user", temperature=0, stage="responder")
+    assert llm_usage.llm_calls.value(stage="responder", model=llm.DEFAULT_MODEL, outcome="error") == 1
+    assert llm_usage.tokens_used_today() == 0
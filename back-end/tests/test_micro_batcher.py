@@ -0,0 +1,136 @@
+# tests/test_micro_batcher.py
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.rag import vectorstore
+from app.utils import executor
+from app.utils.batching import MicroBatcher
+
+
+def _run_concurrently(fn, args):
+    results = [None] * len(args)
+    barrier = threading.Barrier(len(args))
+
+    def call(i):
+        barrier.wait()
+        results[i] = fn(args[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(args))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_callers_share_batches_and_get_their_own_results():
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [x * 2 for x in items]
+
+    batcher = MicroBatcher("test", double, max_items=4, max_wait=0.2)
+    results = _run_concurrently(batcher.submit, list(range(8)))
+
+    assert results == [x * 2 for x in range(8)]
+    # Flushed on max_items, not one call per item
+    assert sorted(len(b) for b in batches) == [4, 4]
+
+
+def test_lone_item_is_flushed_after_max_wait():
+    batcher = MicroBatcher("test", lambda items: [x + 1 for x in items], max_items=32, max_wait=0.01)
+    started = time.perf_counter()
+    assert batcher.submit(1) == 2
+    assert time.perf_counter() - started < 0.5
+
+
+def test_batch_error_reaches_every_caller():
+    def fail(items):
+        raise RuntimeError("model crashed")
+
+    batcher = MicroBatcher("test", fail, max_items=2, max_wait=0.2)
+    errors = _run_concurrently(lambda x: pytest.raises(RuntimeError, batcher.submit, x), [1, 2])
+    assert all("model crashed" in str(e.value) for e in errors)
+
+
+def test_cancelled_item_is_dropped_from_its_batch():
+    batches = []
+    release = threading.Event()
+
+    def slow(items):
+        batches.append(list(items))
+        release.wait(1)
+        return list(items)
+
+    batcher = MicroBatcher("test", slow, max_items=1, max_wait=0)
+    first = batcher.enqueue(["busy"])[0]  # holds the batcher thread
+    dropped, kept = batcher.enqueue(["dropped", "kept"])
+    assert dropped.cancel()
+    release.set()
+
+    assert first.result(1) == "busy" and kept.result(1) == "kept"
+    assert batches == [["busy"], ["kept"]]
+
+
+@pytest.fixture
+def batched_embeddings(monkeypatch):
+    """EMBED_MICRO_BATCH and the thread budget on, one inference worker, a stub model recording its batches and threads."""
+    calls = []
+
+    def embed_local(texts):
+        calls.append((list(texts), executor.on_inference_worker()))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype="float32")
+
+    monkeypatch.setattr(vectorstore, "embed_local", embed_local)
+    monkeypatch.setattr(vectorstore, "EMBED_MICRO_BATCH", True)
+    monkeypatch.setattr(vectorstore._embed_batcher, "max_wait", 0.2)
+    monkeypatch.setattr(vectorstore._embed_batcher, "max_items", 4)
+    monkeypatch.setattr(executor, "INFERENCE_THREAD_BUDGET", True)
+    monkeypatch.setattr(executor, "INFERENCE_WORKERS", 1)
+    executor.shutdown_inference_executor()
+    yield calls
+    executor.shutdown_inference_executor()
+
+
+def test_embed_texts_goes_through_the_batcher(batched_embeddings):
+    calls = batched_embeddings
+
+    results = _run_concurrently(lambda q: vectorstore.embed_texts([q]), ["a", "bb", "ccc", "dddd"])
+
+    assert [r[0][0] for r in results] == [1.0, 2.0, 3.0, 4.0]
+    # One forward pass, run within the inference executor's budget
+    assert len(calls) == 1 and sorted(calls[0][0]) == ["a", "bb", "ccc", "dddd"]
+    assert calls[0][1]
+
+
+def test_event_loop_callers_fill_a_batch_larger_than_the_worker_count(batched_embeddings):
+    calls = batched_embeddings
+    queries = ["a", "bb", "ccc", "dddd"]
+
+    async def retrieve(query):
+        await vectorstore.embed_ahead_async([query])
+        return await executor.run_inference(vectorstore.embed_texts, [query])
+
+    async def main():
+        return await asyncio.gather(*(retrieve(q) for q in queries))
+
+    results = asyncio.run(main())
+
+    assert [r[0][0] for r in results] == [1.0, 2.0, 3.0, 4.0]
+    # All four queries in one batch, although only one worker exists
+    assert len(calls) == 1 and sorted(calls[0][0]) == queries
+
+
+def test_worker_embeds_inline_instead_of_waiting_on_the_batcher(batched_embeddings):
+    calls = batched_embeddings
+    started = time.perf_counter()
+    vector = executor.call_inference(vectorstore.embed_texts, ["abc"])
+    assert vector[0][0] == 3.0
+    assert calls == [(["abc"], True)]
+    # No max_wait spent waiting for a batch
+    assert time.perf_counter() - started < 0.2
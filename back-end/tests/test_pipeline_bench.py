@@ -0,0 +1,28 @@
+# tests/test_pipeline_bench.py
+from types import SimpleNamespace
+
+from app.agents import rag
+from app.utils import llm
+from bench import pipeline_bench
+
+
+def test_replay_reports_stages_and_cache_hit_rates(monkeypatch):
+    monkeypatch.setattr(llm, "_client", SimpleNamespace(chat=pipeline_bench.StubChat(0.0)))
+    monkeypatch.setattr(rag, "retrieve", lambda query, k=5: pipeline_bench._stub_hits(query, k, 0.0))
+    tickets = pipeline_bench.load_corpus()[:6]
+
+    report = pipeline_bench.run(tickets, concurrency=3, repeat=2)
+
+    assert report["config"]["tickets"] == 12
+    assert report["errors"] == 0
+    assert report["stages_ms"]["process_ticket"]["count"] >= 6
+    assert report["stages_ms"]["rag_answer"]["p95"] is not None
+    assert "singleflight" in report["cache_hit_rates"]
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"throughput_per_second": 100.0, "stages_ms": {"rag_answer": {"p95": 10.0}}}
+
+    assert pipeline_bench.compare({"throughput_per_second": 90.0, "stages_ms": {"rag_answer": {"p95": 11.5}}}, baseline) == []
+    problems = pipeline_bench.compare({"throughput_per_second": 70.0, "stages_ms": {"rag_answer": {"p95": 13.0}}}, baseline)
+    assert len(problems) == 2
@@ -0,0 +1,124 @@
+# tests/test_rag_result.py
+from types import SimpleNamespace
+
+from app.agents.orchestrator import _filter_by_similarity
+from app.agents import rag
+from app.agents.rag import adaptive_cutoff, build_rag_result
+from app.rag import vectorstore
+
+
+def _doc(text, source, chunk_id, category="faq"):
+    return SimpleNamespace(page_content=text, metadata={"source": source, "chunk_id": chunk_id, "category": category})
+
+
+HITS = [
+    (_doc("## Reset\nUse the link\nin the email.", "faq.md", 3), 0.20),
+    (_doc("Pricing:\nPro plan", "pricing.md", 1, "policies"), 0.90),
+    (_doc("Login help", "guide.md", 7, "guide"), 0.35),
+]
+
+
+def test_snippets_keep_text_source_and_distance():
+    result = build_rag_result(HITS)
+
+    assert [s.source for s in result.snippets] == ["faq.md", "guide.md", "pricing.md"]
+    top = result.snippets[0]
+    assert top.text == "## Reset\nUse the link\nin the email."
+    assert top.chunk_id == 3 and top.category == "faq"
+    assert top.distance == 0.20
+    # cosine 0.9 on the default calibration curve
+    assert top.score == 0.97
+    assert result.sources == ["faq.md", "guide.md", "pricing.md"]
+
+
+def test_filter_handles_multiline_chunks():
+    result = _filter_by_similarity(build_rag_result(HITS), 0.6)
+
+    assert [s.source for s in result.snippets] == ["faq.md", "guide.md"]
+    assert result.sources == ["faq.md", "guide.md"]
+    assert result.context.startswith("## Reset\nUse the link\nin the email.")
+    assert "Pro plan" not in result.context
+
+
+def test_no_hits_is_insufficient_context():
+    result = build_rag_result([])
+    assert result.context == "INSUFFICIENT_CONTEXT"
+    assert result.snippets == []
+
+
+def test_adaptive_top_k_cuts_at_score_gap():
+    result = build_rag_result(HITS, adaptive=True)
+    # cosines 0.90, 0.825, 0.55: the 0.275 drop ends the list
+    assert [s.source for s in result.snippets] == ["faq.md", "guide.md"]
+
+
+def test_adaptive_top_k_keeps_one_clear_winner_and_at_most_k():
+    assert adaptive_cutoff([0.10, 0.60, 0.62]) == 1
+    assert adaptive_cutoff([0.30 + i * 0.001 for i in range(8)], k=5) == 5
+    single = build_rag_result(HITS[:1], adaptive=True)
+    assert len(single.snippets) == 1 and single.similarity_score == 0.97
+
+
+def test_rag_answer_cached_by_normalized_query_and_index_version(monkeypatch, empty_rag_cache):
+    calls = []
+    version = {"v": "v1"}
+
+    def retrieve(query, k=5):
+        calls.append(query)
+        return HITS
+
+    monkeypatch.setattr(rag, "retrieve", retrieve)
+    monkeypatch.setattr(rag, "retrieve_batch", lambda queries, k=5: [retrieve(q) for q in queries])
+    monkeypatch.setattr(rag, "index_version", lambda: version["v"])
+
+    first = rag.rag_answer("Reset  my password")
+    assert rag.rag_answer("reset my PASSWORD ") is first
+    assert rag.rag_answer_batch(["reset my password", "pricing"])[0] is first
+    assert calls == ["Reset  my password", "pricing"]
+
+    version["v"] = "v2"  # re-ingest
+    rag.rag_answer("reset my password")
+    assert len(calls) == 3
+
+
+def test_index_version_follows_the_loaded_index(monkeypatch, tmp_path):
+    loads = []
+
+    def write(content):
+        for name in ("index.faiss", "index.pkl"):
+            (tmp_path / name).write_text(content)
+
+    def load_db():
+        loads.append((tmp_path / "index.pkl").read_text())
+        return SimpleNamespace(name=loads[-1])
+
+    write("v1")
+    monkeypatch.setattr(vectorstore, "VECTORSTORE_PATH", str(tmp_path))
+    monkeypatch.setattr(vectorstore, "_load_db", load_db)
+    monkeypatch.setattr(vectorstore, "_db", None)
+    monkeypatch.setattr(vectorstore, "_db_version", None)
+
+    assert vectorstore.get_db().name == "v1" and vectorstore.get_db().name == "v1"
+    v1 = vectorstore.index_version()
+    assert loads == ["v1"] and v1 == vectorstore.disk_index_version()
+
+    # Re-ingest: the next access reloads, and the cache key moves with the loaded index
+    write("v2-rebuilt")
+    v2 = vectorstore.index_version()
+    assert v2 != v1 and loads == ["v1", "v2-rebuilt"]
+    assert vectorstore.get_db().name == "v2-rebuilt" and len(loads) == 2
+
+    # A failed reload keeps serving, and reporting, the loaded index
+    write("v3-broken")
+    monkeypatch.setattr(vectorstore, "_load_db", lambda: (_ for _ in ()).throw(OSError("truncated pickle")))
+    assert vectorstore.get_db().name == "v2-rebuilt" and vectorstore.index_version() == v2
+
+
+def test_filter_keeps_every_close_hit_and_empties_when_none_pass():
+    # Three close hits: the lowest one is still relevant and must not be dropped for ranking last
+    close = [(_doc(f"chunk {i}", "faq.md", i), 0.20 + i * 0.01) for i in range(3)]
+    assert len(_filter_by_similarity(build_rag_result(close), 0.6).snippets) == 3
+
+    far = [(_doc("unrelated", "guide.md", 9, "guide"), 1.2)]
+    result = _filter_by_similarity(build_rag_result(far), 0.6)
+    assert result.snippets == [] and result.context == "INSUFFICIENT_CONTEXT"
@@ -0,0 +1,51 @@
+# tests/test_routing.py
+import json
+
+from app.agents import responder
+from app.schemas import TicketInput
+from app.utils import routing
+
+
+def test_short_confident_prompt_uses_fast_model():
+    route = routing.choose_route("system", "short question", confidence=0.92)
+    assert route.name == "fast"
+    assert route.model == routing.FAST_MODEL
+
+
+def test_long_prompt_uses_large_model_when_time_allows():
+    long_prompt = "policy text " * 2000
+    assert routing.choose_route("s", long_prompt, confidence=0.9, latency_target=20).name == "large"
+    # same prompt under a tight budget cannot afford the large model
+    assert routing.choose_route("s", long_prompt, confidence=0.9, latency_target=1).name == "fast"
+
+
+def test_unknown_confidence_stays_on_default(monkeypatch):
+    assert routing.choose_route("s", "short question").name == "default"
+    assert routing.choose_route("s", "short question", confidence=0.3).name == "large"
+    monkeypatch.setattr(routing, "LARGE_ON_LOW_CONFIDENCE", False)
+    assert routing.choose_route("s", "short question", confidence=0.3).name == "default"
+
+
+def test_medium_prompt_stays_on_default():
+    route = routing.choose_route("s", "x" * 8000, confidence=0.7)
+    assert route.name == "default"
+    assert route.model == routing.DEFAULT_MODEL
+
+
+def test_responder_routes_and_records_escalation_rate(monkeypatch):
+    routing.route_calls.reset()
+    routing.route_escalations.reset()
+    seen = {}
+
+    def fake_call_llm(system, prompt, temperature, stage="unknown", model=None):
+        seen["model"] = model
+        return json.dumps({"response": "Merci.", "escalate": True})
+
+    monkeypatch.setattr(responder, "call_llm", fake_call_llm)
+    result = responder.generate_response("ctx", TicketInput(ticket_id="T1", content="mot de passe"), confidence=0.95)
+
+    assert result.escalated is True
+    assert seen["model"] == routing.FAST_MODEL
+    stats = routing.route_stats()
+    assert stats["fast"][routing.FAST_MODEL]["calls"] == 1
+    assert stats["fast"][routing.FAST_MODEL]["escalation_rate"] == 1.0
@@ -0,0 +1,43 @@
+# tests/test_scoring.py
+import json
+
+import numpy as np
+import pytest
+
+from app.agents.orchestrator import _snippet_confidences
+from app.agents.rag import build_rag_result
+from app.rag import scoring
+from tests.test_rag_result import HITS
+
+
+@pytest.fixture
+def default_curve():
+    scoring.set_calibration(None, None)
+    yield
+    scoring.set_calibration(None, None)
+
+
+def test_distances_map_to_cosines_and_calibrated_confidences(default_curve):
+    distances = np.array([0.0, 0.2, 0.8, 1.2, 4.5])
+    assert np.allclose(scoring.cosines(distances), [1.0, 0.9, 0.6, 0.4, -1.0])
+    assert np.allclose(scoring.confidences(distances), [0.99, 0.97, 0.6, 0.1, 0.0])
+    assert scoring.cosine_from_distance(0.2) == pytest.approx(0.9)
+
+
+def test_evaluation_gets_one_confidence_per_snippet(default_curve):
+    result = build_rag_result(HITS)
+    assert _snippet_confidences(result) == [0.97, 0.932, 0.45]
+
+
+def test_fit_calibration_is_monotone(tmp_path, default_curve):
+    values = [0.3, 0.4, 0.5, 0.55, 0.6, 0.7, 0.8, 0.9]
+    relevant = [0, 1, 0, 0, 1, 1, 0, 1]
+    xs, ys = scoring.fit_calibration(values, relevant, bins=4)
+    assert xs == (0.35, 0.525, 0.65, 0.85)
+    # bin rates 0.5, 0, 1, 0.5 pooled into non-decreasing pairs
+    assert ys == (0.25, 0.25, 0.75, 0.75)
+
+    path = tmp_path / "calibration.json"
+    path.write_text(json.dumps({"cosines": xs, "confidences": ys}))
+    scoring.set_calibration(*scoring.load_calibration(str(path)))
+    assert scoring.confidences([2 * (1 - 0.35)])[0] == pytest.approx(ys[0])
@@ -0,0 +1,57 @@
+# tests/test_semantic_cache.py
+import asyncio
+
+import numpy as np
+
+from app.agents import orchestrator, semantic_cache
+from app.agents.semantic_cache import SemanticAnswerCache
+from app.schemas import FinalResponse, TicketInput
+
+ANSWER = FinalResponse(ticket_id="T0", response="Use the reset link.", escalated=False, reason="Answered by automated system.")
+
+
+def _unit(*xs):
+    v = np.asarray(xs, dtype="float32")
+    return v / np.linalg.norm(v)
+
+
+def test_lookup_needs_close_vector_same_language_and_version():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store(_unit(1, 0, 0), "en", 0.6, "v1", ANSWER)
+
+    assert cache.lookup(_unit(1, 0.1, 0), "en", 0.6, "v1") == ANSWER
+    assert cache.lookup(_unit(1, 1, 0), "en", 0.6, "v1") is None
+    assert cache.lookup(_unit(1, 0.1, 0), "fr", 0.6, "v1") is None
+    # A rebuilt KB drops every entry
+    assert cache.lookup(_unit(1, 0, 0), "en", 0.6, "v2") is None
+    assert len(cache) == 0
+
+
+def test_escalations_are_not_cached_and_eviction_keeps_newest():
+    cache = SemanticAnswerCache(max_entries=4)
+    cache.store(_unit(1, 0), "en", 0.6, "v1", ANSWER.model_copy(update={"escalated": True}))
+    assert len(cache) == 0
+    for i in range(5):
+        cache.store(_unit(1, i), "en", 0.6, "v1", ANSWER.model_copy(update={"response": str(i)}))
+    assert len(cache) == 3
+    assert cache.lookup(_unit(1, 4), "en", 0.6, "v1").response == "4"
+
+
+def test_pipeline_served_from_cache_for_near_duplicates(monkeypatch, stub_stages):
+    vectors = {"How do I reset my password?": _unit(1, 0), "how can I reset my password": _unit(1, 0.05)}
+    monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_ENABLED", True)
+    monkeypatch.setattr(semantic_cache, "answer_cache", SemanticAnswerCache())
+    monkeypatch.setattr(orchestrator, "embed_texts", lambda texts: np.stack([vectors[t] for t in texts]))
+    monkeypatch.setattr(orchestrator, "index_version", lambda: "v1")
+
+    async def respond(context, ticket, confidence=None, latency_target=None):
+        stub_stages["llm_calls"] += 1
+        return FinalResponse(ticket_id=ticket.ticket_id, response=context, escalated=False, reason="Answered by automated system.")
+
+    monkeypatch.setattr(orchestrator, "generate_response_async", respond)
+
+    first = asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="How do I reset my password?")))
+    second = asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T2", content="how can I reset my password")))
+
+    assert stub_stages["llm_calls"] == 1
+    assert second.ticket_id == "T2" and second.response == first.response
@@ -0,0 +1,84 @@
+# tests/test_singleflight.py
+import threading
+import time
+
+from app.agents import orchestrator
+from app.schemas import FinalResponse, TicketInput
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight("test")
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    assert all(value == "value" for value, _ in results)
+    assert flight.in_flight() == 0
+
+
+def test_followers_receive_leader_exception():
+    flight = SingleFlight("test")
+    started = threading.Event()
+    errors = []
+
+    def work():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("llm down")
+
+    def call():
+        try:
+            flight.do("k", work)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+
+
+def test_process_ticket_rewrites_ticket_id_for_duplicates(monkeypatch):
+    calls = []
+
+    def fake_pipeline(ticket, cosine_threshold):
+        calls.append(ticket.ticket_id)
+        time.sleep(0.1)
+        return FinalResponse(ticket_id=ticket.ticket_id, response="reset it", escalated=False, reason="ok")
+
+    monkeypatch.setattr(orchestrator, "_run_pipeline", fake_pipeline)
+    out = {}
+
+    def submit(tid, content):
+        out[tid] = orchestrator.process_ticket(TicketInput(ticket_id=tid, content=content))
+
+    threads = [
+        threading.Thread(target=submit, args=("T1", "I forgot my password")),
+        threading.Thread(target=submit, args=("T2", "  i FORGOT my   password ")),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert out["T1"].ticket_id == "T1"
+    assert out["T2"].ticket_id == "T2"
+    assert out["T1"].response == out["T2"].response
@@ -0,0 +1,53 @@
+# tests/test_speculative_response.py
+import asyncio
+from types import SimpleNamespace
+
+from app.agents import orchestrator
+from app.schemas import TicketInput
+
+
+def _enable(monkeypatch, stub_stages, decision):
+    calls = {"started": 0, "cancelled": 0}
+
+    async def respond(context, ticket, confidence=None, latency_target=None):
+        calls["started"] += 1
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            calls["cancelled"] += 1
+            raise
+        return orchestrator.FinalResponse(ticket_id=ticket.ticket_id, response=context, escalated=False, reason="ok")
+
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_RESPONSE", True)
+    monkeypatch.setattr(orchestrator, "generate_response_async", respond)
+    monkeypatch.setattr(orchestrator, "evaluate", lambda **kw: SimpleNamespace(decision=decision, confidence_score=0.9, reason="Negative sentiment"))
+    orchestrator.speculative_responses.reset()
+    return calls
+
+
+def test_speculative_response_is_off_by_default():
+    assert not orchestrator.SPECULATIVE_RESPONSE
+
+
+def test_speculative_response_used_on_approve(monkeypatch, stub_stages):
+    calls = _enable(monkeypatch, stub_stages, "APPROVE")
+    result = asyncio.run(orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="reset password")))
+
+    assert result.response == "Use the reset link." and not result.escalated
+    assert calls == {"started": 1, "cancelled": 0}
+    assert orchestrator.speculative_responses.value(outcome="used") == 1
+
+
+def test_speculative_response_cancelled_on_escalate(monkeypatch, stub_stages):
+    calls = _enable(monkeypatch, stub_stages, "ESCALATE")
+
+    async def main():
+        result = await orchestrator.process_ticket_async(TicketInput(ticket_id="T1", content="this is awful"))
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(main())
+
+    assert result.escalated
+    assert calls == {"started": 1, "cancelled": 1}
+    assert orchestrator.speculative_responses.value(outcome="wasted") == 1
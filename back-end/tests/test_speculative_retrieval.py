@@ -0,0 +1,71 @@
+# tests/test_speculative_retrieval.py
+import asyncio
+
+import numpy as np
+
+from app.agents import orchestrator, rag
+from app.rag import inference_service, vectorstore
+from app.schemas import AnalysisResult, FinalResponse, RagResult, TicketInput
+
+
+def _enable(monkeypatch, stub_stages, summary, vectors):
+    queries = []
+
+    def rag(query):
+        queries.append(query)
+        return RagResult(context="Use the reset link.", sources=["faq.md"], similarity_score=0.9)
+
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_RETRIEVAL", True)
+    monkeypatch.setattr(orchestrator, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(orchestrator, "analyze_ticket", lambda text: AnalysisResult(summary=summary, keywords=[]))
+    monkeypatch.setattr(orchestrator, "rag_answer", rag)
+    monkeypatch.setattr(orchestrator, "generate_response", lambda context, ticket, confidence=None, latency_target=None: FinalResponse(
+        ticket_id=ticket.ticket_id, response=context, escalated=False, reason="ok"))
+    monkeypatch.setattr(orchestrator, "embed_texts", lambda texts: np.asarray(vectors, dtype="float32"))
+    orchestrator.speculative_retrievals.reset()
+    return queries
+
+
+def test_speculative_result_reused_when_summary_embeds_close(monkeypatch, stub_stages):
+    queries = _enable(monkeypatch, stub_stages, "password reset", [[1.0, 0.0], [0.96, 0.28]])
+    ticket = TicketInput(ticket_id="T1", content="I forgot my password, how do I reset it?")
+
+    asyncio.run(orchestrator.process_ticket_async(ticket))
+    orchestrator.process_ticket(ticket)
+
+    assert queries == [ticket.content, ticket.content]
+    assert orchestrator.speculative_retrievals.value(outcome="reused") == 2
+
+
+def test_retrieval_reruns_on_summary_when_it_drifts(monkeypatch, stub_stages):
+    queries = _enable(monkeypatch, stub_stages, "billing question", [[1.0, 0.0], [0.0, 1.0]])
+    ticket = TicketInput(ticket_id="T1", content="I forgot my password, how do I reset it?")
+
+    asyncio.run(orchestrator.process_ticket_async(ticket))
+
+    assert queries == [ticket.content, "billing question"]
+    assert orchestrator.speculative_retrievals.value(outcome="rerun") == 1
+
+
+def test_raw_ticket_is_embedded_once(monkeypatch, stub_stages):
+    ticket = TicketInput(ticket_id="T1", content="I forgot my password, how do I reset it?")
+    vectors = {ticket.content: [1.0, 0.0], "password reset": [0.96, 0.28]}
+    embedded = []
+
+    def embed_local(texts):
+        embedded.extend(texts)
+        return np.asarray([vectors[t] for t in texts], dtype="float32")
+
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_RETRIEVAL", True)
+    monkeypatch.setattr(orchestrator, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(orchestrator, "analyze_ticket", lambda text: AnalysisResult(summary="password reset", keywords=[]))
+    monkeypatch.setattr(orchestrator, "rag_answer", rag.rag_answer)
+    monkeypatch.setattr(inference_service, "INFERENCE_SOCKET", None)
+    monkeypatch.setattr(vectorstore, "EMBED_MICRO_BATCH", False)
+    monkeypatch.setattr(vectorstore, "embed_local", embed_local)
+    monkeypatch.setattr(vectorstore, "search_vectors", lambda vecs, k=5: [[] for _ in vecs])
+
+    asyncio.run(orchestrator.process_ticket_async(ticket))
+
+    # Speculative retrieval embeds the raw text, the match check only the summary
+    assert embedded == [ticket.content, "password reset"]
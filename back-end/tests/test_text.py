@@ -0,0 +1,25 @@
+# tests/test_text.py
+from app.agents.evaluator import evaluate
+from app.utils.text import extract_keywords, polarity, polarity_batch
+from bench.pipeline_bench import load_corpus
+from bench.text_bench import legacy_keywords
+
+
+def test_keywords_match_previous_fallback_on_corpus():
+    for ticket in load_corpus():
+        assert extract_keywords(ticket.content) == legacy_keywords(ticket.content)
+
+
+def test_polarity_flags_angry_tickets_in_en_and_fr():
+    assert polarity("This is terrible, I am very angry") < -0.5
+    assert polarity("Je suis très déçu, c'est inacceptable") < -0.5
+    assert polarity("I forgot my password") == 0.0
+    assert polarity("Merci, tout est parfait") > 0
+    assert polarity("not bad") > 0
+    assert polarity_batch(["bad", "good"]) == [polarity("bad"), polarity("good")]
+
+
+def test_evaluate_escalates_on_negative_sentiment():
+    result = evaluate("This service is awful and useless", "Use the reset link.", [0.9] * 5, [])
+    assert result.decision == "ESCALATE" and "sentiment" in result.reason
+    assert evaluate("x", "Use the reset link.", [0.9] * 5, [], sentiment=0.0).decision == "APPROVE"
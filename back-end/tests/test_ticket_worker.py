@@ -0,0 +1,82 @@
+# tests/test_ticket_worker.py
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ticket_worker = pytest.importorskip("app.workers.ticket_worker")
+
+from app.core.database import Base
+from app.models.tickets import Ticket
+from app.models.users import User
+from app.schemas import FinalResponse
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    client = User(first_name="A", last_name="B", email="a@b.c", hashed_password="x", role="client")
+    session.add(client)
+    session.commit()
+    for i, text in enumerate(["reset password", "refund delay", "crash the llm"]):
+        session.add(Ticket(title=f"Ticket {i}", description=text, category="faq", client_id=client.id, reference=f"FAQ-2025-00000{i}"))
+    session.add(Ticket(title="Done", description="already answered", category="faq", client_id=client.id, processed=True, response="hi"))
+    session.commit()
+    yield session
+    session.close()
+
+
+async def fake_batch(tickets):
+    results = []
+    for t in tickets:
+        if "crash" in t.content:
+            results.append(RuntimeError("llm down"))
+        else:
+            escalate = "refund" in t.content
+            results.append(FinalResponse(ticket_id=t.ticket_id, response=f"re: {t.ticket_id}", escalated=escalate, reason="x"))
+    return results
+
+
+def test_batch_writes_results_and_skips_failures(db):
+    claimed = ticket_worker.process_batch(db, batch_size=10, process_batch_async=fake_batch)
+    assert claimed == 3
+
+    answered, escalated, failed = (db.query(Ticket).filter(Ticket.reference == f"FAQ-2025-00000{i}").one() for i in range(3))
+    assert answered.processed and answered.response == "re: FAQ-2025-000000" and answered.responded_at
+    # Escalated: flagged for an agent, not answered
+    assert escalated.escalated and not escalated.processed and escalated.escalated_at
+    assert escalated.response is None and escalated.responded_at is None
+    assert failed.response is None and not failed.processed and failed.ai_attempts == 1
+
+    # The failed ticket backs off instead of heading the next batch
+    assert ticket_worker.claim_unprocessed(db, 10) == []
+
+
+def test_failing_ticket_is_retried_with_backoff_then_escalated(db, monkeypatch):
+    monkeypatch.setattr(ticket_worker, "AI_MAX_ATTEMPTS", 3)
+    # Backoffs already over by the next poll
+    monkeypatch.setattr(ticket_worker, "AI_RETRY_BACKOFF_SECONDS", -1)
+    ticket_worker.process_batch(db, batch_size=10, process_batch_async=fake_batch)
+    failed = db.query(Ticket).filter(Ticket.reference == "FAQ-2025-000002").one()
+
+    for attempt in (2, 3):
+        # The ticket is claimed, and fails, again
+        assert ticket_worker.process_batch(db, batch_size=10, process_batch_async=fake_batch) == 1
+        db.refresh(failed)
+        assert failed.ai_attempts == attempt
+
+    # Out of attempts: escalated to an agent and never claimed again
+    assert failed.escalated and failed.escalated_at and failed.ai_claimed_at is None
+    assert ticket_worker.claim_unprocessed(db, 10) == []
+
+
+def test_leased_tickets_are_skipped_until_the_lease_expires(db, monkeypatch):
+    first = ticket_worker.claim_unprocessed(db, 1)
+    assert len(first) == 1
+    # Committed: the lease, not a row lock, keeps other workers away
+    assert not db.in_transaction()
+    assert first[0][0] not in [i for i, _ in ticket_worker.claim_unprocessed(db, 10)]
+
+    monkeypatch.setattr(ticket_worker, "CLAIM_LEASE_SECONDS", -1)
+    assert first[0][0] in [i for i, _ in ticket_worker.claim_unprocessed(db, 10)]